@@ -114,32 +114,31 @@ class DecDialog(QDialog):
         log.info(f"wait_for_dec: recording dec={self.current_dec}")
         self.recording = True
         self.minitars.verbose = True
-        # processEvents below lets Threepio.tick() run, and tick() calls
-        # read_latest() on this same MiniTars — it would consume the very
-        # reading we are waiting for. Pause the primary timer for the duration.
-        self.threepio.timer.stop()
+        # The acquisition thread calls read_latest() on this same MiniTars --
+        # it would consume the very reading we are waiting for. Keep it off the
+        # devices for the duration.
         start = time.perf_counter()
         polls = 0
         try:
-            while True:
-                new_dec = self.minitars.read_latest()
-                polls += 1
-                if new_dec is not None:
-                    log.info(
-                        f"wait_for_dec: got {new_dec} after "
-                        f"{time.perf_counter() - start:.3f}s ({polls} polls)"
-                    )
-                    return new_dec
-                if time.perf_counter() - start > self.READ_TIMEOUT:
-                    log.error(
-                        f"wait_for_dec: timed out after {self.READ_TIMEOUT}s "
-                        f"({polls} polls, bad_lines={self.minitars.bad_line_count})"
-                    )
-                    return None
-                QApplication.processEvents()
-                time.sleep(self.POLL_INTERVAL)
+            with self.threepio.acquisition.paused():
+                while True:
+                    new_dec = self.minitars.read_latest()
+                    polls += 1
+                    if new_dec is not None:
+                        log.info(
+                            f"wait_for_dec: got {new_dec} after "
+                            f"{time.perf_counter() - start:.3f}s ({polls} polls)"
+                        )
+                        return new_dec
+                    if time.perf_counter() - start > self.READ_TIMEOUT:
+                        log.error(
+                            f"wait_for_dec: timed out after {self.READ_TIMEOUT}s "
+                            f"({polls} polls, bad_lines={self.minitars.bad_line_count})"
+                        )
+                        return None
+                    QApplication.processEvents()
+                    time.sleep(self.POLL_INTERVAL)
         finally:
-            self.threepio.timer.start(self.threepio.BASE_PERIOD)
             self.minitars.verbose = False
             self.recording = False
 
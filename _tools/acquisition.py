@@ -0,0 +1,217 @@
+"""
+The acquisition worker. It owns the DATAQ and the declinometer, reads and
+filters both continuously on a thread of its own, and hands the GUI
+timestamped blocks of samples through a RingBuffer. How late the GUI gets
+around to draining them then has no effect on what is acquired.
+"""
+
+import selectors
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable
+
+import numpy as np
+
+from .ringbuffer import RingBuffer
+
+
+@dataclass(frozen=True)
+class SampleBlock:
+    """
+    What one acquisition pass read: the DAQ's scans oldest-first as an (N, 2)
+    block of channel A and B volts, already filtered; the time on the sidereal
+    timeline (see SuperClock.monotonic_to_timeline) at which each of them was
+    taken; and the newest raw declinometer reading with the time it arrived
+    at, or None for both if none arrived. Both times are on the timeline as it
+    was after the first `clock_steps` of the clock's steps, and need the rest
+    of them added to be on it as it is now.
+    """
+
+    timestamps: np.ndarray
+    scans: np.ndarray
+    dec: float | None
+    dec_timestamp: float | None
+    clock_steps: int
+
+
+class Acquisition:
+    """
+    Reads Tars and MiniTars either on a worker thread (start()) or inline, one
+    pass per drain(), when no thread is running -- as in simulation, where the
+    simulated devices read their values off the GUI's dials, and in tests.
+
+    The worker is the ring's only producer and drain()'s caller its only
+    consumer. Everything else that touches the devices while the worker runs
+    must go through paused(), which waits out the pass in progress.
+
+    Between passes the worker blocks on both ports until one has bytes
+    waiting, so it costs nothing while the devices are quiet and reads what
+    they send as soon as it arrives. Set on_data to hear when there is
+    something to drain(): it is called on the worker's thread, once per
+    drain() at most however many blocks arrive in between.
+    """
+
+    # How long the worker sleeps after a pass that found nothing when it can't
+    # wait on the ports -- a simulated device has none -- or while paused. The
+    # DI-4108 produces a scan every ~10 ms, so this keeps the backlog in its
+    # buffer to a fraction of a scan without spinning.
+    IDLE_INTERVAL = 0.002
+
+    # The longest the worker waits on the ports at a time, which is how long
+    # stop() can take
+    MAX_WAIT = 0.1
+
+    # Blocks, not samples. A pass that reads anything pushes one block, so at
+    # ~100 scans/s this covers several seconds of the GUI thread not draining.
+    RING_CAPACITY = 1024
+
+    def __init__(self, tars, minitars, clock, capacity: int = RING_CAPACITY):
+        self.tars = tars
+        self.minitars = minitars
+        self.clock = clock
+        self.ring = RingBuffer(capacity)
+
+        self._device_lock = threading.Lock()
+        self._pause_depth = 0  # Nested paused() blocks open
+        self._running = False
+        self._thread: threading.Thread | None = None
+
+        self.on_data: Callable[[], None] | None = None
+        # Set by the worker when it calls on_data and cleared by drain(), so
+        # a consumer that is slow to respond gets one call, not one per block
+        self._notified = False
+
+        # An exception that ended the worker, re-raised on the consumer's
+        # thread so a disconnected device fails as loudly as it did when it
+        # was read from tick().
+        self.error: BaseException | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._running = True
+        self._thread = threading.Thread(
+            target=self._run, name="threepio-acquisition", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        thread = self._thread
+        if thread is None:
+            return
+        self._running = False
+        thread.join()
+        self._thread = None
+
+    def poll(self) -> bool:
+        """
+        Run one acquisition pass: read everything both devices have waiting and
+        queue it as one block. Returns whether anything was read from a real
+        device: a simulated one makes a reading up on every pass, so counting
+        it would have the worker pass as fast as it can rather than wait.
+        """
+        with self._device_lock:
+            if self._pause_depth:
+                return False
+            scans = self.tars.read_all()
+            dec = self.minitars.read_latest()
+            if len(scans) == 0 and dec is None:
+                return False
+            scan_times = self.tars.scan_times(len(scans))
+            arrival = time.monotonic()
+            while True:
+                # A calibration on the GUI thread can step the clock at any
+                # moment; stamp again if it did so while the stamps were made,
+                # so that clock_steps says which timeline they are on
+                clock_steps = len(self.clock.steps)
+                # Stamped from the DAQ's scan clock, not from when this pass ran:
+                # a pass that is late or slow must not move the samples it read.
+                timestamps = self.clock.monotonic_to_timeline(scan_times)
+                # The declinometer has no clock to go by, so it is stamped on arrival
+                dec_timestamp = None
+                if dec is not None:
+                    dec_timestamp = float(self.clock.monotonic_to_timeline(arrival))
+                if len(self.clock.steps) == clock_steps:
+                    break
+        self.ring.push(SampleBlock(timestamps, scans, dec, dec_timestamp, clock_steps))
+        if self.on_data is not None and not self._notified:
+            self._notified = True
+            self.on_data()
+        return bool(
+            (len(scans) and not self._simulated(self.tars))
+            or (dec is not None and not self._simulated(self.minitars))
+        )
+
+    def drain(self) -> list[SampleBlock]:
+        """Everything acquired since the last call, oldest first."""
+        if self.error is not None:
+            raise self.error
+        self._notified = False  # Before draining, so a block after it still notifies
+        if self._thread is None:
+            self.poll()
+        return self.ring.drain()
+
+    @contextmanager
+    def paused(self):
+        """
+        Keep the worker off both devices for the duration, e.g. while a dialog
+        reads the declinometer itself or the filters are being reconfigured.
+        Pauses nest: the worker resumes only once the outermost one ends.
+        """
+        with self._device_lock:  # Lets a pass in progress finish first
+            self._pause_depth += 1
+        try:
+            yield
+        finally:
+            with self._device_lock:
+                self._pause_depth -= 1
+
+    def _run(self):
+        selector = None
+        try:
+            selector = self._selector()
+            while self._running:
+                if self.poll():
+                    continue
+                if selector is None or self._pause_depth:
+                    # While paused the ports may well have bytes waiting, which
+                    # would wake the selector straight away, again and again
+                    time.sleep(self.IDLE_INTERVAL)
+                else:
+                    selector.select(self.MAX_WAIT)
+        except BaseException as e:
+            self.error = e
+        finally:
+            if selector is not None:
+                selector.close()
+
+    def _selector(self) -> selectors.BaseSelector | None:
+        """
+        A selector that wakes when a real device has input waiting, or None if
+        one of them can't be waited on, or neither is real. A simulated device
+        is read whenever the worker passes anyway.
+        """
+        selector = selectors.DefaultSelector()
+        for device in (self.tars, self.minitars):
+            if self._simulated(device):
+                continue
+            fileno = device.fileno() if hasattr(device, "fileno") else None
+            if fileno is None:
+                selector.close()
+                return None
+            selector.register(fileno, selectors.EVENT_READ)
+        if not selector.get_map():
+            selector.close()
+            return None
+        return selector
+
+    @staticmethod
+    def _simulated(device) -> bool:
+        """Whether `device` is making its readings up, for want of hardware."""
+        return bool(getattr(device, "testing", False))
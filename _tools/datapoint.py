@@ -1,14 +1,29 @@
 from dataclasses import dataclass
 
+from .superclock import SIDEREAL_DAY_SECONDS
+
 
 @dataclass(frozen=True)
 class DataPoint:
-    """Each data point taken (timestamp, dec, a, b)"""
+    """
+    Each data point taken (timestamp, dec, a, b). The timestamp is on the
+    sidereal timeline, so it never wraps; ra is what is displayed and written.
+    """
 
     timestamp: float
     dec: float
     a: float
     b: float
 
+    @property
+    def ra(self) -> float:
+        """Sidereal seconds of the day the point was taken at."""
+        return self.timestamp % SIDEREAL_DAY_SECONDS
+
+    @property
+    def day(self) -> int:
+        """The sidereal day the point was taken on."""
+        return int(self.timestamp // SIDEREAL_DAY_SECONDS)
+
     def to_tuple(self) -> tuple[float, float, float, float]:
         return self.timestamp, self.dec, self.a, self.b
@@ -61,12 +61,16 @@ WRITE_COMMANDS = ("setoasc", "setcasc")
 # and replies "OK". It is the rate 'setcasc' then transmits at, and it lives in
 # non-volatile memory like the rest, so two units of the same part number can
 # stream at very different rates. The factory default is str1000 (1Hz), which
-# is 10x slower than the str0100 (10Hz) the observatory's older unit uses.
+# is 10x slower than the str0100 (10Hz) the observatory's older unit uses, and
+# 20x slower than the str0050 Threepio's handshake sends. The handshake only
+# sends it when it has to switch the output format, though: a unit that is
+# already streaming the wanted format keeps whatever interval it was left at,
+# which is what the output rate check below is for.
 # Note this is NOT the low pass filter: the datasheet's filter index table
 # (0.125-16Hz) explicitly "does not relate to output data rate".
 RATE_COMMAND = "str{:04d}"
 DEFAULT_INTERVAL_MS = 1000
-THREEPIO_INTERVAL_MS = 100
+THREEPIO_INTERVAL_MS = 50
 # Returns an NMEA0183-mode unit to the LD protocol. Also a persistent change.
 NMEA_TO_LD = "$PLDL100,1*38\r\n"
 
@@ -1,11 +1,130 @@
+from bisect import bisect_right
+
+import numpy as np
+
+LINEAR = "linear"
+PCHIP = "pchip"
+
+
+def _linear(x: np.ndarray, y: np.ndarray):
+    """
+    The calibration as straight segments between its points, extended past
+    either end along the end segment.
+    """
+    slopes = np.diff(y) / np.diff(x)
+
+    def curve(raw):
+        i = np.clip(np.searchsorted(x, raw, side="right") - 1, 0, len(slopes) - 1)
+        return slopes[i] * (raw - x[i]) + y[i]
+
+    return curve
+
+
+def _pchip_slopes(x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    """
+    The slope of a monotone cubic at each point (Fritsch-Carlson, with the
+    shape-preserving three-point ends scipy's PchipInterpolator uses): a
+    weighted harmonic mean of the segments either side, or flat where they
+    disagree in sign, so the curve never overshoots a point.
+    """
+    h = np.diff(x)
+    delta = np.diff(y) / h
+    slopes = np.zeros_like(y)
+
+    w1 = 2 * h[1:] + h[:-1]
+    w2 = h[1:] + 2 * h[:-1]
+    same_sign = delta[:-1] * delta[1:] > 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        harmonic = (w1 + w2) / (w1 / delta[:-1] + w2 / delta[1:])
+    slopes[1:-1] = np.where(same_sign, harmonic, 0.0)
+
+    def end(h0, h1, m0, m1):
+        slope = ((2 * h0 + h1) * m0 - h0 * m1) / (h0 + h1)
+        if np.sign(slope) != np.sign(m0):
+            return 0.0
+        if np.sign(m0) != np.sign(m1) and abs(slope) > 3 * abs(m0):
+            return 3 * m0
+        return slope
+
+    slopes[0] = end(h[0], h[1], delta[0], delta[1])
+    slopes[-1] = end(h[-1], h[-2], delta[-1], delta[-2])
+    return slopes
+
+
+def _end_slopes(x: np.ndarray, y: np.ndarray) -> tuple[float, float]:
+    """The slopes of the first and last segments."""
+    return float((y[1] - y[0]) / (x[1] - x[0])), float((y[-1] - y[-2]) / (x[-1] - x[-2]))
+
+
+def _pchip(x: np.ndarray, y: np.ndarray):
+    """
+    The calibration as a monotone cubic through its points, extended past
+    either end along the end segment, as the linear calibration is: the
+    cubic's own tangent there can be flat. Needs at least three points.
+    """
+    slopes = _pchip_slopes(x, y)
+    low, high = _end_slopes(x, y)
+
+    def curve(raw):
+        raw = np.asarray(raw, dtype=float)
+        i = np.clip(np.searchsorted(x, raw, side="right") - 1, 0, len(x) - 2)
+        h = x[i + 1] - x[i]
+        t = np.clip((raw - x[i]) / h, 0.0, 1.0)
+        # Cubic Hermite basis
+        inside = (
+            (1 + 2 * t) * (1 - t) ** 2 * y[i]
+            + t * (1 - t) ** 2 * h * slopes[i]
+            + t**2 * (3 - 2 * t) * y[i + 1]
+            + t**2 * (t - 1) * h * slopes[i + 1]
+        )
+        below = y[0] + low * (raw - x[0])
+        above = y[-1] + high * (raw - x[-1])
+        return np.where(raw < x[0], below, np.where(raw > x[-1], above, inside))
+
+    return curve
+
+
 class DecCalc:
 
     SOUTH_DEC = -25
     NORTH_DEC = 100
     STEP = 5
 
-    def __init__(self):
+    # LINEAR joins the calibration points with straight lines, which kink at
+    # every point; PCHIP fits a monotone cubic through them, which does not.
+    MODEL = LINEAR
+    # Entries in the lookup table a PCHIP model is baked into, spread evenly
+    # over the calibrated raw range. At 4096 over the ~75 degrees a full
+    # calibration spans, the table's own straight segments are under 0.02
+    # degrees long and stray from the cubic by far less than the sensor's noise.
+    TABLE_SIZE = 4096
+
+    def __init__(self, model: str | None = None):
+        self.model = self.MODEL if model is None else model
         self.fx: list[DecCalc.XY] = []
+        # The table as arrays, for converting many readings at once: raw
+        # readings ascending, their decs, and each segment's slope, so that
+        # segment i runs from x[i] at dec y[i] with slope slopes[i]. Single
+        # readings are faster through plain lists of the same.
+        self.x = np.empty(0)
+        self.y = np.empty(0)
+        self.slopes = np.empty(0)
+        self.segments: tuple[list[float], list[float], list[float]] = ([], [], [])
+        # With a PCHIP model, the curve sampled at TABLE_SIZE even steps of raw
+        # reading from table_start, which the lookup interpolates between; the
+        # end segments carry it on past either end. Kept as a list too, for
+        # the same reason as segments.
+        self.table: np.ndarray | None = None
+        self.table_list: list[float] = []
+        self.table_start = 0.0
+        self.table_step = 1.0
+        self.end_slopes = (0.0, 0.0)
+        # How far each calibration point's dec is from what the model predicts
+        # for its raw reading when fitted to all the other points. A model
+        # passes through every point it is fitted to, so this is what says
+        # whether one of them was misread. NaN at the two ends, where the
+        # prediction would be an extrapolation and say little.
+        self.residuals = np.empty(0)
 
     class XY:
         """X and Y value pair"""
@@ -36,6 +155,11 @@ class DecCalc:
             # readings may run ascending or descending as dec increases.
             # calculate_declination expects ascending x, so normalize here.
             self.fx.sort(key=lambda pair: pair.x)
+            self.x = np.array([pair.x for pair in self.fx])
+            self.y = np.array([pair.y for pair in self.fx])
+            self.slopes = np.diff(self.y) / np.diff(self.x)
+            self.segments = (self.x.tolist(), self.y.tolist(), self.slopes.tolist())
+            self._fit()
 
         try:
             with open("dec-cal.txt", "r") as f:  # Get data from file
@@ -46,20 +170,74 @@ class DecCalc:
             set_fx([i for i in map(lambda a: str(a * 0.01), range(-90, 91, 15))])
             raise FileNotFoundError
 
+    def _fit(self):
+        """Bake the model into its lookup table and work out its residuals."""
+        self.table = None
+        if self.model == PCHIP and len(self.x) >= 3:
+            start, stop = self.x[0], self.x[-1]
+            self.table_start = float(start)
+            self.table_step = float(stop - start) / (self.TABLE_SIZE - 1)
+            self.table = _pchip(self.x, self.y)(np.linspace(start, stop, self.TABLE_SIZE))
+            self.table_list = self.table.tolist()
+            self.end_slopes = _end_slopes(self.x, self.y)
+
+        fit = _pchip if self.table is not None else _linear
+        self.residuals = np.full(len(self.x), np.nan)
+        for i in range(1, len(self.x) - 1):
+            others = np.arange(len(self.x)) != i
+            if others.sum() < (3 if fit is _pchip else 2):
+                continue
+            self.residuals[i] = self.y[i] - fit(self.x[others], self.y[others])(self.x[i])
+
+    def describe_fit(self) -> str:
+        """A line for the operator on how well the calibration hangs together."""
+        if np.isnan(self.residuals).all():
+            return f"{self.model} fit, too few points to check"
+        worst = int(np.nanargmax(np.abs(self.residuals)))
+        rms = float(np.sqrt(np.nanmean(self.residuals**2)))
+        return (
+            f"{self.model} fit, residuals {rms:.3f}° RMS, worst {self.residuals[worst]:+.3f}° "
+            f"at {self.y[worst]:g}°"
+        )
+
     def calculate_declination(self, input_dec: float) -> float:
         """Calculate the true dec from declinometer input and calibration data"""
-        fx = self.fx
+        if self.table is not None:
+            return self._look_up(input_dec)
+        x, y, slopes = self.segments
+        # The segment the input falls in, or the end segment it lies beyond,
+        # extended past the end of the table
+        i = min(max(bisect_right(x, input_dec) - 1, 0), len(slopes) - 1)
+        # (dy/dx)x + y_0
+        return slopes[i] * (input_dec - x[i]) + y[i]
+
+    def calculate_declinations(self, input_decs: np.ndarray) -> np.ndarray:
+        """calculate_declination() for every one of an array of inputs"""
+        if self.table is not None:
+            return self._look_up_all(np.asarray(input_decs, dtype=float))
+        i = np.clip(np.searchsorted(self.x, input_decs, side="right") - 1, 0, len(self.slopes) - 1)
+        return self.slopes[i] * (input_decs - self.x[i]) + self.y[i]
 
-        # Input is within data
-        if fx[0].x <= input_dec <= fx[-1].x:
-            for i, _ in enumerate(self.fx):
-                if fx[i].x <= input_dec <= fx[i + 1].x:
-                    # (dy/dx)x + y_0
-                    return ((fx[i + 1].y - fx[i].y) / (fx[i + 1].x - fx[i].x) * (input_dec - fx[i].x)) + fx[i].y
+    def _look_up(self, input_dec: float) -> float:
+        table = self.table_list
+        position = (input_dec - self.table_start) / self.table_step
+        if position < 0:
+            return table[0] + self.end_slopes[0] * (input_dec - self.table_start)
+        last = len(table) - 1
+        if position >= last:
+            return table[-1] + self.end_slopes[1] * (input_dec - self._table_stop())
+        i = int(position)
+        return table[i] + (table[i + 1] - table[i]) * (position - i)
 
-        # Input is below data
-        if input_dec < fx[0].x:
-            return ((fx[1].y - fx[0].y) / (fx[1].x - fx[0].x) * (input_dec - fx[0].x)) + fx[0].y
+    def _look_up_all(self, input_decs: np.ndarray) -> np.ndarray:
+        table = self.table
+        assert table is not None
+        position = (input_decs - self.table_start) / self.table_step
+        i = np.clip(position.astype(int), 0, len(table) - 2)
+        result = table[i] + (table[i + 1] - table[i]) * (position - i)
+        below = table[0] + self.end_slopes[0] * (input_decs - self.table_start)
+        above = table[-1] + self.end_slopes[1] * (input_decs - self._table_stop())
+        return np.where(position < 0, below, np.where(position > len(table) - 1, above, result))
 
-        # Input is above data
-        return ((fx[-1].y - fx[-2].y) / (fx[-1].x - fx[-2].x) * (input_dec - fx[-1].x)) + fx[-1].y
+    def _table_stop(self) -> float:
+        return self.table_start + self.table_step * (len(self.table_list) - 1)
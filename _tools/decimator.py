@@ -0,0 +1,103 @@
+"""
+Reduces the DAQ's full-rate samples to the few-Hz rate an observation records
+at, keeping what every sample in between said rather than just the last one.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from .datapoint import DataPoint
+
+
+@dataclass(frozen=True)
+class DecimatedPoint(DataPoint):
+    """
+    A DataPoint standing in for every sample of one output period: a, b and dec
+    are the period's means, timestamped at the middle of the period, with each
+    channel's extremes and the number of samples averaged alongside.
+    """
+
+    count: int
+    a_min: float
+    a_max: float
+    b_min: float
+    b_max: float
+
+
+class Decimator:
+    """
+    A boxcar decimator: add() accumulates each block of scans as it arrives,
+    and emit() closes the output period, returning the mean, min and max of
+    everything added since the previous emit().
+
+    The boxcar is a first-order CIC filter, which is all the anti-aliasing this
+    needs: the radiometer's signal is already low-passed by the filter chain,
+    and averaging over the whole output period rejects anything faster than
+    the output rate far better than keeping one instantaneous sample does. The
+    running sums mean the cost per tick is a handful of reductions over the
+    block just read, and the cost per output point is constant however many
+    samples it covers.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """Forget everything added since the last emit()."""
+        self.count = 0
+        self.sums = np.zeros(2)
+        self.mins = np.full(2, np.inf)
+        self.maxes = np.full(2, -np.inf)
+        self.first_timestamp = 0.0
+        self.last_timestamp = 0.0
+        self.dec_sum = 0.0
+
+    def add(
+        self,
+        scans: np.ndarray,
+        first_timestamp: float,
+        last_timestamp: float,
+        dec: float | np.ndarray,
+    ):
+        """
+        Accumulate an (N, 2) block of channel A and B volts whose first and last
+        scans were taken at the given sidereal times, at declination `dec`:
+        either one for every scan or an array of N, one for each.
+        """
+        if len(scans) == 0:
+            return
+        if self.count == 0:
+            self.first_timestamp = first_timestamp
+        self.last_timestamp = last_timestamp
+        self.dec_sum += float(np.sum(dec)) if np.ndim(dec) else dec * len(scans)
+        self.count += len(scans)
+        self.sums += scans.sum(axis=0)
+        np.minimum(self.mins, scans.min(axis=0), out=self.mins)
+        np.maximum(self.maxes, scans.max(axis=0), out=self.maxes)
+
+    def emit(self) -> DecimatedPoint | None:
+        """
+        Close the current output period and return its point, or None if no
+        samples arrived in it.
+        """
+        if self.count == 0:
+            return None
+        a, b = (self.sums / self.count).tolist()
+        a_min, b_min = self.mins.tolist()
+        a_max, b_max = self.maxes.tolist()
+        point = DecimatedPoint(
+            # Scans are evenly spaced, so the mean of their timestamps is the
+            # midpoint of the first and last
+            (self.first_timestamp + self.last_timestamp) / 2,
+            self.dec_sum / self.count,
+            a,
+            b,
+            self.count,
+            a_min,
+            a_max,
+            b_min,
+            b_max,
+        )
+        self.reset()
+        return point
@@ -0,0 +1,74 @@
+"""
+Declination at the moment each DAQ scan was taken, from a declinometer that
+reports far less often than the DAQ scans.
+"""
+
+from collections import deque
+
+import numpy as np
+
+
+class DecTrack:
+    """
+    The last few calibrated declinometer readings, each stamped with the
+    sidereal time it arrived, and the declination between and just beyond them.
+
+    A scan taken between two readings gets the declination interpolated
+    linearly between them. One taken after the newest reading -- the usual case
+    for the newest scans of a block -- gets it extrapolated along the line
+    through the newest two readings, for up to HORIZON seconds, after which the
+    extrapolation stops and the declination it reached is held: a declinometer
+    that has gone quiet is no evidence that the dish kept moving, and stopping
+    there rather than dropping back to the newest reading keeps the track
+    continuous. A scan older than every reading kept gets the oldest.
+
+    The declinometer has no clock to stamp readings from, so they are stamped
+    on arrival, a few milliseconds after they were taken. That is well inside
+    the 50-100 ms between readings that using the latest one for every scan
+    was off by.
+
+    Times are on the sidereal timeline (see SuperClock.monotonic_to_timeline),
+    which does not wrap at sidereal midnight, so a track spanning it stays in
+    order.
+    """
+
+    WINDOW = 16  # Readings; nearly a second at 20 Hz, far more than a tick spans
+    HORIZON = 0.2  # Seconds; a few readings' worth
+
+    def __init__(self, window: int = WINDOW):
+        self.times: deque[float] = deque(maxlen=window)
+        self.decs: deque[float] = deque(maxlen=window)
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def reset(self):
+        self.times.clear()
+        self.decs.clear()
+
+    def shift(self, seconds: float):
+        """Move every reading's time by `seconds`, as when the clock is stepped."""
+        self.times = deque((time + seconds for time in self.times), maxlen=self.times.maxlen)
+
+    def add(self, timestamp: float, dec: float):
+        """Add a reading of `dec` degrees that arrived at sidereal `timestamp`."""
+        self.times.append(timestamp)
+        self.decs.append(dec)
+
+    def at(self, timestamps: np.ndarray) -> np.ndarray:
+        """The declination at each of the sidereal `timestamps`. Needs a reading."""
+        # As offsets from the newest reading, which keeps the slope's
+        # arithmetic clear of the timeline's large values
+        newest = self.times[-1]
+        times = np.fromiter(self.times, dtype=float, count=len(self.times)) - newest
+        decs = np.fromiter(self.decs, dtype=float, count=len(self.decs))
+        offsets = np.asarray(timestamps, dtype=float) - newest
+
+        # np.interp holds the end values beyond either end, which is already
+        # right before the oldest reading; after the newest, add the slope, as
+        # far as the horizon.
+        result = np.interp(offsets, times, decs)
+        if len(times) >= 2 and times[-2] < 0:
+            slope = (decs[-1] - decs[-2]) / -times[-2]
+            result += slope * np.clip(offsets, 0.0, self.HORIZON)
+        return result
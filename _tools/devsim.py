@@ -0,0 +1,400 @@
+"""
+Standalone device simulator. Opens a pseudo-terminal for each of the DI-4108
+and the SOLAR-360 and speaks their real protocols on it, so Threepio, dec_probe
+and the benchmarks exercise the whole serial path -- decoding, framing, backlog
+handling -- instead of the random_data() shortcut that skips it.
+
+    uv run python -m _tools.devsim                      # both devices, real rates
+    uv run python -m _tools.devsim --speed 50           # 50x every rate
+    uv run python -m _tools.devsim --drop 1e-4 --garbage 0.01 --burst 0.001
+
+It prints the two ports to point Threepio at, e.g.
+
+    export THREEPIO_DAQ_PORT=/dev/pts/5
+    export THREEPIO_DEC_PORT=/dev/pts/6
+
+and runs until interrupted. Linux and macOS only: Windows has no ptys.
+
+What is modelled is what the app depends on, measured against the hardware:
+
+  DI-4108    Echoes every command but "start". "stop" and "encode" stall it for
+             ~1 s, and it swallows whatever is sent during the stall. "info 1"
+             answers with the model. Once started, it sends int16 little-endian
+             scans of its scan list at 60 MHz / (srate * dec), in whole packets
+             of 16 << ps bytes.
+  SOLAR-360  Takes 7-byte commands with no terminator, dropping a partial one
+             after 100 ms of silence. Silent until 'setcasc' (like a unit in
+             its shipping state) unless --dec-streaming, then sends a
+             '±xxx.xxx\\r' frame every strXXXX milliseconds, or after
+             'setoint' a big-endian INT32 of thousandths of a degree.
+
+Faults are injected into what the devices send, after framing, so they land
+where real line noise would: mid-scan and mid-frame.
+"""
+import argparse
+import os
+import random
+import select
+import struct
+import sys
+import termios
+import time
+import tty
+
+import numpy as np
+
+BASE_CLOCK_HZ = 60_000_000  # Input to the DI-4108's sample-rate divider
+RANGE_VOLT = (10, 5, 2, 1, 0.5, 0.2)  # DI-4108 range codes, as in Tars
+
+# What the DI-4108's output FIFO holds before it starts losing scans. Nothing
+# here blocks the device on a reader that has stopped reading, just as nothing
+# blocks the real one; the difference is counted in `overflowed`.
+OUTPUT_LIMIT = 1 << 20
+
+
+class Faults:
+    """
+    Corrupts a device's output the ways a real serial line does:
+
+      drop     probability that any one byte is lost
+      garbage  probability that a write has 1-8 random bytes spliced into it
+      burst    probability that a write starts a stall of `burst_seconds`,
+               after which everything held back arrives at once
+    """
+
+    def __init__(self, drop=0.0, garbage=0.0, burst=0.0, burst_seconds=0.2, seed=None):
+        self.drop = drop
+        self.garbage = garbage
+        self.burst = burst
+        self.burst_seconds = burst_seconds
+        self.rng = np.random.default_rng(seed)
+        self.held_until = 0.0
+        self.dropped = 0
+        self.injected = 0
+        self.bursts = 0
+
+    def holding(self, now: float) -> bool:
+        """Whether output is being held back for a burst right now."""
+        if now < self.held_until:
+            return True
+        if self.burst and self.rng.random() < self.burst:
+            self.held_until = now + self.burst_seconds
+            self.bursts += 1
+            return True
+        return False
+
+    def apply(self, data: bytes) -> bytes:
+        if not data:
+            return data
+        if self.drop:
+            kept = self.rng.random(len(data)) >= self.drop
+            self.dropped += len(data) - int(kept.sum())
+            data = np.frombuffer(data, dtype=np.uint8)[kept].tobytes()
+        if self.garbage and self.rng.random() < self.garbage:
+            noise = self.rng.integers(0, 256, self.rng.integers(1, 9), dtype=np.uint8)
+            at = int(self.rng.integers(0, len(data) + 1))
+            data = data[:at] + noise.tobytes() + data[at:]
+            self.injected += len(noise)
+        return data
+
+
+class SimulatedDI4108:
+    """
+    The DI-4108's command and scan protocol, as bytes in and bytes out at given
+    times. It knows nothing about ptys, so tests can drive it directly.
+    """
+
+    MODEL = "4108"
+    STALL_COMMANDS = ("stop", "encode")
+
+    def __init__(self, speed=1.0, stall=1.0, seed=None):
+        self.speed = speed
+        self.stall = stall
+        self.rng = np.random.default_rng(seed)
+
+        self.slist: dict[int, int] = {}
+        self.srate = 1171
+        self.dec = 512
+        self.ps = 0
+
+        self.scanning = False
+        self.scan_start = 0.0
+        self.scans_sent = 0
+        self.busy_until = 0.0
+        self.swallowed = 0
+        self.command_buffer = bytearray()
+        self.replies: list[tuple[float, bytes]] = []  # (due, bytes), in due order
+        self.packet = bytearray()
+
+    @property
+    def scan_rate(self) -> float:
+        return self.speed * BASE_CLOCK_HZ / (self.srate * self.dec)
+
+    @property
+    def packet_size(self) -> int:
+        return 16 << self.ps
+
+    def receive(self, data: bytes, now: float):
+        self.command_buffer += data
+        while b"\r" in self.command_buffer:
+            line, _, rest = bytes(self.command_buffer).partition(b"\r")
+            self.command_buffer = bytearray(rest)
+            self._command(line.decode(errors="replace").strip(), now)
+
+    def _command(self, command: str, now: float):
+        if not command:
+            return
+        if now < self.busy_until:
+            self.swallowed += 1
+            return
+        words = command.split()
+        verb, args = words[0], words[1:]
+        reply = command
+        delay = 0.0
+        if verb in self.STALL_COMMANDS:
+            delay = self.stall
+            self.busy_until = now + delay
+        if verb == "stop":
+            self.scanning = False
+            self.packet.clear()
+        elif verb == "start":
+            self.scanning = True
+            self.scan_start = now
+            self.scans_sent = 0
+            return  # Never echoes
+        elif verb == "info" and args == ["1"]:
+            reply = f"info 1 {self.MODEL}"
+        elif verb == "slist" and len(args) == 2:
+            self.slist[int(args[0])] = int(args[1])
+        elif verb == "srate" and args:
+            self.srate = int(args[0])
+        elif verb == "dec" and args:
+            self.dec = int(args[0])
+        elif verb == "ps" and args:
+            self.ps = int(args[0])
+        self.replies.append((now + delay, (reply + "\r").encode()))
+
+    def output(self, now: float) -> bytes:
+        out = bytearray()
+        while self.replies and self.replies[0][0] <= now:
+            out += self.replies.pop(0)[1]
+        if self.scanning and now >= self.busy_until:
+            due = int((now - self.scan_start) * self.scan_rate) - self.scans_sent
+            if due > 0:
+                self.packet += self._scans(self.scans_sent, due)
+                self.scans_sent += due
+            whole = len(self.packet) - len(self.packet) % self.packet_size
+            out += self.packet[:whole]
+            del self.packet[:whole]
+        return bytes(out)
+
+    def _scans(self, first: int, count: int) -> bytes:
+        """
+        `count` scans from scan number `first`: a slow drift plus noise on each
+        channel in the scan list, so a stripchart of it looks like something.
+        """
+        channels = [self.slist[i] for i in sorted(self.slist)] or [0]
+        t = (first + np.arange(count)) / (BASE_CLOCK_HZ / (self.srate * self.dec))
+        columns = []
+        for word in channels:
+            channel = word & 0xF
+            volts = 1.0 + 0.5 * np.sin(2 * np.pi * t / 30 + channel)
+            volts += self.rng.normal(0, 0.01, count)
+            full_scale = RANGE_VOLT[(word >> 8) & 0xF]
+            columns.append(np.clip(np.round(volts / full_scale * 32768), -32768, 32767))
+        return np.stack(columns, axis=1).astype("<i2").tobytes()
+
+
+class SimulatedSolar360:
+    """The SOLAR-360's LD command set and ASCII and INT32 output, as for SimulatedDI4108."""
+
+    COMMAND_GAP = 0.1  # A partial command is discarded after this much silence
+
+    def __init__(self, speed=1.0, interval_ms=100, streaming=False, seed=None):
+        self.speed = speed
+        self.interval_ms = interval_ms
+        self.streaming = streaming
+        self.binary = False
+        self.rng = random.Random(seed)
+        self.command_buffer = bytearray()
+        self.last_byte = 0.0
+        self.next_frame = 0.0
+        self.replies = bytearray()
+
+    @property
+    def interval(self) -> float:
+        return self.interval_ms / 1000 / self.speed
+
+    def angle(self, now: float) -> float:
+        """A dish slewing slowly back and forth across the sky."""
+        return 40.0 + 30.0 * np.sin(2 * np.pi * now / 600) + self.rng.gauss(0, 0.002)
+
+    def receive(self, data: bytes, now: float):
+        if now - self.last_byte > self.COMMAND_GAP:
+            self.command_buffer.clear()
+        self.last_byte = now
+        self.command_buffer += data
+        while len(self.command_buffer) >= 7:
+            command = bytes(self.command_buffer[:7]).decode(errors="replace")
+            del self.command_buffer[:7]
+            self._command(command, now)
+
+    def _command(self, command: str, now: float):
+        if command == "gettemp":
+            self.replies += struct.pack(">h", 2810) if self.binary else b"+28.1\r"
+        elif command == "get-360":
+            self.replies += self._frame(now)
+        elif command in ("setoasc", "setoint"):
+            self.binary = command == "setoint"
+            self.replies += b"OK"
+        elif command == "setcasc":
+            self.replies += b"OK"
+            self.streaming = True
+            self.next_frame = now
+        elif command.startswith("str") and command[3:].isdigit():
+            self.interval_ms = max(50, int(command[3:]))
+            self.replies += b"OK"
+
+    def _frame(self, now: float) -> bytes:
+        if self.binary:
+            return struct.pack(">i", round(self.angle(now) * 1000))
+        return b"%+08.3f\r" % self.angle(now)
+
+    def output(self, now: float) -> bytes:
+        out = self.replies
+        self.replies = bytearray()
+        if self.streaming:
+            while self.next_frame <= now:
+                out += self._frame(self.next_frame)
+                self.next_frame += self.interval
+                if now - self.next_frame > 1.0:  # Starved; do not catch up forever
+                    self.next_frame = now
+        return bytes(out)
+
+
+class PtyDevice:
+    """Serves one simulated device on the master side of a new pty."""
+
+    def __init__(self, device, faults: Faults | None = None, link: str | None = None):
+        self.device = device
+        self.faults = faults or Faults()
+        self.master, self.slave = os.openpty()
+        # Raw, so nothing in the line discipline echoes commands back or turns
+        # the \r that ends every frame into \n. The slave end stays open here
+        # too: with no slave open, reading the master fails with EIO, and
+        # clients open and close the port freely.
+        tty.setraw(self.slave, termios.TCSANOW)
+        os.set_blocking(self.master, False)
+        self.path = os.ttyname(self.slave)
+        self.link = link
+        if link:
+            if os.path.islink(link):
+                os.unlink(link)
+            os.symlink(self.path, link)
+        self.outgoing = bytearray()
+        self.sent = 0
+        self.overflowed = 0
+
+    def close(self):
+        if self.link and os.path.islink(self.link):
+            os.unlink(self.link)
+        os.close(self.master)
+        os.close(self.slave)
+
+    def receive(self, now: float):
+        try:
+            data = os.read(self.master, 4096)
+        except (BlockingIOError, OSError):
+            return
+        self.device.receive(data, now)
+
+    def send(self, now: float):
+        self.outgoing += self.device.output(now)
+        if len(self.outgoing) > OUTPUT_LIMIT:
+            excess = len(self.outgoing) - OUTPUT_LIMIT
+            del self.outgoing[:excess]
+            self.overflowed += excess
+        if not self.outgoing or self.faults.holding(now):
+            return
+        data = self.faults.apply(bytes(self.outgoing))
+        self.outgoing.clear()
+        try:
+            written = os.write(self.master, data)
+        except BlockingIOError:
+            written = 0
+        self.sent += written
+        self.outgoing[:0] = data[written:]  # The reader is behind; try again later
+
+
+def serve(endpoints, interval=0.001, stop=None):
+    """
+    Pump every endpoint until interrupted, or until the `stop` event is set:
+    hand each device what was written to it, and send what it has due.
+    """
+    masters = {endpoint.master: endpoint for endpoint in endpoints}
+    while stop is None or not stop.is_set():
+        readable, _, _ = select.select(list(masters), [], [], interval)
+        now = time.monotonic()
+        for fd in readable:
+            masters[fd].receive(now)
+        for endpoint in endpoints:
+            endpoint.send(now)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--speed", type=float, default=1.0,
+                        help="multiply both devices' data rates, e.g. 10-100 for load tests")
+    parser.add_argument("--stall", type=float, default=1.0,
+                        help="seconds the DI-4108 spends on 'stop' and 'encode' (default 1.0)")
+    parser.add_argument("--dec-interval-ms", type=int, default=100,
+                        help="the SOLAR-360's strXXXX output interval (default 100)")
+    parser.add_argument("--dec-streaming", action="store_true",
+                        help="start the SOLAR-360 already streaming, as if setcasc was sent earlier")
+    parser.add_argument("--drop", type=float, default=0.0, help="per-byte probability of loss")
+    parser.add_argument("--garbage", type=float, default=0.0,
+                        help="per-write probability of splicing in random bytes")
+    parser.add_argument("--burst", type=float, default=0.0,
+                        help="per-write probability of holding output back, then sending it at once")
+    parser.add_argument("--burst-ms", type=float, default=200.0,
+                        help="how long a burst holds output back (default 200)")
+    parser.add_argument("--link-daq", help="also make this path a symlink to the DI-4108's pty")
+    parser.add_argument("--link-dec", help="also make this path a symlink to the SOLAR-360's pty")
+    parser.add_argument("--seed", type=int, help="make the signal and the faults repeatable")
+    args = parser.parse_args(argv)
+
+    def faults(offset):
+        seed = None if args.seed is None else args.seed + offset
+        return Faults(args.drop, args.garbage, args.burst, args.burst_ms / 1000, seed)
+
+    daq = PtyDevice(
+        SimulatedDI4108(args.speed, args.stall, args.seed), faults(1), args.link_daq
+    )
+    dec = PtyDevice(
+        SimulatedSolar360(args.speed, args.dec_interval_ms, args.dec_streaming, args.seed),
+        faults(2),
+        args.link_dec,
+    )
+    print(f"export THREEPIO_DAQ_PORT={args.link_daq or daq.path}")
+    print(f"export THREEPIO_DEC_PORT={args.link_dec or dec.path}")
+    sys.stdout.flush()
+
+    try:
+        serve([daq, dec])
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for name, endpoint in (("DI-4108", daq), ("SOLAR-360", dec)):
+            print(
+                f"{name}: sent {endpoint.sent} bytes, overflowed {endpoint.overflowed}, "
+                f"dropped {endpoint.faults.dropped}, injected {endpoint.faults.injected}, "
+                f"bursts {endpoint.faults.bursts}"
+            )
+            endpoint.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
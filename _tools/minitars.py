@@ -9,6 +9,7 @@ from .myserial import MySerial
 from .declog import get_dec_logger
 import serial.tools.list_ports
 
+import struct
 import time
 import math
 
@@ -17,6 +18,19 @@ log = get_dec_logger()
 DEC_PORT_ENV = "THREEPIO_DEC_PORT"
 NATIVE_DEC_PORT = "/dev/serial0"
 
+# Stream INT32 angles rather than ASCII ones: 4 bytes a reading instead of 9,
+# and no float to parse. With the sensor's fastest interval that is 20 readings
+# a second, twice the 10Hz the ASCII stream ran at. A unit that will not switch
+# to binary is still run in ASCII, at the same interval.
+#
+# Opt-in (THREEPIO_DEC_BINARY=1) until 'setoint' has been confirmed on a real
+# unit: it is inferred from 'setoasc' rather than taken from the notes, and on
+# a unit that only does ASCII each launch would write the binary configuration
+# to non-volatile memory and then the ASCII one back again.
+DEC_BINARY_ENV = "THREEPIO_DEC_BINARY"
+PREFER_BINARY = os.environ.get(DEC_BINARY_ENV) == "1"
+STREAM_INTERVAL_MS = 50  # 'str0050', the shortest the sensor accepts
+
 
 def discovery():
     """Get a list of active com ports and scan for declinometer"""
@@ -42,7 +56,15 @@ def discovery():
 
 
 class MiniTars:
-    READ_TIMEOUT = 0.25  # seconds; bounds a single blocking read_until
+    READ_TIMEOUT = 0.25  # seconds; bounds a single blocking read
+    FRAME_LENGTH = 9  # '±xxx.xxx\r'
+    BINARY_FRAME_LENGTH = 4  # Big-endian INT32 of thousandths of a degree
+    MAX_ANGLE = 360_000  # Thousandths of a degree
+    # Thousandths of a degree two consecutive binary readings may differ by.
+    # The dish moves well under a degree a second, so a bigger step between
+    # readings 50ms apart means the frames are being read out of alignment.
+    MAX_STEP = 5_000
+    SYNC_FRAMES = 3  # Plausible binary frames in a row it takes to trust them
 
     def __init__(self, parent, device=None):
         self.parent = parent
@@ -52,8 +74,9 @@ class MiniTars:
             self.testing = False
             # Configure at construction: MySerial swallows SerialException from
             # _reconfigure_port, so assigning baudrate after opening can fail
-            # silently and leave the port at the 9600 default. The timeout keeps
-            # read_until from blocking forever when a line has no "\r".
+            # silently and leave the port at the 9600 default. read_all() only
+            # asks for what is already waiting, but the timeout still bounds the
+            # handshake's reads should the port misbehave.
             self.ser = MySerial(device, baudrate=38400, timeout=self.READ_TIMEOUT)
             log.info(
                 f"MiniTars: opened {device} is_open={self.ser.is_open} "
@@ -70,18 +93,26 @@ class MiniTars:
         # is blocking on a read.
         self.verbose = False
         self.bad_line_count = 0
+        # Bytes read off the port that do not yet make up a whole frame
+        self.pending = bytearray()
+        # Set by handshake() when the sensor streams INT32 angles
+        self.binary = False
+        # The last binary reading accepted, or None while out of sync
+        self.last_raw = None
         self.empty_reads = 0
         self.last_empty_log = 0.0
 
     def handshake(self) -> bool:
         """
-        Confirm the sensor is alive and put it into continuous ASCII output.
+        Confirm the sensor is alive and put it into continuous output, binary
+        if PREFER_BINARY and the unit will do it, ASCII if not.
 
         The SOLAR-360 does not stream by default: it answers commands, and only
-        transmits continuously after 'setcasc'. Both that and the ASCII/integer
-        choice ('setoasc') live in the sensor's non-volatile memory, so without
-        this the app silently depends on however the unit was last configured,
-        and a sensor in its shipping state produces no data at all.
+        transmits continuously after 'setcasc'. That, the ASCII/integer choice
+        ('setoasc'/'setoint') and the output interval ('strXXXX') all live in
+        the sensor's non-volatile memory, so without this the app silently
+        depends on however the unit was last configured, and a sensor in its
+        shipping state produces no data at all.
 
         Commands are lower case, exactly 7 bytes, and must be written in one go
         (the sensor discards a command with >100ms between characters).
@@ -89,65 +120,103 @@ class MiniTars:
         if self.testing:
             return True
 
-        # A unit already in continuous ASCII mode needs nothing done to it, and
+        # A unit already streaming what is wanted needs nothing done to it, and
         # these settings are stored in non-volatile memory, so check before
         # writing rather than rewriting the sensor's configuration every launch.
-        if self._streaming():
-            log.info("handshake: already streaming ASCII angles")
+        # That includes its output interval, which is left as it was: there is
+        # no command to read it back, and `python -m _tools.dec_probe` reports
+        # the rate a unit actually streams at.
+        wanted = "binary" if PREFER_BINARY else "ascii"
+        current = self._stream_format()
+        if current == wanted:
+            self._use(current)
+            log.info(f"handshake: already streaming {current} angles")
             return True
 
-        if self._command(b"gettemp") is None:
+        if current is None and self._command(b"gettemp") is None:
             msg = "Declinometer is not responding (no reply to gettemp)"
             self.parent.log(msg)
             log.error(f"handshake: {msg}")
             return False
 
-        for command in (b"setoasc", b"setcasc"):
-            reply = self._command(command)
-            # 'OK' is not necessarily at the front: once the sensor is streaming,
-            # angle frames interleave with the reply to a command.
-            if reply is None or b"OK" not in reply:
-                log.warning(f"handshake: no OK for {command.decode()}: {reply!r}")
+        interval = b"str%04d" % STREAM_INTERVAL_MS
+        if PREFER_BINARY:
+            self._configure(b"setoint", interval, b"setcasc")
+            current = self._stream_format()
+            if current == "binary":
+                self._use(current)
+                log.info("handshake: sensor now streaming binary angles")
+                return True
+            log.warning(f"handshake: no binary angles after setoint (saw {current}), using ASCII")
+
+        if current != "ascii":
+            self._configure(b"setoasc", interval, b"setcasc")
+            current = self._stream_format()
 
         # Whether or not the OKs were seen, the real test is angle data arriving.
-        if not self._streaming():
+        if current != "ascii":
             msg = "Declinometer will not stream angle data"
             self.parent.log(msg)
             log.error(f"handshake: {msg}")
             return False
 
+        self._use(current)
         log.info("handshake: sensor now streaming ASCII angles")
         return True
 
-    def _streaming(self, window: float = 4.0) -> bool:
+    def _configure(self, *commands: bytes):
+        for command in commands:
+            reply = self._command(command)
+            # 'OK' is not necessarily at the front: once the sensor is streaming,
+            # angle frames interleave with the reply to a command.
+            if reply is None or b"OK" not in reply:
+                log.warning(f"handshake: no OK for {command.decode()}: {reply!r}")
+
+    def _use(self, output: str):
+        """Read frames as `output` ("binary" or "ascii") from here on."""
+        self.binary = output == "binary"
+        self.pending.clear()
+        self.last_raw = None
+
+    def _stream_format(self, window: float = 4.0) -> str | None:
         """
-        True if a well-formed angle frame arrives within `window` seconds.
+        "binary" or "ascii", whichever the sensor is streaming well-formed
+        frames of within `window` seconds, or None if neither arrives.
 
         The window has to cover the slowest output rate a unit may be set to.
         Sensors configured for continuous output do not all run at the same
         rate: one may emit at 10Hz and another at well under 1Hz, with gaps of
-        seconds between frames. This returns as soon as a frame parses, so a
-        fast unit still completes in milliseconds and only a silent one waits
+        seconds between frames. This returns as soon as the format is clear, so
+        a fast unit still completes in milliseconds and only a silent one waits
         out the full window.
+
+        The two cannot be mistaken for each other: every ASCII byte is
+        printable, so four of them never make an INT32 within MAX_ANGLE, and a
+        binary stream is vanishingly unlikely to hold a 9-byte frame that
+        parses.
         """
         self.ser.reset_input_buffer()
         deadline = time.perf_counter() + window
         buffer = b""
         while time.perf_counter() < deadline:
             buffer += self.ser.read(self.ser.in_waiting or 0)
-            # Any one complete frame proves the sensor is streaming. Waiting for
-            # a second frame to appear before trusting the first is not safe: at
-            # a slow output rate two frames may not arrive inside any reasonable
-            # window, and the check then rejects a perfectly healthy stream.
-            # A read that begins mid-stream still yields a leading fragment, but
-            # _parse rejects that on length, so no extra guard is needed.
+            # Any one complete ASCII frame proves the sensor is streaming.
+            # Waiting for a second frame to appear before trusting the first is
+            # not safe: at a slow output rate two frames may not arrive inside
+            # any reasonable window, and the check then rejects a perfectly
+            # healthy stream. A read that begins mid-stream still yields a
+            # leading fragment, but _parse rejects that on length, so no extra
+            # guard is needed. Binary frames have no such structure to check,
+            # so those take a synchronised run of them.
+            if self._find_sync(buffer) is not None:
+                return "binary"
             if b"\r" in buffer:
                 for chunk in buffer.split(b"\r")[:-1]:
                     if self._parse(chunk + b"\r") is not None:
-                        return True
+                        return "ascii"
             time.sleep(0.02)
-        log.debug(f"_streaming: no valid frame in {window}s, saw {buffer!r}")
-        return False
+        log.debug(f"_stream_format: no valid frame in {window}s, saw {buffer!r}")
+        return None
 
     @staticmethod
     def _parse(line: bytes) -> float | None:
@@ -197,19 +266,10 @@ class MiniTars:
     def stop(self):
         if not self.testing:
             self.ser.reset_input_buffer()
+            self.pending.clear()
+            self.last_raw = None
             self.acquiring = False
 
-    def _read_one(self) -> float | None:
-        """
-        This reads one datapoint from the buffer.
-        """
-        if not self.testing:
-            if self.in_waiting() < 1:
-                return None
-            return self.buffer_read()
-        else:
-            return self.random_data()
-
     def read_latest(self) -> float | None:
         """
         This function reads the last datapoint from the buffer and clears the buffer.
@@ -217,17 +277,135 @@ class MiniTars:
         """
         if self.testing:
             return self.random_data()
-        current = self._read_one()
-        latest = None
-        drained = 0
-        while current is not None:
-            latest = current
-            drained += 1
-            current = self._read_one()
+        values = self.read_all()
+        latest = values[-1] if values else None
         if self.verbose:
-            self._log_read(drained, latest)
+            self._log_read(len(values), latest)
         return latest
 
+    def read_all(self) -> list[float]:
+        """
+        Every angle that has arrived since the last read, oldest first. Takes one
+        read of whatever is waiting and never blocks: a frame that has not
+        finished arriving is kept for the next call.
+        """
+        if self.testing:
+            return []
+        waiting = self.in_waiting()
+        if waiting:
+            self.pending += self.ser.read(waiting)
+        if self.binary:
+            return self._binary_frames()
+        return self._ascii_frames()
+
+    def _ascii_frames(self) -> list[float]:
+        end = self.pending.rfind(b"\r")
+        if end < 0:
+            self._discard_runaway()
+            return []
+        frames = bytes(self.pending[: end + 1]).split(b"\r")[:-1]
+        del self.pending[: end + 1]
+
+        values = []
+        for frame in frames:
+            value = self._parse(frame + b"\r")
+            if value is None:
+                self._discard(frame + b"\r")
+            else:
+                values.append(value)
+        return values
+
+    def _binary_frames(self) -> list[float]:
+        """
+        INT32 frames carry no delimiter, so one dropped or spliced byte shifts
+        every frame after it. Frames are only trusted after SYNC_FRAMES in a row
+        that are plausible angles following on from each other; the first frame
+        that does not follow on loses the lock, and the search starts again one
+        byte later.
+        """
+        values = []
+        while True:
+            if self.last_raw is None:
+                offset = self._find_sync(self.pending)
+                if offset is None:
+                    # Keep what may yet be the start of a synchronised run
+                    excess = len(self.pending) - (self.SYNC_FRAMES * self.BINARY_FRAME_LENGTH - 1)
+                    if excess > 0:
+                        self._discard(bytes(self.pending[:excess]))
+                        del self.pending[:excess]
+                    return values
+                if offset:
+                    self._discard(bytes(self.pending[:offset]))
+                    del self.pending[:offset]
+                self.last_raw = struct.unpack_from(">i", self.pending)[0]
+
+            whole = len(self.pending) - len(self.pending) % self.BINARY_FRAME_LENGTH
+            used = 0
+            for (raw,) in struct.iter_unpack(">i", bytes(self.pending[:whole])):
+                if not self._follows(raw, self.last_raw):
+                    break
+                values.append(raw / 1000)
+                self.last_raw = raw
+                used += self.BINARY_FRAME_LENGTH
+            else:
+                del self.pending[:used]
+                return values
+            del self.pending[:used]
+            self._discard(bytes(self.pending[: self.BINARY_FRAME_LENGTH]))
+            del self.pending[:1]
+            self.last_raw = None
+
+    @classmethod
+    def _follows(cls, raw: int, previous: int) -> bool:
+        return abs(raw) <= cls.MAX_ANGLE and abs(raw - previous) <= cls.MAX_STEP
+
+    @classmethod
+    def _find_sync(cls, data) -> int | None:
+        """
+        The offset of the first SYNC_FRAMES binary frames in `data` that follow
+        on from each other, or None if there is no such run yet.
+
+        An angle never needs more than the low 20 bits, so a frame's top byte
+        is always 0x00 or 0xFF. Read one byte late, then, every frame ends in
+        the next one's top byte, and a small angle still decodes to a
+        plausible one: -0.500° comes out as -127.745°. A run whose frames all
+        end in 0x00 or 0xFF is taken to be such a misreading (as is a line of
+        zeros) rather than trusted. A real sensor's readings jitter in the
+        last digit, so this only holds off a lock until they do.
+        """
+        run = cls.SYNC_FRAMES * cls.BINARY_FRAME_LENGTH
+        for offset in range(len(data) - run + 1):
+            frames = struct.unpack_from(">%di" % cls.SYNC_FRAMES, data, offset)
+            previous = frames[:1] + frames[:-1]
+            if all(raw & 0xFF in (0x00, 0xFF) for raw in frames):
+                continue
+            if all(cls._follows(raw, before) for raw, before in zip(frames, previous)):
+                return offset
+        return None
+
+    def _discard_runaway(self):
+        """
+        Throw away bytes that can no longer end a frame. A whole frame is 9
+        bytes, so more than 8 without a "\r" is garbage (e.g. a baudrate
+        mismatch), and keeping it would grow the buffer without bound. A frame
+        may still be starting in the last 8 bytes, so everything from the last
+        sign among them stays.
+        """
+        if len(self.pending) < self.FRAME_LENGTH:
+            return
+        tail = len(self.pending) - (self.FRAME_LENGTH - 1)
+        start = max(self.pending.rfind(b"+", tail), self.pending.rfind(b"-", tail))
+        keep = start if start >= 0 else len(self.pending)
+        self._discard(bytes(self.pending[:keep]))
+        del self.pending[:keep]
+
+    def _discard(self, raw: bytes):
+        self.bad_line_count += 1
+        log.warning(
+            f"read_all: discarded frame #{self.bad_line_count} raw={raw!r} "
+            "(not a whole angle frame)"
+        )
+
     def _log_read(self, drained: int, latest: float | None):
         """
         Rate-limited verbose logging. read_latest can be called hundreds of
@@ -256,41 +434,11 @@ class MiniTars:
             return 0
         return self.ser.in_waiting
 
-    def buffer_read(self) -> float | None:
-        """Read angle from serial buffer"""
-        if self.testing:
-            return None
-        waiting = self.in_waiting()
-        if waiting < 1:
-            if self.verbose:
-                log.debug("buffer_read: no data in queue")
-            return None
-
-        # read_until returns once it sees "\r" or the port timeout expires, so a
-        # line can come back truncated. _parse rejects anything that is not a
-        # whole angle frame rather than trusting float() to catch it.
-        if self.verbose:
-            log.debug(f"buffer_read: in_waiting={waiting}, entering read_until")
-        start = time.perf_counter()
-        line = self.ser.read_until(expected="\r".encode("ascii"))
-        elapsed = time.perf_counter() - start
-        if self.verbose or elapsed > 0.1:
-            log.debug(
-                f"buffer_read: read_until returned in {elapsed * 1000:.1f}ms, "
-                f"raw={line!r}"
-            )
-
-        value = self._parse(line)
-        if value is None:
-            self.bad_line_count += 1
-            log.warning(
-                f"buffer_read: discarded frame #{self.bad_line_count} raw={line!r} "
-                "(not a whole '±xxx.xxx\\r' angle)"
-            )
+    def fileno(self) -> int | None:
+        """The port's file descriptor, to wait on for input; None when simulating."""
+        if self.testing or not hasattr(self.ser, "fileno"):  # No fileno() on Windows
             return None
-        if self.verbose:
-            log.debug(f"buffer_read: value={value}")
-        return value
+        return self.ser.fileno()
 
     # Testing
 
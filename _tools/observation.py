@@ -2,7 +2,7 @@ import time
 from enum import Enum
 from math import floor
 
-from tools import Comm, DataPoint, ObsRecord
+from tools import Comm, DataPoint, DecimatedPoint, MyPrecious, ObsRecord, PROFILE_100HZ
 
 
 class ObsType(Enum):
@@ -44,12 +44,21 @@ class Observation:
     # own rate need more (see Pulsar).
     TIMESTAMP_FORMAT = "%.2f"
 
+    # The timestamp column is the RA, as in the data files; day, the sidereal
+    # day it was taken on, puts the rows of a file spanning sidereal midnight
+    # back in order.
+    STATS_HEADER = "timestamp,count,a_mean,a_min,a_max,b_mean,b_min,b_max,day"
+
     # Whether the DAQ's software filter chain should run during this
     # observation, and whether every sample the DAQ produces is recorded
     # (rather than one per communicate() call).
     FILTERED = True
     RECORDS_EVERY_SAMPLE = False
 
+    # How fast the DAQ scans while this observation is loaded. Everything but
+    # Pulsar records a few points a second, which 100 Hz covers many times over.
+    PROFILE = PROFILE_100HZ
+
     def __init__(self):
         self.name = "Untitled"
         self.composite = False
@@ -92,6 +101,12 @@ class Observation:
         self.file_a = None
         self.file_b = None
         self.file_comp = None
+        # Per-point statistics for the decimated points written to the files
+        # above: one CSV row per point, matched to them by timestamp. Opened
+        # by the first such point, so an observation that never decimates
+        # (Pulsar) leaves no header-only file behind
+        self.file_stats = None
+        self.stats_filename = None
 
         # Record keeping for later display/testing
         self.input_record: ObsRecord | None = None
@@ -125,6 +140,7 @@ class Observation:
     def set_name(self, name: str):
         self.name = name
         self.set_files()
+        self.set_stats_file()
 
     def set_data_freq(self, data_freq):
         self.data_freq = data_freq
@@ -272,6 +288,16 @@ class Observation:
         observation type."""
         pass
 
+    def set_stats_file(self):
+        self.file_stats = None
+        self.stats_filename = self.name + "_stats.csv"
+
+    def open_stats_file(self) -> MyPrecious | None:
+        if self.file_stats is None and self.stats_filename is not None:
+            self.file_stats = MyPrecious(self.stats_filename)
+            self.file_stats.write(self.STATS_HEADER)
+        return self.file_stats
+
     def data_logic(self, data_point) -> Comm:
         """
         This function defines the behavior of observation during the main data
@@ -304,7 +330,7 @@ class Observation:
 
     def write_data(self, point: DataPoint):
         # print(f"{point.timestamp}, dec: {point.dec}")
-        self.write(self.TIMESTAMP_FORMAT % point.timestamp)
+        self.write(self.TIMESTAMP_FORMAT % point.ra)
         self.write("%.4f" % point.dec)
         assert self.file_comp
         assert self.file_a
@@ -315,6 +341,16 @@ class Observation:
         else:
             self.file_a.write("%.4f" % point.a)
             self.file_b.write("%.4f" % point.b)
+        stats = self.open_stats_file() if isinstance(point, DecimatedPoint) else None
+        if stats is not None:
+            stats.write(
+                ",".join(
+                    [self.TIMESTAMP_FORMAT % point.ra, str(point.count)]
+                    + ["%.4f" % v for v in (point.a, point.a_min, point.a_max)]
+                    + ["%.4f" % v for v in (point.b, point.b_min, point.b_max)]
+                    + [str(point.day)]
+                )
+            )
 
     def write_meta(self):
         # The footer is factual: data_start is when the DATA phase actually
@@ -335,6 +371,8 @@ class Observation:
         else:
             self.file_a.close()
             self.file_b.close()
+        if self.file_stats is not None:
+            self.file_stats.close()
 
 
 def get_date(epoch_time) -> str:
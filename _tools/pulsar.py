@@ -1,4 +1,4 @@
-from tools import Comm, MyPrecious, ObsType, Scan
+from tools import Comm, MyPrecious, ObsType, Scan, PROFILE_1KHZ
 from _tools.observation import State
 
 
@@ -13,20 +13,26 @@ class Pulsar(Scan):
       * the software filter chain is bypassed for the whole observation, so the
         recorded samples are exactly what the ADC produced, and
       * the data phase records every sample Tars pulls off the serial buffer
-        instead of one per communicate() call, so the data rate is the DAQ's
-        (~100 Hz per channel) rather than the few-Hz rate a scan uses.
+        instead of one per communicate() call, and the DAQ scans at PROFILE's
+        rate rather than the ~100 Hz a scan needs, so the data rate is ~1 kHz
+        per channel rather than the few-Hz rate a scan uses.
 
     Calibration and background still go through communicate() at cal_freq,
     exactly as in a scan: those phases measure a level, not a waveform.
     """
 
-    # ~100 Hz samples are 10 ms apart, which two decimals of a second cannot
+    # ~1 kHz samples are 1 ms apart, which two decimals of a second cannot
     # resolve -- consecutive samples would be written with the same timestamp.
     TIMESTAMP_FORMAT = "%.4f"
 
     FILTERED = False
     RECORDS_EVERY_SAMPLE = True
 
+    # 1 ms between samples resolves a millisecond pulsar's profile where 10 ms
+    # cannot. PROFILE_5KHZ goes further, at five times the file size and five
+    # times the per-sample work on the GUI thread.
+    PROFILE = PROFILE_1KHZ
+
     # Writing at the acquisition rate means ~8 file appends per sample per
     # channel at the default (unbuffered) setting. Batch them instead; the
     # buffer is flushed on close() and on every state transition's write("*").
@@ -0,0 +1,66 @@
+"""
+When the GUI thread draws. Drawing shares that thread with handling the
+samples the acquisition thread reads, and the samples come first.
+"""
+
+import time
+
+
+class RenderScheduler:
+    """
+    Paces redraws to a frame rate and remembers which views need one.
+
+    A view is marked dirty when what it shows has changed, and a frame redraws
+    only the views marked since the last one; with none marked, there is no
+    frame at all. Two things hold frames back so that a busy GUI thread goes
+    on handling samples rather than drawing them:
+
+      * a frame due while samples are still waiting to be handled is skipped,
+        up to MAX_SKIPPED in a row, after which one is drawn regardless so the
+        display never freezes, and
+      * a frame that took longer than its share of the thread (BUDGET of the
+        frame period) stretches the wait before the next one to match.
+    """
+
+    FRAME_RATE = 60.0  # Frames a second, when the screen doesn't say
+    MAX_SKIPPED = 4
+    BUDGET = 0.5  # Of each frame period, at most, spent drawing
+
+    def __init__(self, frame_rate: float = FRAME_RATE):
+        self.frame_period = 1 / frame_rate
+        self.dirty: set[str] = set()
+        self.last_frame_seconds = 0.0
+        self.skipped_in_a_row = 0
+        self.frames = 0
+        self.skipped = 0
+
+    def set_frame_rate(self, frame_rate: float):
+        if frame_rate > 0:
+            self.frame_period = 1 / frame_rate
+
+    def mark(self, *views: str):
+        """Note that `views` need redrawing at the next frame."""
+        self.dirty.update(views)
+
+    def next_delay(self) -> float:
+        """Seconds to wait before drawing the next frame."""
+        return max(self.frame_period, self.last_frame_seconds / self.BUDGET)
+
+    def should_skip(self, backlog: int) -> bool:
+        """Whether to put off the frame that is due, with `backlog` blocks of samples waiting."""
+        if backlog and self.skipped_in_a_row < self.MAX_SKIPPED:
+            self.skipped_in_a_row += 1
+            self.skipped += 1
+            return True
+        self.skipped_in_a_row = 0
+        return False
+
+    def begin_frame(self) -> set[str]:
+        """The views to redraw in the frame starting now, which are then clean."""
+        views, self.dirty = self.dirty, set()
+        self.frame_start = time.perf_counter()
+        return views
+
+    def end_frame(self):
+        self.last_frame_seconds = time.perf_counter() - self.frame_start
+        self.frames += 1
@@ -0,0 +1,77 @@
+"""
+Bounded queues for handing data between threads without locking.
+"""
+
+
+class RingBuffer:
+    """
+    A bounded single-producer/single-consumer queue.
+
+    Exactly one thread may push and exactly one other thread may pop or drain.
+    Under that rule no lock is needed: the producer is the only writer of
+    `_head` and the consumer the only writer of `_tail`, each side publishes its
+    progress with a single attribute store (atomic in CPython), and a slot is
+    always filled before `_head` moves past it, so the consumer can never see
+    a slot the producer has not finished writing.
+
+    One slot is kept empty so that a full ring can be told apart from an empty
+    one without a shared counter. When the ring is full, push() drops the new
+    item and counts it in `dropped` rather than blocking the producer: the
+    producer is the acquisition thread, and stalling it is exactly what lets
+    the serial buffers overflow.
+    """
+
+    def __init__(self, capacity: int):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self._slots: list = [None] * (capacity + 1)
+        self._head = 0  # Next slot to write; written by the producer only
+        self._tail = 0  # Next slot to read; written by the consumer only
+        self.dropped = 0  # Written by the producer only
+
+    @property
+    def capacity(self) -> int:
+        return len(self._slots) - 1
+
+    def __len__(self) -> int:
+        return (self._head - self._tail) % len(self._slots)
+
+    # Producer side
+
+    def push(self, item) -> bool:
+        """Queue an item, or drop it and return False if the ring is full."""
+        head = self._head
+        following = (head + 1) % len(self._slots)
+        if following == self._tail:
+            self.dropped += 1
+            return False
+        self._slots[head] = item
+        self._head = following  # Publish only once the slot holds the item
+        return True
+
+    # Consumer side
+
+    def pop(self):
+        """Remove and return the oldest item, or None if the ring is empty."""
+        tail = self._tail
+        if tail == self._head:
+            return None
+        item = self._slots[tail]
+        self._slots[tail] = None  # Do not keep a drained item alive
+        self._tail = (tail + 1) % len(self._slots)
+        return item
+
+    def drain(self) -> list:
+        """
+        Remove and return everything queued, oldest first. Items pushed while
+        this runs are left for the next call rather than chased.
+        """
+        head = self._head
+        tail = self._tail
+        items = []
+        while tail != head:
+            items.append(self._slots[tail])
+            self._slots[tail] = None
+            tail = (tail + 1) % len(self._slots)
+        self._tail = tail
+        return items
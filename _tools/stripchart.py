@@ -0,0 +1,378 @@
+"""
+The samples behind the stripchart, kept so that each frame can be drawn from
+a slice of arrays rather than by growing and trimming the chart's series a
+point at a time.
+"""
+
+from collections import deque
+
+import numpy as np
+
+
+class SlidingRange:
+    """
+    The lowest and highest value added since a time that only moves forward,
+    kept in a pair of monotonic deques. Each entry is a (time, value) that
+    nothing newer has beaten: a new low drops every older entry at or above
+    it from the lows, since none of them can be the lowest again before it
+    expires, and likewise for the highs. The oldest entry of each is then the
+    extreme. Every entry is added and removed once, so keeping it up costs
+    O(1) amortized per add() and reading it O(1), however long the window.
+    """
+
+    def __init__(self):
+        self.lows: deque[tuple[float, float]] = deque()
+        self.highs: deque[tuple[float, float]] = deque()
+
+    def clear(self):
+        self.lows.clear()
+        self.highs.clear()
+
+    def add(self, time: float, low: float, high: float):
+        """Add values from `low` to `high`, the newest of them taken at `time`."""
+        while self.lows and self.lows[-1][1] >= low:
+            self.lows.pop()
+        self.lows.append((time, low))
+        while self.highs and self.highs[-1][1] <= high:
+            self.highs.pop()
+        self.highs.append((time, high))
+
+    def expire(self, since: float):
+        """Forget values added with a time before `since`."""
+        for entries in (self.lows, self.highs):
+            while entries and entries[0][0] < since:
+                entries.popleft()
+
+    def shift(self, seconds: float):
+        """Move the time of every value by `seconds`."""
+        for entries in (self.lows, self.highs):
+            for _ in range(len(entries)):
+                time, value = entries.popleft()
+                entries.append((time + seconds, value))
+
+    def range(self) -> tuple[float, float] | None:
+        """The lowest and highest value left, or None if there are none."""
+        if not self.lows:
+            return None
+        return self.lows[0][1], self.highs[0][1]
+
+
+class StripchartBuffer:
+    """
+    A fixed-size ring of the most recent samples: each one's time on the
+    sidereal timeline and its channel A and B volts. Times only ever increase
+    (the timeline doesn't wrap), so the samples since any time can be found by
+    binary search.
+
+    window() hands back about two points per pixel row of the chart however
+    many samples the window holds: the lowest and the highest of each bin of
+    samples, in the order they were taken. A line series costs the chart time
+    in proportion to its points, so this keeps a frame's cost set by the
+    chart's height rather than by the sample rate or the time on screen, and
+    where keeping every nth sample would skip over a one-sample spike, a bin's
+    extremes keep it.
+
+    Bins are a power of two samples long and aligned to the count of samples
+    ever added, so the samples a bin holds don't change as the window scrolls
+    on: otherwise a noisy trace would shimmer from one frame to the next. With
+    the capacity a power of two too, they are also aligned to the array, so
+    whole bins can be reduced as a reshaped view without copying the window.
+
+    `extremes` keeps the range of both channels over the window, a block at a
+    time, for the dynamic scale; expire it as the window moves on.
+    """
+
+    CAPACITY = 1 << 18  # Samples; 120 s, the slowest speed, at just over 2 kHz
+    ROWS = 1024  # Pixel rows to decimate to when the chart can't say
+
+    def __init__(self, capacity: int = CAPACITY):
+        if capacity < 1 or capacity & (capacity - 1):
+            raise ValueError("capacity must be a power of two")  # For the bins
+        self.data = np.zeros((3, capacity))  # Rows: time, A, B
+        self.head = 0  # Next column to write
+        self.count = 0
+        self.added = 0  # Samples ever added, which bins are aligned to
+        self.extremes = SlidingRange()
+
+    @property
+    def capacity(self) -> int:
+        return self.data.shape[1]
+
+    def __len__(self) -> int:
+        return self.count
+
+    def clear(self):
+        self.head = 0
+        self.count = 0
+        self.added = 0
+        self.extremes.clear()
+
+    def shift(self, seconds: float):
+        """
+        Move every sample by `seconds`, onto a timeline the clock has been
+        stepped along: the samples after the step mustn't land before (or on
+        top of) the ones before it, which would break the binary search.
+        """
+        self.data[0] += seconds
+        self.extremes.shift(seconds)
+
+    def add(self, timestamps: np.ndarray, scans: np.ndarray):
+        """Add (N, 2) `scans` of A and B volts taken at the N `timestamps`."""
+        if len(timestamps) > self.capacity:  # Only the newest can be kept
+            timestamps, scans = timestamps[-self.capacity:], scans[-self.capacity:]
+        count = len(timestamps)
+        if count:
+            self.extremes.add(float(timestamps[-1]), float(scans.min()), float(scans.max()))
+        # At most two slices: up to the end of the array, then from the start
+        first = min(count, self.capacity - self.head)
+        for start, stop, rows in ((self.head, self.head + first, slice(0, first)),
+                                  (0, count - first, slice(first, count))):
+            self.data[0, start:stop] = timestamps[rows]
+            self.data[1:, start:stop] = scans[rows].T
+        self.head = (self.head + count) % self.capacity
+        self.count = min(self.count + count, self.capacity)
+        self.added += count
+
+    def oldest(self) -> float | None:
+        """When the oldest sample kept was taken, or None if there are none."""
+        if not self.count:
+            return None
+        return float(self.data[0, (self.head - self.count) % self.capacity])
+
+    def rebuild_extremes(self, since: float, chunk: int = 1024):
+        """
+        Refill `extremes` from the samples kept since `since`, a `chunk` of
+        samples to an entry: once expired, samples are gone from it, so this
+        is for a window that has grown back over them.
+        """
+        self.extremes.clear()
+        oldest = (self.head - self.count) % self.capacity
+        skip = self._count_before(since, oldest)
+        for start, stop in self._runs((oldest + skip) % self.capacity, self.count - skip):
+            for first in range(start, stop, chunk):
+                last = min(first + chunk, stop)
+                values = self.data[1:, first:last]
+                self.extremes.add(float(self.data[0, last - 1]), float(values.min()), float(values.max()))
+
+    def window(self, since: float, rows: int = ROWS, until: float = np.inf):
+        """
+        The samples taken at or after `since` and before `until`, decimated
+        for a chart `rows` pixels tall, as ((times, A), (times, B)) oldest
+        first. Each channel has its own times, since its extremes fall at
+        different samples.
+        """
+        oldest = (self.head - self.count) % self.capacity
+        skip = self._count_before(since, oldest)
+        count = self._count_before(until, oldest) - skip
+        runs = self._runs((oldest + skip) % self.capacity, count)
+        if count <= 2 * rows:
+            # Copied out of the ring, which also makes them contiguous:
+            # replaceNp() silently ignores arrays that aren't
+            times, a, b = (np.concatenate([self.data[row, start:stop] for start, stop in runs]) for row in range(3))
+            return (times, a), (times, b)
+
+        size = 1 << int(np.ceil(np.log2(count / rows)))  # Samples per bin
+        return self._extremes(1, runs, size), self._extremes(2, runs, size)
+
+    def _extremes(self, row: int, runs: list[tuple[int, int]], size: int):
+        """Each bin's lowest and highest value in `row` with their times, in time order."""
+        columns = []
+        for start, stop in runs:
+            # The whole bins in the run as one (bins, size) view, and the
+            # pieces of bins at either end of it one at a time. The capacity
+            # is a multiple of the size, so no bin straddles the end of the
+            # array.
+            first = min(-(-start // size) * size, stop)
+            last = max(stop // size * size, first)
+            if start < first:
+                columns.append(self._bin_extremes(row, start, first))
+            if first < last:
+                values = self.data[row, first:last].reshape(-1, size)
+                lowest, highest = values.argmin(axis=1), values.argmax(axis=1)
+                offsets = np.stack([np.minimum(lowest, highest), np.maximum(lowest, highest)], axis=1)
+                columns.append((np.arange(first, last, size)[:, None] + offsets).ravel())
+            if last < stop:
+                columns.append(self._bin_extremes(row, last, stop))
+        columns = np.concatenate(columns)
+        return self.data[0, columns], self.data[row, columns]
+
+    def _bin_extremes(self, row: int, start: int, stop: int) -> np.ndarray:
+        values = self.data[row, start:stop]
+        return start + np.sort([values.argmin(), values.argmax()])
+
+    def _runs(self, start: int, count: int) -> list[tuple[int, int]]:
+        """The `count` columns from `start` on, in order: at most two slices."""
+        end = start + count
+        if end <= self.capacity:
+            return [(start, end)]
+        return [(start, self.capacity), (0, end - self.capacity)]
+
+    def _count_before(self, since: float, oldest: int) -> int:
+        """How many samples were taken before `since`."""
+        before = 0
+        for start, stop in self._runs(oldest, self.count):
+            found = int(np.searchsorted(self.data[0, start:stop], since))
+            before += found
+            if found < stop - start:
+                break
+        return before
+
+
+class StripchartHistory:
+    """
+    Everything since the history was cleared, at every zoom: a min/max
+    pyramid, so that the chart can show a whole observation, or any part of
+    it, without keeping every sample.
+
+    Level 0 holds the lowest and highest value of each channel over each BIN
+    samples, and each level above it the same over pairs of bins of the level
+    below, so level n's bins are BIN << n samples long. A level is built as
+    the bins under it fill, and keeps at most LEVEL_CAPACITY bins, dropping
+    the oldest; by the time a level starts dropping bins, the one above it
+    holds all of them at half the resolution. Memory is bounded by the number
+    of levels in use, which grows with the log of the samples added.
+
+    window() picks the finest level that still holds the start of the view
+    and has no more bins in it than the chart has rows, so drawing costs the
+    same however much of the history is on screen. Samples that haven't yet
+    filled a bin are left out until they do.
+    """
+
+    BIN = 64  # Samples in each of level 0's bins
+    LEVELS = 24  # At 2 kHz, the top level's bins are three days long
+    LEVEL_CAPACITY = 1 << 14  # Bins
+
+    def __init__(self, capacity: int = LEVEL_CAPACITY):
+        self.level_capacity = capacity
+        self.levels: list[_HistoryLevel] = []
+        # Samples waiting to fill a bin of level 0, as rows of time, A, B
+        self.partial = np.empty((self.BIN, 3))
+        self.filled = 0
+
+    def clear(self):
+        self.levels.clear()
+        self.filled = 0
+
+    def shift(self, seconds: float):
+        """Move everything by `seconds`, as StripchartBuffer.shift() does."""
+        self.partial[:self.filled, 0] += seconds
+        for level in self.levels:
+            level.data[0] += seconds
+            level.unpaired[0] += seconds
+
+    def oldest(self) -> float | None:
+        """When the oldest sample summarized was taken, or None if there are none."""
+        if not self.levels:
+            return None
+        return self.levels[-1].oldest()
+
+    def add(self, timestamps: np.ndarray, scans: np.ndarray):
+        """Add (N, 2) `scans` of A and B volts taken at the N `timestamps`."""
+        count = len(timestamps)
+        if self.filled + count < self.BIN:  # Most blocks: no bin is filled
+            self.partial[self.filled:self.filled + count, 0] = timestamps
+            self.partial[self.filled:self.filled + count, 1:] = scans
+            self.filled += count
+            return
+        samples = np.concatenate([self.partial[:self.filled], np.column_stack([timestamps, scans])])
+        whole = len(samples) // self.BIN * self.BIN
+        self.filled = len(samples) - whole
+        self.partial[:self.filled] = samples[whole:]
+        samples = samples[:whole].reshape(-1, self.BIN, 3)
+        bins = np.empty((5, len(samples)))
+        bins[0] = samples[:, 0, 0]
+        bins[1:3] = samples[:, :, 1:].min(axis=1).T
+        bins[3:5] = samples[:, :, 1:].max(axis=1).T
+        for number in range(self.LEVELS):
+            if number == len(self.levels):
+                self.levels.append(_HistoryLevel(self.level_capacity))
+            level = self.levels[number]
+            level.push(bins)
+            bins = level.pair(bins)
+            if not bins.shape[1]:
+                break
+
+    def window(self, since: float, until: float, rows: int = StripchartBuffer.ROWS):
+        """
+        The history from `since` to `until` at no more than about two points
+        per row of a chart `rows` pixels tall, as ((times, A), (times, B))
+        oldest first: each bin's lowest value and then its highest, both at
+        the time the bin starts.
+        """
+        for number, level in enumerate(self.levels):
+            if number == len(self.levels) - 1 or (level.holds(since) and level.count_between(since, until) <= rows):
+                bins = level.between(since, until)
+                times = np.repeat(bins[0], 2)
+                return (times, bins[1::2].T.ravel()), (times, bins[2::2].T.ravel())
+        empty = np.empty(0)
+        return (empty, empty), (empty, empty)
+
+
+class _HistoryLevel:
+    """One level of a StripchartHistory: a ring of bins, each a column of its
+    start time, the lowest A and B volts and then the highest."""
+
+    def __init__(self, capacity: int):
+        self.data = np.zeros((5, capacity))
+        self.head = 0
+        self.count = 0
+        self.dropped = False  # Whether bins have been pushed out
+        # A bin waiting for the one after it to make a bin of the level above
+        self.unpaired = np.empty((5, 0))
+
+    @property
+    def capacity(self) -> int:
+        return self.data.shape[1]
+
+    def oldest(self) -> float:
+        return float(self.data[0, (self.head - self.count) % self.capacity])
+
+    def holds(self, since: float) -> bool:
+        """Whether this level still holds the bins from `since` on."""
+        return self.count > 0 and (not self.dropped or self.oldest() <= since)
+
+    def push(self, bins: np.ndarray):
+        if bins.shape[1] > self.capacity:
+            bins = bins[:, -self.capacity:]
+        count = bins.shape[1]
+        first = min(count, self.capacity - self.head)
+        self.data[:, self.head:self.head + first] = bins[:, :first]
+        self.data[:, :count - first] = bins[:, first:]
+        self.head = (self.head + count) % self.capacity
+        self.dropped = self.dropped or self.count + count > self.capacity
+        self.count = min(self.count + count, self.capacity)
+
+    def pair(self, bins: np.ndarray) -> np.ndarray:
+        """The bins of the level above that `bins` complete."""
+        if self.unpaired.shape[1]:
+            bins = np.concatenate([self.unpaired, bins], axis=1)
+        whole = bins.shape[1] // 2 * 2
+        self.unpaired = bins[:, whole:]
+        pairs = bins[:, :whole].reshape(5, -1, 2)
+        above = np.empty((5, whole // 2))
+        above[0] = pairs[0, :, 0]
+        pairs[1:3].min(axis=2, out=above[1:3])
+        pairs[3:5].max(axis=2, out=above[3:5])
+        return above
+
+    def ordered(self, rows=slice(None)) -> np.ndarray:
+        """`rows` of the bins, oldest first; a view unless the ring has wrapped."""
+        oldest = (self.head - self.count) % self.capacity
+        if oldest + self.count <= self.capacity:
+            return self.data[rows, oldest:oldest + self.count]
+        return np.concatenate([self.data[rows, oldest:], self.data[rows, :self.head]], axis=-1)
+
+    def _span(self, since: float, until: float) -> tuple[int, int]:
+        # Indices into ordered(): from the bin under `since`, so that the
+        # trace reaches the edge of the view, up to `until`
+        times = self.ordered(0)
+        start = max(int(np.searchsorted(times, since, side="right")) - 1, 0)
+        return start, int(np.searchsorted(times, until))
+
+    def count_between(self, since: float, until: float) -> int:
+        start, stop = self._span(since, until)
+        return stop - start
+
+    def between(self, since: float, until: float) -> np.ndarray:
+        start, stop = self._span(since, until)
+        return np.ascontiguousarray(self.ordered()[:, start:stop])
@@ -2,35 +2,160 @@
 
 from __future__ import annotations
 import datetime
+import functools
+import math
+import threading
 import time
-from astropy.time import Time
-from astropy.coordinates import EarthLocation
-from astropy.utils import iers
 
-# Offline operation: never fetch IERS Earth-rotation tables from the internet.
-# Use the tables bundled with astropy-iers-data and extrapolate (with a warning)
-# if the system date runs past them — ms-level UT1 error, negligible for us.
-iers.conf.auto_download = False
-iers.conf.auto_max_age = None
-iers.conf.iers_degraded_accuracy = "warn"
+import numpy as np
 
 SIDEREAL = 1.00273790935  # The number of sidereal seconds per second
 GB_LATITUDE = 38.437235  # North
 GB_LONGITUDE = -79.839835  # West (so negative)
 SIDEREAL_DAY_SECONDS = 86400
 
+UNIX_EPOCH_JD = 2440587.5
+J2000_JD = 2451545.0
+# Terrestrial Time runs this far ahead of UTC: TAI - UTC (37 s since the
+# start of 2017) plus TT - TAI (32.184 s)
+TT_MINUS_UTC = 69.184
+ARCSECONDS_PER_TURN = 1_296_000
+
+
+@functools.cache
+def _astropy():
+    """
+    Import astropy, which takes seconds -- far longer on a Raspberry Pi -- so
+    SuperClock does it off the GUI thread rather than at import.
+    """
+    from astropy.time import Time
+    from astropy.coordinates import EarthLocation
+    from astropy.utils import iers
+
+    # Offline operation: never fetch IERS Earth-rotation tables from the internet.
+    # Use the tables bundled with astropy-iers-data and extrapolate (with a warning)
+    # if the system date runs past them — ms-level UT1 error, negligible for us.
+    iers.conf.auto_download = False
+    iers.conf.auto_max_age = None
+    iers.conf.iers_degraded_accuracy = "warn"
+    return Time, EarthLocation
+
+
+def closed_form_sidereal_days(epoch_time, longitude: float = GB_LONGITUDE):
+    """
+    Local apparent sidereal time at a Unix time (or an array of them), without
+    astropy, as a count of sidereal days: turns of the Earth since about J2000.
+    Unlike seconds of the sidereal day, this never wraps.
+
+    GMST is the IAU 2006 expression: the Earth rotation angle plus the
+    precession polynomial. The equation of the equinoxes, which makes it
+    apparent, takes only the four largest nutation terms, and UTC stands in for
+    UT1, which astropy corrects with the IERS tables; the two never differ by
+    more than 0.9 s. So this agrees with astropy to about a second -- plenty to
+    run on while astropy loads, and it costs microseconds.
+    """
+    du = np.asarray(epoch_time, dtype=float) / 86400 + (UNIX_EPOCH_JD - J2000_JD)
+    t = (du + TT_MINUS_UTC / 86400) / 36525  # Julian centuries of TT since J2000
+
+    era = 0.7790572732640 + du + 0.00273781191135448 * du  # Earth rotation angle, in turns
+    precession = (
+        0.014506
+        + 4612.156534 * t
+        + 1.3915817 * t**2
+        - 0.00000044 * t**3
+        - 0.000029956 * t**4
+        - 0.0000000368 * t**5
+    )
+
+    # Nutation in longitude (arcseconds), and the obliquity it is projected by
+    node = np.radians(125.04452 - 1934.136261 * t)
+    sun = np.radians(280.4665 + 36000.7698 * t)
+    moon = np.radians(218.3165 + 481267.8813 * t)
+    nutation = (
+        -17.20 * np.sin(node)
+        - 1.32 * np.sin(2 * sun)
+        - 0.23 * np.sin(2 * moon)
+        + 0.21 * np.sin(2 * node)
+    )
+    obliquity = np.radians(23.4392911 - 0.0130042 * t)
+
+    turns = era + (precession + nutation * np.cos(obliquity)) / ARCSECONDS_PER_TURN + longitude / 360
+    return _scalar_or_array(turns)
+
+
+def closed_form_sidereal_seconds(epoch_time, longitude: float = GB_LONGITUDE):
+    """closed_form_sidereal_days() as seconds of the sidereal day."""
+    return (closed_form_sidereal_days(epoch_time, longitude) % 1.0) * SIDEREAL_DAY_SECONDS
+
+
+def _scalar_or_array(value):
+    """A float for a 0-d result, so scalars in give plain floats out."""
+    return float(value) if np.ndim(value) == 0 else value
+
 
 class SuperClock:
-    """Sidereal clock model with optional manual calibration offset."""
+    """
+    Sidereal clock model with optional manual calibration offset.
+
+    Sidereal time is propagated from an anchor: a time.monotonic() reading and
+    the sidereal time at that moment. The anchor is set from astropy, which is
+    slow to import and slower still to compute with the first time. Rather than
+    hold the window back for it, the clock starts out anchored to a closed-form
+    sidereal time and loads astropy on a thread of its own. Once that finishes,
+    the clock slews onto astropy's time: it runs slightly fast or slow, at no
+    more than MAX_SLEW_RATE, until the two agree, so the correction never makes
+    a timestamp go backwards.
+
+    The same thread then recomputes astropy's time whenever request_resync()
+    asks it to, and slews onto that too. last_correction and
+    last_compute_seconds say how far off the clock had drifted and how long
+    astropy took to say so. Only a manual calibration steps the clock, and
+    each step is appended to `steps`, so that whatever keeps times from before
+    it can be moved onto the timeline after it.
+    """
+
+    # Sidereal seconds of correction per second of slewing. Below SIDEREAL, so
+    # the clock still moves forward while it is slowed down.
+    MAX_SLEW_RATE = 0.5
 
-    def __init__(self):
+    def __init__(self, load_astropy: bool = True):
         self.manual_sidereal_offset_seconds = 0.0
         self.calibration_epoch_time = 0.0
         self.calibration_sidereal_seconds = 0.0
         self.propagation_anchor_monotonic = 0.0
         self.propagation_anchor_epoch_time = 0.0
         self.propagation_anchor_sidereal_seconds = 0.0
-        self.resync_from_astropy()
+        # The sidereal day the anchor falls in, as closed_form_sidereal_days()
+        # counts them, for times that must not wrap at midnight
+        self.propagation_anchor_day = 0
+        # While slewing, the clock gains slew_rate sidereal seconds per second
+        # for the first slew_duration seconds after the anchor
+        self.slew_rate = 0.0
+        self.slew_duration = 0.0
+        # The anchor is read from the acquisition thread and replaced from the
+        # astropy one, so it is only read or written whole
+        self.lock = threading.Lock()
+        # The sidereal seconds each manual calibration moved the timeline by,
+        # oldest first: negative for one that set the clock back
+        self.steps: list[float] = []
+
+        epoch_time = time.time()
+        self._set_anchor(epoch_time, time.monotonic(), closed_form_sidereal_seconds(epoch_time))
+        self.steps.clear()  # Setting the clock for the first time is no step
+        self.location = None  # astropy's EarthLocation for Green Bank, once loaded
+        self.astropy_error: Exception | None = None
+        self.astropy_loaded = threading.Event()  # Set once the first resync is done
+
+        # The last background resync: the sidereal seconds it slewed out (positive
+        # when the clock was behind) and how long astropy took to compute them
+        self.last_correction = 0.0
+        self.last_compute_seconds = 0.0
+        self.resyncs = 0
+        self.resync_requested = threading.Event()
+        self.resynced = threading.Event()  # Set after each background resync
+        self._worker: threading.Thread | None = None
+        if load_astropy:
+            self._start_worker()
 
     @staticmethod
     def get_time() -> float:
@@ -61,9 +186,50 @@ class SuperClock:
     def hours_to_seconds(hours: float) -> float:
         return hours * 3600
 
+    def request_resync(self):
+        """
+        Have the clock recompute sidereal time with astropy and slew onto it.
+        Returns at once: astropy takes tens of milliseconds even when loaded,
+        which is too long for the GUI thread.
+        """
+        self._start_worker()
+        self.resync_requested.set()
+
+    def _start_worker(self):
+        if self._worker is None:
+            self._worker = threading.Thread(target=self._run, name="threepio-astropy", daemon=True)
+            self._worker.start()
+
+    def _run(self):
+        """Load astropy and resync, then resync again on every request."""
+        while True:
+            try:
+                self._resync_in_background()
+            except Exception as e:  # The clock runs on as it was
+                self.astropy_error = e
+            finally:
+                self.astropy_loaded.set()
+            self.resync_requested.wait()
+            self.resync_requested.clear()
+
+    def _resync_in_background(self):
+        epoch_time = time.time()
+        monotonic_time = time.monotonic()
+        start = time.perf_counter()
+        astronomical_sidereal = self._sidereal_seconds_from_astropy(epoch_time)
+        self.last_compute_seconds = time.perf_counter() - start
+        self.last_correction = self._slew_to(
+            monotonic_time, astronomical_sidereal + self.manual_sidereal_offset_seconds
+        )
+        self.resyncs += 1
+        self.astropy_error = None
+        self.resynced.set()
+
     def _sidereal_seconds_from_astropy(self, epoch_time: float) -> float:
-        loc = EarthLocation(lat=GB_LATITUDE, lon=GB_LONGITUDE)
-        t = Time(epoch_time, format="unix", scale="utc", location=loc)
+        Time, EarthLocation = _astropy()
+        if self.location is None:
+            self.location = EarthLocation(lat=GB_LATITUDE, lon=GB_LONGITUDE)
+        t = Time(epoch_time, format="unix", scale="utc", location=self.location)
         return SuperClock.hours_to_seconds(t.sidereal_time("apparent").value) % SIDEREAL_DAY_SECONDS
 
     def calibrate_sidereal_time(self, sidereal_seconds: float) -> None:
@@ -72,20 +238,170 @@ class SuperClock:
         self.resync_from_astropy()
 
     def resync_from_astropy(self) -> None:
+        """
+        Step straight onto astropy's sidereal time, on the calling thread. For
+        a manual calibration, which should take effect at once; routine
+        resyncs go through request_resync().
+        """
         epoch_time = time.time()
         monotonic_time = time.monotonic()
         astronomical_sidereal = self._sidereal_seconds_from_astropy(epoch_time)
         corrected_sidereal = (astronomical_sidereal + self.manual_sidereal_offset_seconds) % SIDEREAL_DAY_SECONDS
+        self._set_anchor(epoch_time, monotonic_time, corrected_sidereal)
 
-        self.calibration_epoch_time = epoch_time
-        self.calibration_sidereal_seconds = corrected_sidereal
-        self.propagation_anchor_epoch_time = epoch_time
-        self.propagation_anchor_monotonic = monotonic_time
-        self.propagation_anchor_sidereal_seconds = corrected_sidereal
+    def _set_anchor(self, epoch_time: float, monotonic_time: float, sidereal_seconds: float):
+        """Step the clock to read `sidereal_seconds` at `monotonic_time`."""
+        with self.lock:
+            before = self._timeline(monotonic_time)
+            self.calibration_epoch_time = epoch_time
+            self.calibration_sidereal_seconds = sidereal_seconds
+            self.propagation_anchor_epoch_time = epoch_time
+            self.propagation_anchor_monotonic = monotonic_time
+            self.propagation_anchor_sidereal_seconds = sidereal_seconds
+            self.propagation_anchor_day = self._day_for(epoch_time, sidereal_seconds)
+            self.slew_rate = 0.0
+            self.slew_duration = 0.0
+            # Under the lock along with the anchor, so that a time read while
+            # len(steps) stays put is on the timeline after that many steps
+            self.steps.append(float(self._timeline(monotonic_time) - before))
+
+    def _slew_to(self, monotonic_time: float, sidereal_seconds: float) -> float:
+        """
+        Bring the clock round to reading `sidereal_seconds` at `monotonic_time`
+        (and the sidereal rate on from there) gradually: re-anchor at the time
+        it reads now, then gain or lose the difference at MAX_SLEW_RATE.
+        Returns the difference.
+        """
+        with self.lock:
+            now = time.monotonic()
+            current = self._unwrapped(now)
+            target = sidereal_seconds + SIDEREAL * (now - monotonic_time)
+            half_day = SIDEREAL_DAY_SECONDS / 2
+            error = (target - current + half_day) % SIDEREAL_DAY_SECONDS - half_day
+            self.propagation_anchor_epoch_time = time.time()
+            self.propagation_anchor_monotonic = now
+            # Carry the day over rather than work it out again, so the
+            # timeline runs on through the re-anchoring without a seam
+            days, self.propagation_anchor_sidereal_seconds = divmod(current, SIDEREAL_DAY_SECONDS)
+            self.propagation_anchor_day += int(days)
+            self.slew_duration = abs(error) / self.MAX_SLEW_RATE
+            self.slew_rate = math.copysign(self.MAX_SLEW_RATE, error) if error else 0.0
+        return error
 
     def get_sidereal_seconds(self) -> float:
-        elapsed_solar = time.monotonic() - self.propagation_anchor_monotonic
-        return (self.propagation_anchor_sidereal_seconds + SIDEREAL * elapsed_solar) % SIDEREAL_DAY_SECONDS
+        return self.monotonic_to_sidereal(time.monotonic())
+
+    def monotonic_to_sidereal(self, monotonic_time):
+        """The sidereal time at a time.monotonic() reading, or an array of them."""
+        with self.lock:
+            return self._unwrapped(monotonic_time) % SIDEREAL_DAY_SECONDS
+
+    def get_sidereal_timeline(self) -> float:
+        return self.monotonic_to_timeline(time.monotonic())
+
+    def monotonic_to_timeline(self, monotonic_time):
+        """
+        Where a time.monotonic() reading, or an array of them, falls on the
+        sidereal timeline: sidereal seconds counted from the start of sidereal
+        day 0, which never wrap. Sidereal seconds of the day wrap from 86399 to
+        0 in the middle of an observation; the timeline goes on to 86400, so
+        anything stamped with it stays in order and can be searched by time.
+        split_timeline() recovers the day and the time of day for display.
+        """
+        with self.lock:
+            return self._timeline(monotonic_time)
+
+    @staticmethod
+    def split_timeline(timeline):
+        """The sidereal day count and seconds into that day at `timeline`."""
+        days, seconds = np.divmod(timeline, SIDEREAL_DAY_SECONDS)
+        days = int(days) if np.ndim(days) == 0 else days.astype(np.int64)
+        return days, _scalar_or_array(seconds)
+
+    def _timeline(self, monotonic_time):
+        return self.propagation_anchor_day * SIDEREAL_DAY_SECONDS + self._unwrapped(monotonic_time)
+
+    def _unwrapped(self, monotonic_time):
+        elapsed_solar = monotonic_time - self.propagation_anchor_monotonic
+        sidereal = self.propagation_anchor_sidereal_seconds + SIDEREAL * elapsed_solar
+        if self.slew_duration:
+            sidereal = sidereal + self.slew_rate * np.clip(elapsed_solar, 0.0, self.slew_duration)
+        return sidereal
+
+    @staticmethod
+    def _day_for(epoch_time, sidereal_seconds):
+        """
+        The sidereal day in which the clock reads `sidereal_seconds` at
+        `epoch_time`: the day the closed form puts it in, give or take the
+        fraction of a day a manual offset can move it by.
+        """
+        days = np.round(closed_form_sidereal_days(epoch_time) - sidereal_seconds / SIDEREAL_DAY_SECONDS)
+        return int(days) if np.ndim(days) == 0 else days.astype(np.int64)
+
+    def epoch_to_sidereal(self, epoch_times, offline: bool = False):
+        """The sidereal time at each of `epoch_times` (Unix times)."""
+        return self.epoch_to_sidereal_days(epoch_times, offline)[1]
+
+    def epoch_to_sidereal_days(self, epoch_times, offline: bool = False):
+        """
+        The sidereal day count and the seconds into that day at each of
+        `epoch_times`, as a pair of arrays (or of numbers, given one time).
+
+        Live data is propagated from the clock's anchor, exactly as
+        monotonic_to_sidereal() does. For times long past -- converting a
+        recorded file, say -- pass offline=True for astropy's value instead,
+        computed in one call for all of them, which costs far less per time
+        than calling it once each. Either way the manual calibration applies.
+        """
+        epoch_times = np.asarray(epoch_times, dtype=float)
+        if offline:
+            seconds = (
+                self._sidereal_seconds_from_astropy(epoch_times) + self.manual_sidereal_offset_seconds
+            ) % SIDEREAL_DAY_SECONDS
+            return self._day_for(epoch_times, seconds), _scalar_or_array(seconds)
+        with self.lock:
+            monotonic_times = epoch_times - self.propagation_anchor_epoch_time + self.propagation_anchor_monotonic
+            return self.split_timeline(self._timeline(monotonic_times))
+
+    def sidereal_to_epoch(self, days, seconds, offline: bool = False):
+        """
+        The Unix time at which the clock read `seconds` into sidereal day
+        `days`, the inverse of epoch_to_sidereal_days(); arrays of both work.
+        """
+        unwrapped = np.asarray(days, dtype=float) * SIDEREAL_DAY_SECONDS + np.asarray(seconds, dtype=float)
+        if offline:
+            return _scalar_or_array(self._astropy_inverse(unwrapped - self.manual_sidereal_offset_seconds))
+        with self.lock:
+            anchor = self.propagation_anchor_day * SIDEREAL_DAY_SECONDS + self.propagation_anchor_sidereal_seconds
+            ahead = unwrapped - anchor
+            # Invert _unwrapped(): SIDEREAL + slew_rate per second while
+            # slewing, SIDEREAL either side of it
+            fast = SIDEREAL + self.slew_rate
+            slewed = fast * self.slew_duration
+            elapsed = np.where(
+                ahead < 0,
+                ahead / SIDEREAL,
+                np.where(ahead <= slewed, ahead / fast, self.slew_duration + (ahead - slewed) / SIDEREAL),
+            )
+            return _scalar_or_array(self.propagation_anchor_epoch_time + elapsed)
+
+    def _astropy_inverse(self, unwrapped):
+        """
+        The Unix times at which astropy's sidereal time reaches `unwrapped`
+        (sidereal seconds, day count included). The closed form is inverted
+        first, which lands within a second of the answer; sidereal time is so
+        nearly linear that one batched astropy call then closes the gap.
+        """
+        target_days = unwrapped / SIDEREAL_DAY_SECONDS
+        epoch_times = np.zeros_like(unwrapped)
+        for _ in range(3):  # Converges to well under a microsecond
+            error_days = closed_form_sidereal_days(epoch_times) - target_days
+            epoch_times = epoch_times - error_days * 86400 / SIDEREAL
+        half_day = SIDEREAL_DAY_SECONDS / 2
+        error = (
+            self._sidereal_seconds_from_astropy(epoch_times) - unwrapped + half_day
+        ) % SIDEREAL_DAY_SECONDS - half_day
+        return epoch_times - error / SIDEREAL
 
     def ra_to_epoch_time(self, ra_seconds: float) -> float:
         current_sidereal = self.get_sidereal_seconds()
@@ -9,12 +9,15 @@ import os
 
 import serial
 from .myserial import MySerial
+from .timebase import Timebase
 import serial.tools.list_ports
 import time
 
 import random as r  # For testing
 import math
-import statistics
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from bisect import bisect_left, insort
 from collections import deque
 from contextlib import contextmanager
 from dataclasses import dataclass
@@ -38,16 +41,48 @@ NATIVE_DEC_PORT = "/dev/serial0"
 DAQ_MODEL = "4108"
 DEFAULT_RANGE_VOLT = 10  # Accommodates the receiver's signal above 5 V
 
-# srate/dec set how often the DI-4108 walks the whole scan list, not how much
-# data it produces per second: every channel in the list is sampled once per
-# pass, so SCAN_RATE is the per-channel rate and throughput is SCAN_RATE * N.
-# Measured on a DI-4108 with these constants: 200 samples/s with two channels in
-# the list and 400 with four, both at 99.9 scans/s. Consecutive scans are
-# therefore 1/SCAN_RATE apart no matter how many channels they carry.
 BASE_CLOCK_HZ = 60_000_000  # Input to the DI-4108's sample-rate divider
-SRATE = 1171
-DECIMATION = 512
-SCAN_RATE = BASE_CLOCK_HZ / (SRATE * DECIMATION)  # ~100 Hz per channel
+
+
+@dataclass(frozen=True)
+class AcquisitionProfile:
+    """
+    How fast the DI-4108 scans, and how it packs what it sends.
+
+    srate/dec set how often the DI-4108 walks the whole scan list, not how much
+    data it produces per second: every channel in the list is sampled once per
+    pass, so scan_rate is the per-channel rate and throughput is scan_rate * N.
+    Measured on a DI-4108 at 1171/512: 200 samples/s with two channels in the
+    list and 400 with four, both at 99.9 scans/s. Consecutive scans are
+    therefore 1/scan_rate apart no matter how many channels they carry.
+
+    packet_size is the "ps" argument: the device sends its samples in USB
+    packets of 16 << packet_size bytes and holds each one back until it is
+    full. It grows with the rate so the host handles ~100-250 packets a second
+    either way: too small and a fast profile buries the port in tiny reads, too
+    large and a slow one delivers its samples in bursts seconds apart.
+    """
+
+    name: str
+    srate: int
+    decimation: int
+    packet_size: int
+
+    @property
+    def scan_rate(self) -> float:
+        return BASE_CLOCK_HZ / (self.srate * self.decimation)
+
+    def commands(self) -> tuple[str, str]:
+        """The rate commands, in the order setup() sends them."""
+        return f"dec {self.decimation}", f"srate {self.srate}"
+
+
+#                                 name     srate  dec  ps   bytes/s with 2 channels
+PROFILE_100HZ = AcquisitionProfile("100 Hz", 1171, 512, 0)  # 400: 25 packets/s
+PROFILE_1KHZ = AcquisitionProfile("1 kHz", 1200, 50, 1)  # 4,000: 125 packets/s
+PROFILE_5KHZ = AcquisitionProfile("5 kHz", 1200, 10, 3)  # 20,000: 156 packets/s
+
+DEFAULT_PROFILE = PROFILE_100HZ
 
 # The analog front end integrates with an RC time constant of 0.3 s, band-limiting
 # the signal to ~1/(2*pi*0.3) = 0.53 Hz before the ADC ever sees it. At ~100 Hz per
@@ -107,7 +142,10 @@ FILTER_KIND = FilterKind.BOTH
 # Hampel parameters. The window is a trailing one -- a centered window would
 # delay every sample by half its length, which is not free on a live stripchart.
 # 7 samples is ~70 ms at ~100 Hz per channel and tolerates up to 3 consecutive
-# bad samples; 3 sigmas passes ~99.7% of clean Gaussian data untouched.
+# bad samples; 3 sigmas passes ~99.7% of clean Gaussian data untouched. A window
+# of w tolerates runs of up to (w - 1) // 2, and since HampelFilter keeps its
+# window sorted, 50-200 costs little more per sample than 7 does (see
+# benchmarks/hampel.py).
 HAMPEL_WINDOW = 7
 HAMPEL_SIGMAS = 3.0
 
@@ -153,6 +191,28 @@ def range_volt(word: int) -> float:
     return Tars.RANGE_VOLT[(word >> 8) & 0xF]
 
 
+def decode_scans(buffer: bytearray, channels: list[int]) -> np.ndarray:
+    """
+    Decode every complete scan at the front of `buffer` into an (N, channels)
+    array of volts, and remove those bytes from it. A trailing partial scan is
+    left where it is for the next read to complete: dropping it, or decoding it
+    short, would shift every later sample onto the wrong channel.
+
+    The device returns 16-bit little-endian two's complement spanning each
+    channel's configured bipolar range, so one multiply by a per-channel scale
+    converts the whole block. Scaling by range/32768 rounds exactly as
+    range * counts / 32768 does, since 32768 is a power of two.
+    """
+    width = len(channels)
+    scans = len(buffer) // (2 * width)
+    scale = np.array([range_volt(word) for word in channels]) / 32768
+    counts = np.frombuffer(buffer, dtype="<i2", count=scans * width)
+    volts = counts.reshape(scans, width) * scale
+    del counts  # Release the view, or the bytearray cannot be resized
+    del buffer[: scans * 2 * width]
+    return volts
+
+
 class SinglePoleLowpass:
     """
     One-pole IIR lowpass (exponential moving average) -- the digital equivalent of
@@ -182,6 +242,26 @@ class SinglePoleLowpass:
             self.value += self.alpha * (sample - self.value)
         return self.value
 
+    def process(self, block: np.ndarray) -> np.ndarray:
+        """
+        Filter a block of samples, oldest first, carrying the state across
+        blocks exactly as update() would. Each output depends on the previous
+        one, and reassociating that recursion into array operations would round
+        differently, so it runs as one tight loop over plain floats instead of
+        one method call per sample.
+        """
+        alpha = self.alpha
+        value = self.value
+        out = []
+        for sample in block.tolist():
+            if value is None:
+                value = sample
+            else:
+                value += alpha * (sample - value)
+            out.append(value)
+        self.value = value
+        return np.array(out, dtype=float)
+
 
 class HampelFilter:
     """
@@ -198,6 +278,12 @@ class HampelFilter:
     This is a despiker, not a smoother. It leaves inliers exactly as they were,
     so it does not reduce Gaussian noise; pair it with SinglePoleLowpass if the
     trace needs quieting as well.
+
+    The window is also kept sorted as samples enter and leave it, so the median
+    is an index and the MAD a binary search (see _deviation()), rather than two
+    full sorts per sample. Per-sample cost then barely grows with the window,
+    which is what makes windows long enough to span an RFI burst affordable.
+    The results are exactly those of statistics.median on the same window.
     """
 
     # A spread estimate of zero would make every deviation "infinitely" many
@@ -207,22 +293,34 @@ class HampelFilter:
     # would quantize away every small real change. Below this, pass through.
     MIN_SPREAD = 1e-12
 
+    # process() vectorizes only where that beats the sorted window. Below this
+    # many samples the numpy setup costs more than it saves (measured crossover
+    # ~30 at window 7), and above this window np.median's O(window) per row
+    # loses to update()'s binary searches. The output is identical either way.
+    MIN_VECTOR_BLOCK = 32
+    MAX_VECTOR_WINDOW = 64
+
     def __init__(self, window: int, sigmas: float):
         self.samples: deque[float] = deque(maxlen=max(1, window))
+        self.sorted: list[float] = []  # The same samples, in ascending order
         self.sigmas = sigmas
 
     def reset(self):
         self.samples.clear()
+        self.sorted.clear()
 
     def update(self, sample: float) -> float:
+        if len(self.samples) == self.samples.maxlen:
+            del self.sorted[bisect_left(self.sorted, self.samples[0])]
         self.samples.append(sample)
+        insort(self.sorted, sample)
         # A partly-filled window has too few samples for the median to be robust;
         # judging a spike against 2 neighbors mostly rejects good data instead.
         if len(self.samples) < self.samples.maxlen:
             return sample
 
-        median = statistics.median(self.samples)
-        mad = statistics.median([abs(x - median) for x in self.samples])
+        median = self._median()
+        mad = self._median_deviation(median)
         spread = 1.4826 * mad
         if spread < self.MIN_SPREAD:
             return sample
@@ -230,6 +328,88 @@ class HampelFilter:
             return median
         return sample
 
+    def _median(self) -> float:
+        ordered = self.sorted
+        middle = len(ordered) // 2
+        if len(ordered) % 2:
+            return ordered[middle]
+        return (ordered[middle - 1] + ordered[middle]) / 2
+
+    def _median_deviation(self, median: float) -> float:
+        """The median of |x - median| over the window, i.e. the MAD."""
+        count = len(self.sorted)
+        middle = count // 2
+        if count % 2:
+            return self._deviation(middle, median)
+        return (self._deviation(middle - 1, median) + self._deviation(middle, median)) / 2
+
+    def _deviation(self, rank: int, median: float) -> float:
+        """
+        The rank-th smallest (from 0) absolute deviation from `median`.
+
+        Splitting the sorted window at its middle gives two runs of deviations
+        that are each already in ascending order: median - x walking down from
+        the middle, and x - median walking up from it. The rank-th smallest of
+        two sorted runs is found by binary search on how many come from the
+        lower run, so nothing is sorted or even built. median - x is exactly
+        abs(x - median) for x below the median, since rounding is symmetric.
+        """
+        ordered = self.sorted
+        split = len(ordered) // 2
+        # The i-th deviation below is median - ordered[split - 1 - i], and the
+        # j-th above is ordered[split + j] - median. Take i from below and
+        # rank + 1 - i from above, for the smallest i that leaves nothing
+        # smaller behind in the run above.
+        lo = max(0, rank + 1 - (len(ordered) - split))
+        hi = min(rank + 1, split)
+        while lo < hi:
+            i = (lo + hi) // 2
+            if ordered[split + rank - i] - median > median - ordered[split - 1 - i]:
+                lo = i + 1
+            else:
+                hi = i
+        taken = rank + 1 - lo  # From above
+        if lo == 0:
+            return ordered[split + taken - 1] - median
+        if taken == 0:
+            return median - ordered[split - lo]
+        return max(median - ordered[split - lo], ordered[split + taken - 1] - median)
+
+    def process(self, block: np.ndarray) -> np.ndarray:
+        """
+        Despike a block of samples, oldest first, with the same result as
+        update() on each in turn. Every sample's trailing window is a row of
+        one strided view over the held-over samples and the block, so the
+        medians and MADs of the whole block take two numpy calls. The median of
+        an odd window is its middle element and that of an even one the mean of
+        its middle two, exactly as statistics.median computes them.
+        """
+        window = self.samples.maxlen
+        if len(block) < self.MIN_VECTOR_BLOCK or window > self.MAX_VECTOR_WINDOW:
+            return np.array([self.update(x) for x in block.tolist()], dtype=float)
+
+        held = list(self.samples)[-(window - 1):] if window > 1 else []
+        x = np.concatenate([np.asarray(held, dtype=float), block])
+        self.samples.extend(block.tolist())
+        self.sorted = sorted(self.samples)
+
+        # Samples arriving while the window is still filling pass through.
+        filling = min(len(block), max(0, window - 1 - len(held)))
+        out = np.array(block, dtype=float)
+        if filling == len(block):
+            return out
+
+        windows = sliding_window_view(x, window)
+        median = np.median(windows, axis=1)
+        mad = np.median(np.abs(windows - median[:, None]), axis=1)
+        spread = 1.4826 * mad
+        judged = block[filling:]
+        spike = (spread >= self.MIN_SPREAD) & (
+            np.abs(judged - median) > self.sigmas * spread
+        )
+        out[filling:] = np.where(spike, median, judged)
+        return out
+
 
 class FilterChain:
     """
@@ -249,6 +429,16 @@ class FilterChain:
             sample = stage.update(sample)
         return sample
 
+    def process(self, block: np.ndarray) -> np.ndarray:
+        """
+        Run a whole block through every stage in turn. Each stage carries its
+        own state across blocks, so splitting a stream into blocks anywhere
+        gives the same output as update() on every sample.
+        """
+        for stage in self.stages:
+            block = stage.process(block)
+        return block
+
 
 def make_filter(kind: FilterKind, period: float) -> FilterChain:
     """
@@ -296,15 +486,13 @@ class Tars:
             slist_word(0),  # Telescope channel A
             slist_word(1),  # Telescope channel B
         ]
+        # Bytes read off the port that do not yet make up a whole scan
+        self.pending = bytearray()
         self.acquiring = False
 
-        # The interval between consecutive scans, which is also the interval
-        # between consecutive samples of any one channel: adding channels to the
-        # scan list widens each scan rather than slowing the walk.
-        self.sample_period = 1 / SCAN_RATE
-        self.filters = tuple(
-            make_filter(FILTER_KIND, self.sample_period) for _ in self.channels
-        )
+        self.filter_kind = FILTER_KIND
+        self.profile = DEFAULT_PROFILE
+        self._apply_profile()
 
         # Pulsar observations need the raw samples: every software filter here
         # is a lowpass well below the pulse rate, so it would smear the very
@@ -317,7 +505,7 @@ class Tars:
         self.reset_filters()
         if not self.testing:
             # "start" never echoes, so nothing should follow it but samples.
-            self.ser.reset_input_buffer()
+            self.flush_input()
             self.send("start")
             self.acquiring = True
 
@@ -331,9 +519,19 @@ class Tars:
         if self.testing:
             return
         self.send("stop")
-        self.ser.reset_input_buffer()
+        self.flush_input()
         self.acquiring = False
 
+    def flush_input(self):
+        """
+        Discard everything received, including a partial scan held back from
+        the last read: half a scan from before the flush would pair up with
+        the first bytes after it and put every later sample on the wrong channel.
+        """
+        self.ser.reset_input_buffer()
+        self.pending.clear()
+        self.timebase.reset()  # Scans are counted from the first one after this
+
     def reset_filters(self):
         """
         Forget the filter state. Every caller of this also flushes the input
@@ -342,6 +540,51 @@ class Tars:
         for channel_filter in self.filters:
             channel_filter.reset()
 
+    def _apply_profile(self):
+        # The interval between consecutive scans, which is also the interval
+        # between consecutive samples of any one channel: adding channels to the
+        # scan list widens each scan rather than slowing the walk.
+        self.sample_period = 1 / self.profile.scan_rate
+        # The lowpass's tau is in seconds, so its coefficient has to follow the
+        # rate. The Hampel window stays in samples: the glitches it is for (a
+        # dropped byte, an ADC hiccup) are a sample long at any rate.
+        self.filters = tuple(
+            make_filter(self.filter_kind, self.sample_period) for _ in self.channels
+        )
+        self.timebase = Timebase(self.sample_period)
+
+    def set_profile(self, profile: AcquisitionProfile) -> bool:
+        """
+        Switch the device to another acquisition profile, retuning the filters
+        to match, and resume scanning if it was. Returns whether the device
+        confirmed every command; the caller must keep everyone else off the
+        port meanwhile.
+
+        The DI-4108 only takes rate changes while it is stopped, and stopping
+        costs ~1 s, so this does nothing if the profile is already in effect.
+        """
+        if profile == self.profile:
+            return True
+        self.profile = profile
+        self._apply_profile()
+        if self.testing:
+            return True
+
+        acquiring = self.acquiring
+        self.command("stop")
+        self._drain()
+        self.flush_input()
+        self.acquiring = False
+
+        ok = True
+        for command in (f"ps {profile.packet_size}", *profile.commands()):
+            ok &= self._configure(command)
+        self.parent.log(f"DataQ scanning at {profile.name} per channel")
+
+        if acquiring:
+            self.start()
+        return ok
+
     def set_filtering(self, enabled: bool):
         """
         Turn the software filter chain on or off. Switching either way discards
@@ -353,43 +596,44 @@ class Tars:
         self.filtering = enabled
         self.reset_filters()
 
-    def _read_one(self) -> SignalDatum | None:
+    def _read_block(self) -> np.ndarray:
         """
-        This reads one datapoint from the buffer. Each datapoint has three channels:
+        Read everything waiting in the port with one read() and decode all the
+        whole scans in it, as an (N, channels) array of volts. Each scan holds:
         channel 0: telescope channel A
         channel 1: telescope channel B
-        channel 2: declinometer
         """
-        if self.testing:
-            return self.random_data()
+        waiting = self.in_waiting()
+        if waiting:
+            self.pending += self.ser.read(waiting)
+        return decode_scans(self.pending, self.channels)
 
-        if self.in_waiting() < (2 * len(self.channels)):
-            return None
-        channel_a = self.buffer_read(self.channels[0])
-        channel_b = self.buffer_read(self.channels[1])
-        if channel_a is None or channel_b is None:
-            return None
-        return SignalDatum(a=float(channel_a), b=float(channel_b))
-
-    def read_all(self) -> list[SignalDatum]:
+    def read_all(self) -> np.ndarray:
         """
         Read every scan waiting in the buffer, filter them, and return all of them
-        oldest-first. Use this when no sample may be dropped, e.g. pulsar mode.
+        oldest-first as an (N, 2) array of channel A and B volts. Use this when no
+        sample may be dropped, e.g. pulsar mode.
 
-        Returns an empty list when no new scan arrived, so the caller's data rate is
-        unchanged -- tick() must not append a duplicate point on an empty read.
+        Returns an empty block when no new scan arrived, so the caller's data rate
+        is unchanged -- tick() must not append a duplicate point on an empty read.
         """
         if self.testing:
-            return [self._filter(self.random_data())]
-        data = []
-        current = self._read_one()
-        while current is not None:
-            # Every decoded scan updates the filter, not just the newest one.
-            # Dropping the backlog would waste the averaging and stretch the
-            # effective time constant whenever a slow tick lets scans queue up.
-            data.append(self._filter(current))
-            current = self._read_one()
-        return data
+            datum = self.random_data()
+            block = np.array([[datum.a, datum.b]])
+        else:
+            block = self._read_block()
+        self.timebase.observe(len(block), time.monotonic())
+        # Every decoded scan updates the filter, not just the newest one.
+        # Dropping the backlog would waste the averaging and stretch the
+        # effective time constant whenever a slow tick lets scans queue up.
+        return self._filter_block(block)
+
+    def scan_times(self, count: int) -> np.ndarray:
+        """
+        The time.monotonic() times at which the last `count` scans read were
+        taken, from the device's own scan clock (see Timebase).
+        """
+        return self.timebase.times(count)
 
     def read_latest(self) -> SignalDatum | None:
         """
@@ -397,15 +641,16 @@ class Tars:
         Use this as a real-time sampling method.
         """
         data = self.read_all()
-        return data[-1] if data else None
-
-    def _filter(self, datum: SignalDatum) -> SignalDatum:
-        if not self.filtering:
-            return datum
-        return SignalDatum(
-            a=self.filters[0].update(datum.a),
-            b=self.filters[1].update(datum.b),
-        )
+        if len(data) == 0:
+            return None
+        return SignalDatum(a=float(data[-1, 0]), b=float(data[-1, 1]))
+
+    def _filter_block(self, block: np.ndarray) -> np.ndarray:
+        if not self.filtering or len(block) == 0:
+            return block
+        for column, channel_filter in enumerate(self.filters):
+            block[:, column] = channel_filter.process(block[:, column])
+        return block
 
     # Helpers
 
@@ -491,13 +736,12 @@ class Tars:
         self._drain()
         self.acquiring = False
 
-        commands = ["ps 0"]  # Small pocketsize for responsiveness
+        commands = [f"ps {self.profile.packet_size}"]
         commands += [f"slist {i} {word}" for i, word in enumerate(self.channels)]
-        # 60,000,000/(srate * dec) = 60,000,000/(1171 * 512) = 100 scans/s, and
-        # every channel in the scan list is sampled once per scan, so both run at
-        # ~100 Hz. SinglePoleLowpass reads the same constants, so changing these
-        # retunes the filter with them.
-        commands += [f"dec {DECIMATION}", f"srate {SRATE}"]
+        # 60,000,000/(srate * dec) scans/s, and every channel in the scan list
+        # is sampled once per scan, so at the default 1171 * 512 both run at
+        # ~100 Hz. The filters were tuned from the same profile.
+        commands += self.profile.commands()
 
         model = self.command("info 1")
         if model is None:
@@ -554,28 +798,11 @@ class Tars:
             return 0
         return self.ser.in_waiting
 
-    def buffer_read(self, channel: int) -> float | None:
-        """
-        This function reads one value from the serial buffer. I.E. it will only read
-        *one channel* at a time. Therefore, do not use this function by itself. If data
-        is not always read in pairs of three there's no way to tell the channels apart.
-        """
-        if self.testing:
-            return None
-
-        if self.in_waiting() < 2:
+    def fileno(self) -> int | None:
+        """The port's file descriptor, to wait on for input; None when simulating."""
+        if self.testing or not hasattr(self.ser, "fileno"):  # No fileno() on Windows
             return None
-        buffer = self.ser.read(2)
-        # The device returns 16-bit two's complement spanning the configured
-        # bipolar range, so a positive coax signal uses only the positive half
-        # of its configured range: 0 V -> 0 counts, +FS -> +32767.
-        # Every range this device offers is bipolar, so there is no unipolar
-        # code that would win back the unused bit.
-        return (
-            range_volt(channel)
-            * int.from_bytes(buffer, byteorder="little", signed=True)
-            / 32768
-        )
+        return self.ser.fileno()
 
     # - MARK: Testing
 
@@ -0,0 +1,122 @@
+"""
+Sample timestamps from the DAQ's own clock rather than from when the host got
+around to reading its output.
+"""
+
+from collections import deque
+
+import numpy as np
+
+
+class Timebase:
+    """
+    Models when each scan was taken as a straight line in scan index: scan n
+    was taken at origin + period * n, on the time.monotonic() clock.
+
+    The DI-4108 clocks its scans in hardware, so the only thing that is not
+    known exactly is how its crystal compares with the host's and where the
+    line starts. Each read contributes one point: the index of the last scan it
+    returned, and the monotonic time it returned at. Those arrival times are
+    the sample times plus a delay -- USB packetization, the worker's idle
+    sleep, the GIL -- that is mostly small and occasionally large. A least
+    squares line through the last WINDOW reads, refitted without the reads
+    whose delay stands out (REJECT_SIGMAS robust standard deviations), averages
+    the small delays away and ignores the large ones, so every sample is
+    stamped to a precision far finer than the jitter of any one read. The line
+    is then lowered onto the earliest of those reads: no scan can arrive before
+    it was taken, so the least delayed read is the best bound on the delay
+    every read shares.
+
+    Until the first fit, and across a refit that moves the line back, a block
+    may model its scans as taken before the last one stamped; they are held at
+    that stamp instead, so times never run backwards.
+
+    `jitter` is the RMS residual of the reads that were kept: how far a single
+    read's time strays from the model, i.e. what stamping each block with its
+    read time would cost. `period` is the fitted scan interval, which differs
+    from the nominal one by the two clocks' relative drift.
+    """
+
+    WINDOW = 512  # Reads, i.e. ~20 s at 100 Hz with 16-byte packets
+    MIN_READS = 8  # Fewest reads a fit may keep after rejecting outliers
+    # Reads before the first fit, with the nominal period trusted until then.
+    # Well over MIN_READS, so that the first fit can reject a stall too.
+    FIRST_FIT_READS = 2 * MIN_READS
+    REJECT_SIGMAS = 3.0
+    # A fit costs a few hundred microseconds, and the line it finds moves by
+    # far less than the jitter between one read and the next, so reads in
+    # between are stamped from the last fit.
+    REFIT_EVERY = 16
+
+    def __init__(self, period: float, window: int = WINDOW):
+        self.nominal_period = period
+        self.indices: deque[int] = deque(maxlen=window)
+        self.arrivals: deque[float] = deque(maxlen=window)
+        self.reset()
+
+    def reset(self):
+        """Start counting scans from 0 again, e.g. after the device restarts."""
+        self.indices.clear()
+        self.arrivals.clear()
+        self.scans = 0
+        self.reads_since_fit = 0
+        self.period = self.nominal_period
+        self.origin = 0.0
+        self.jitter = 0.0
+        self.last_stamp = -np.inf
+
+    def observe(self, count: int, arrival: float):
+        """Account for a read that returned `count` scans at monotonic `arrival`."""
+        if count == 0:
+            return
+        self.scans += count
+        self.reads_since_fit += 1
+        self.indices.append(self.scans - 1)
+        self.arrivals.append(arrival)
+        if len(self.indices) < self.FIRST_FIT_READS:
+            # Too few reads to fit. Back-date from this one at the nominal
+            # period, which is what every block got before there was a model.
+            self.period = self.nominal_period
+            self.origin = arrival - self.period * (self.scans - 1)
+            return
+        if len(self.indices) == self.FIRST_FIT_READS or self.reads_since_fit >= self.REFIT_EVERY:
+            self._fit()
+
+    def times(self, count: int) -> np.ndarray:
+        """The monotonic times at which the last `count` scans were taken."""
+        indices = np.arange(self.scans - count, self.scans, dtype=float)
+        stamps = np.maximum(self.origin + self.period * indices, self.last_stamp)
+        if count:
+            self.last_stamp = float(stamps[-1])
+        return stamps
+
+    def _fit(self):
+        n = np.fromiter(self.indices, dtype=float, count=len(self.indices))
+        t = np.fromiter(self.arrivals, dtype=float, count=len(self.arrivals))
+        # Fit about the means: monotonic times are large enough that squaring
+        # them directly would cost most of the precision this is for.
+        n_mean = n.mean()
+        t_mean = t.mean()
+        n = n - n_mean
+        t = t - t_mean
+
+        kept = np.ones(len(n), dtype=bool)
+        for rejecting in (True, True, False):
+            nk = n[kept] - n[kept].mean()
+            slope = np.dot(nk, t[kept]) / np.dot(nk, nk)
+            intercept = t[kept].mean() - slope * n[kept].mean()
+            residuals = t - (intercept + slope * n)
+            if not rejecting:
+                break
+            center = np.median(residuals[kept])
+            spread = 1.4826 * np.median(np.abs(residuals[kept] - center))
+            refit = np.abs(residuals - center) <= self.REJECT_SIGMAS * spread
+            if refit.sum() < self.MIN_READS or (refit == kept).all():
+                break
+            kept = refit
+
+        kept_residuals = residuals[kept]
+        self.period = float(slope)
+        self.origin = float(t_mean + intercept + kept_residuals.min() - slope * n_mean)
+        self.jitter = float(np.sqrt(np.mean(kept_residuals**2)))
+        self.reads_since_fit = 0
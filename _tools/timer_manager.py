@@ -2,60 +2,153 @@
 
 from __future__ import annotations
 
+import heapq
+import itertools
+import math
 import time
+from dataclasses import dataclass
 from typing import Callable
 
 
+@dataclass
+class TimerStats:
+    """
+    How a timer has kept to its period. Lateness is how long after its
+    deadline a callback started; a miss is a whole period that went by with
+    no callback at all, because the one before it (or something else on the
+    GUI thread) ran long. Runtime is the callback's own.
+    """
+
+    runs: int = 0
+    missed: int = 0
+    total_lateness: float = 0.0  # Seconds
+    max_lateness: float = 0.0
+    total_runtime: float = 0.0  # Seconds
+    max_runtime: float = 0.0
+
+    def record(self, lateness: float, missed: int, runtime: float) -> None:
+        self.runs += 1
+        self.missed += missed
+        self.total_lateness += lateness
+        self.max_lateness = max(self.max_lateness, lateness)
+        self.total_runtime += runtime
+        self.max_runtime = max(self.max_runtime, runtime)
+
+    def describe(self) -> str:
+        if not self.runs:
+            return "never run"
+        return (
+            f"{self.runs} runs, {self.missed} missed, "
+            f"late {self.total_lateness / self.runs * 1000:.1f} ms mean / {self.max_lateness * 1000:.1f} ms max, "
+            f"ran {self.total_runtime / self.runs * 1000:.1f} ms mean / {self.max_runtime * 1000:.1f} ms max"
+        )
+
+
 class Timer:
-    """A timer for syncing things that run at different, variable rates."""
+    """
+    A timer for syncing things that run at different, variable rates.
+
+    Times are time.monotonic(), so the wall clock being stepped (by NTP, say)
+    neither fires nor holds back a callback.
+    """
 
     def __init__(self, period: int, callback: Callable[[], None], name: str = "", log: bool = False):
         self.period = period  # ms
         self.callback = callback
-        self.anchor_time: float = time.time()
+        self.anchor_time: float = time.monotonic()
         self.name = name
         self.log = log
+        self.stats = TimerStats()
+        # Set by the TimerManager that owns this timer, which must hear about
+        # a new deadline to reschedule it
+        self.manager: TimerManager | None = None
+
+    @property
+    def deadline(self) -> float:
+        """When the timer is next due, or infinity if it is cancelled."""
+        if self.period <= 0:
+            return math.inf
+        return self.anchor_time + self.period / 1000
 
     def run(self) -> None:
         self.callback()
 
-    def run_if_appropriate(self) -> bool:
-        if self.period <= 0:
-            return False
-
-        current_time = time.time()
+    def _run_due(self, current_time: float) -> None:
+        # Fire once however many periods have passed, keeping to the original
+        # phase, and count the periods that went by without a run as missed
         elapsed_periods, extra_time = divmod(current_time - self.anchor_time, self.period / 1000)
-        if elapsed_periods > 0:
-            self.anchor_time = current_time - extra_time
-            self.run()
-            return True
-        return False
+        lateness = current_time - self.deadline
+        self.anchor_time = current_time - extra_time
+        start = time.perf_counter()
+        self.run()
+        self.stats.record(lateness, int(elapsed_periods) - 1, time.perf_counter() - start)
 
     def set_period(self, new_period: int) -> None:
         if self.period != new_period:
-            self.anchor_time = time.time()
-        self.period = new_period
+            self.anchor_time = time.monotonic()
+            self.period = new_period
+            if self.manager is not None:
+                self.manager.schedule(self)
 
     def cancel(self) -> None:
         self.period = 0
 
 
 class TimerManager:
-    """Owns and runs `Timer` objects."""
+    """
+    Owns and runs `Timer` objects.
+
+    Their deadlines are kept in a min-heap, so run_timers() only looks at the
+    timers that are due rather than at every timer on every tick, and
+    next_due() can say how long the caller may sleep. A timer whose deadline
+    changes is pushed again, and the entry it leaves behind is skipped as
+    stale when it reaches the top.
+    """
 
     def __init__(self):
         self.timers: list[Timer] = []
+        self.heap: list[tuple[float, int, Timer]] = []
+        self.sequence = itertools.count()  # Breaks ties between equal deadlines
 
     def add_timer(self, period: int, callback: Callable[[], None], name: str = "", log: bool = False) -> Timer:
         timer = Timer(period, callback, name, log)
+        timer.manager = self
         self.timers.append(timer)
+        self.schedule(timer)
         return timer
 
+    def schedule(self, timer: Timer) -> None:
+        """Queue `timer` for its current deadline."""
+        if timer.deadline < math.inf:
+            heapq.heappush(self.heap, (timer.deadline, next(self.sequence), timer))
+
+    def next_due(self) -> float | None:
+        """The time.monotonic() at which the next timer is due, or None if none is."""
+        self._drop_stale()
+        return self.heap[0][0] if self.heap else None
+
     def run_timers(self) -> None:
-        for timer in self.timers:
-            timer.run_if_appropriate()
+        current_time = time.monotonic()
+        while True:
+            self._drop_stale()
+            if not self.heap or self.heap[0][0] > current_time:
+                return
+            _, _, timer = heapq.heappop(self.heap)
+            try:
+                timer._run_due(current_time)
+            finally:
+                # Even if the callback raised, or the timer would never fire again
+                self.schedule(timer)
 
     def reset_timer_anchors(self) -> None:
-        current_time = time.time()
+        current_time = time.monotonic()
         for timer in self.timers:
             timer.anchor_time = current_time
+        self.heap.clear()
+        for timer in self.timers:
+            self.schedule(timer)
+
+    def _drop_stale(self) -> None:
+        """Pop entries for deadlines their timers have since moved off."""
+        while self.heap and self.heap[0][0] != self.heap[0][2].deadline:
+            heapq.heappop(self.heap)
@@ -0,0 +1 @@
+"""Standalone benchmarks. Each module runs on its own with `python -m`."""
@@ -0,0 +1,95 @@
+"""
+Per-sample cost of HampelFilter against the statistics.median implementation
+it replaced, at several window sizes.
+
+    uv run python -m benchmarks.hampel
+    uv run python -m benchmarks.hampel --samples 50000 --windows 7 50 200
+
+The old filter re-sorted the whole window twice per sample (once for the
+median, once for the MAD), so its cost grows with the window. The sorted-window
+filter should stay roughly flat. Both are checked to produce identical output
+before either is timed.
+"""
+import argparse
+import random
+import statistics
+import sys
+import time
+from collections import deque
+
+from _tools.tars import HAMPEL_SIGMAS, HampelFilter
+
+WINDOWS = (7, 25, 50, 100, 200)
+SAMPLES = 20_000
+
+
+class StatisticsHampel:
+    """HampelFilter.update() as it was before the window was kept sorted."""
+
+    def __init__(self, window: int, sigmas: float):
+        self.samples: deque[float] = deque(maxlen=max(1, window))
+        self.sigmas = sigmas
+
+    def update(self, sample: float) -> float:
+        self.samples.append(sample)
+        if len(self.samples) < self.samples.maxlen:
+            return sample
+        median = statistics.median(self.samples)
+        mad = statistics.median([abs(x - median) for x in self.samples])
+        spread = 1.4826 * mad
+        if spread < HampelFilter.MIN_SPREAD:
+            return sample
+        if abs(sample - median) > self.sigmas * spread:
+            return median
+        return sample
+
+
+def signal(count: int, seed: int = 0) -> list[float]:
+    """Gaussian noise on a slow ramp, with isolated spikes and short bursts."""
+    rng = random.Random(seed)
+    samples = [2.0 + i * 1e-5 + rng.gauss(0, 0.01) for i in range(count)]
+    for i in range(0, count, 97):
+        samples[i] += rng.choice([-5.0, 5.0])
+    for i in range(500, count, 2000):
+        samples[i : i + 10] = [8.0] * 10
+    return samples
+
+
+def per_sample_us(make, samples: list[float]) -> float:
+    f = make()
+    start = time.perf_counter()
+    for x in samples:
+        f.update(x)
+    return (time.perf_counter() - start) / len(samples) * 1e6
+
+
+def run(windows=WINDOWS, count=SAMPLES) -> list[tuple[int, float, float]]:
+    samples = signal(count)
+    rows = []
+    for window in windows:
+        old = StatisticsHampel(window, HAMPEL_SIGMAS)
+        new = HampelFilter(window, HAMPEL_SIGMAS)
+        if [old.update(x) for x in samples] != [new.update(x) for x in samples]:
+            raise AssertionError(f"outputs differ at window {window}")
+        rows.append((
+            window,
+            per_sample_us(lambda: StatisticsHampel(window, HAMPEL_SIGMAS), samples),
+            per_sample_us(lambda: HampelFilter(window, HAMPEL_SIGMAS), samples),
+        ))
+    return rows
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--samples", type=int, default=SAMPLES)
+    parser.add_argument("--windows", type=int, nargs="+", default=list(WINDOWS))
+    args = parser.parse_args(argv)
+
+    print(f"{'window':>6}  {'statistics':>12}  {'sorted':>12}  {'speedup':>7}")
+    for window, old, new in run(args.windows, args.samples):
+        print(f"{window:>6}  {old:>9.2f} us  {new:>9.2f} us  {old / new:>6.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
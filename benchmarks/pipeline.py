@@ -0,0 +1,307 @@
+"""
+Throughput, latency and allocation of each stage of the acquisition path, from
+the bytes the DI-4108 sends to the lines MyPrecious writes.
+
+    uv run python -m benchmarks.pipeline
+    uv run python -m benchmarks.pipeline --rates 1000 20000 --seconds 5
+    uv run python -m benchmarks.pipeline --json before.json
+
+A synthetic two-channel byte stream at each rate is cut into the blocks one
+10 ms tick would find waiting, and every block is pushed through the stages in
+turn, each timed on its own:
+
+  decode    decode_scans(), as Tars._read_block() calls it
+  filter    Tars._filter_block() with the default filter chain, tuned for the rate
+  record    Threepio.record_samples(): per-scan declinations, data points, the
+            decimator and the stripchart's buffer and history, with no
+            observation loaded
+  observe   Pulsar.record_sample() on every point, writing through MyPrecious
+            into a temporary directory
+
+and then all four together. For each it reports samples/s, the per-block
+latency percentiles, and two allocation figures. CPython keeps no count of
+allocations, so those are the peak bytes tracemalloc sees allocated on top of
+what was live before the block, and the memory blocks still allocated after
+it; both are per sample. They are measured in a separate pass, since tracing
+slows everything down.
+
+--json writes the results with the commit and library versions, so that runs
+can be compared across commits. Runs headless: Qt is only imported, with the
+offscreen platform, to borrow Threepio.record_samples.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import numpy as np
+
+from tools import (
+    PROFILE_100HZ,
+    PROFILE_1KHZ,
+    PROFILE_5KHZ,
+    AcquisitionProfile,
+    Decimator,
+    DecTrack,
+    Pulsar,
+    StripchartBuffer,
+    StripchartHistory,
+    Tars,
+)
+from _tools.observation import State
+from _tools.tars import decode_scans, slist_word
+from threepio import Threepio
+
+RATES = (100, 1000, 5000, 20_000)  # Per channel
+SECONDS = 2.0  # Of simulated data per rate
+TICK = 0.01  # Threepio.BASE_PERIOD; how much data each block holds
+STAGES = ("decode", "filter", "record", "observe", "pipeline")
+
+CHANNELS = [slist_word(0), slist_word(1)]
+
+
+def profile_for(rate: int) -> AcquisitionProfile:
+    """The profile that scans at `rate`, inventing one where Tars has none."""
+    for profile in (PROFILE_100HZ, PROFILE_1KHZ, PROFILE_5KHZ):
+        if round(profile.scan_rate) == rate:
+            return profile
+    return AcquisitionProfile(f"{rate} Hz", round(60_000_000 / rate), 1, 4)
+
+
+def byte_stream(rate: int, seconds: float, seed: int = 0) -> bytes:
+    """What the DI-4108 would send: a slow wave plus noise and the odd spike."""
+    rng = np.random.default_rng(seed)
+    count = int(rate * seconds)
+    t = np.arange(count) / rate
+    volts = np.stack([1.0 + 0.5 * np.sin(2 * np.pi * t / 30 + c) for c in (0, 1)], axis=1)
+    volts += rng.normal(0, 0.01, volts.shape)
+    volts[::97] += 5.0
+    return np.round(volts / 10 * 32768).astype("<i2").tobytes()
+
+
+def chunks(stream: bytes, rate: int) -> list[bytes]:
+    """Cut the stream into ticks' worth, not aligned to scans, as a read would."""
+    size = max(1, round(rate * TICK)) * 2 * len(CHANNELS) + 1
+    return [stream[i : i + size] for i in range(0, len(stream), size)]
+
+
+class _Parent:
+    @staticmethod
+    def log(message, allow_dups=False, warning=False):
+        pass
+
+
+class _Clock:
+    @staticmethod
+    def get_time() -> float:
+        return time.time()
+
+
+class _Recorder:
+    """Just enough of Threepio to run its record_samples()."""
+
+    record_samples = Threepio.record_samples
+
+    def __init__(self):
+        self.clock = _Clock()
+        self.obs = None
+        self.current_dec = 30.0
+        self.current_data_point = None
+        self.dec_track = DecTrack()
+        self.decimator = Decimator()
+        self.stripchart_buffer = StripchartBuffer()
+        self.stripchart_history = StripchartHistory()
+        self.data = deque(maxlen=Threepio.RECENT_DATA_POINTS)
+
+
+class Pipeline:
+    """One instance of every stage, carrying state across blocks like the app."""
+
+    def __init__(self, rate: int):
+        self.tars = Tars(_Parent())
+        self.tars.set_profile(profile_for(rate))
+        self.pending = bytearray()
+        self.recorder = _Recorder()
+        self.pulsar = Pulsar()
+        self.pulsar.set_name("benchmark")
+        self.pulsar.set_start_and_end_times(0.0, float("inf"))
+        self.pulsar.state = State.DATA
+        self.period = 1 / rate
+        self.scans = 0
+        self.dec_period = 0.05  # The declinometer's 20 Hz
+
+    def decode(self, chunk: bytes) -> np.ndarray:
+        self.pending += chunk
+        return decode_scans(self.pending, CHANNELS)
+
+    def filter(self, block: np.ndarray) -> np.ndarray:
+        return self.tars._filter_block(block)
+
+    def record(self, block: np.ndarray):
+        timestamps = (self.scans + np.arange(len(block))) * self.period
+        self.scans += len(block)
+        if len(block) and (
+            not self.recorder.dec_track
+            or timestamps[-1] - self.recorder.dec_track.times[-1] >= self.dec_period
+        ):
+            self.recorder.dec_track.add(float(timestamps[-1]), 30.0 + timestamps[-1] / 600)
+        self.recorder.record_samples(block, timestamps)
+        # The points just recorded, newest last; the bounded deque may have
+        # dropped older ones to make room, as Threepio's does
+        new = min(len(block), len(self.recorder.data))
+        return [self.recorder.data[-i] for i in range(new, 0, -1)]
+
+    def observe(self, points):
+        for point in points:
+            self.pulsar.record_sample(point, point.timestamp)
+
+    def close(self):
+        self.pulsar.close_file()
+
+
+def _percentiles(seconds: list[float]) -> dict:
+    us = np.array(seconds) * 1e6
+    return {
+        "p50": float(np.percentile(us, 50)),
+        "p90": float(np.percentile(us, 90)),
+        "p99": float(np.percentile(us, 99)),
+        "max": float(us.max()),
+    }
+
+
+def _run_blocks(rate: int, seconds: float, measure) -> dict[str, list]:
+    """
+    Push every block through each stage, calling measure(stage, fn, arg) to run
+    a stage on its input; it returns the stage's output and its measurement.
+    """
+    pipeline = Pipeline(rate)
+    results = {stage: [] for stage in STAGES}
+    samples = []
+    try:
+        for chunk in chunks(byte_stream(rate, seconds), rate):
+            block, m_decode = measure(pipeline.decode, chunk)
+            block, m_filter = measure(pipeline.filter, block)
+            points, m_record = measure(pipeline.record, block)
+            _, m_observe = measure(pipeline.observe, points)
+            for stage, m in zip(STAGES, (m_decode, m_filter, m_record, m_observe)):
+                results[stage].append(m)
+            results["pipeline"].append(
+                tuple(sum(values) for values in zip(m_decode, m_filter, m_record, m_observe))
+            )
+            samples.append(len(block) * len(CHANNELS))
+    finally:
+        pipeline.close()
+    results["samples"] = samples
+    return results
+
+
+def _timed(fn, arg):
+    start = time.perf_counter()
+    out = fn(arg)
+    return out, (time.perf_counter() - start,)
+
+
+def _traced(fn, arg):
+    before_blocks = sys.getallocatedblocks()
+    tracemalloc.reset_peak()
+    baseline, _ = tracemalloc.get_traced_memory()
+    out = fn(arg)
+    _, peak = tracemalloc.get_traced_memory()
+    return out, (peak - baseline, sys.getallocatedblocks() - before_blocks)
+
+
+@contextmanager
+def _in_temporary_directory():
+    """MyPrecious writes to ./data/, which must not be the repo's."""
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        try:
+            yield
+        finally:
+            os.chdir(cwd)
+
+
+def run(rates=RATES, seconds=SECONDS) -> list[dict]:
+    rows = []
+    with _in_temporary_directory():
+        for rate in rates:
+            timed = _run_blocks(rate, seconds, _timed)
+            tracemalloc.start()
+            try:
+                traced = _run_blocks(rate, seconds, _traced)
+            finally:
+                tracemalloc.stop()
+            total = sum(timed["samples"])
+            for stage in STAGES:
+                latencies = [m[0] for m in timed[stage]]
+                rows.append({
+                    "stage": stage,
+                    "rate_hz": rate,
+                    "blocks": len(latencies),
+                    "samples": total,
+                    "samples_per_s": total / sum(latencies),
+                    "latency_us": _percentiles(latencies),
+                    "peak_bytes_per_sample": sum(m[0] for m in traced[stage]) / total,
+                    "retained_blocks_per_sample": sum(m[1] for m in traced[stage]) / total,
+                })
+    return rows
+
+
+def environment() -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "tick_s": TICK,
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rates", type=int, nargs="+", default=list(RATES),
+                        help="scan rates per channel, in Hz")
+    parser.add_argument("--seconds", type=float, default=SECONDS,
+                        help="seconds of data to simulate at each rate")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args(argv)
+
+    rows = run(args.rates, args.seconds)
+
+    print(f"{'stage':>8} {'rate':>7} {'samples/s':>11} {'p50 us':>8} {'p99 us':>8} "
+          f"{'max us':>8} {'peak B/smp':>10} {'kept/smp':>8}")
+    for row in rows:
+        latency = row["latency_us"]
+        print(
+            f"{row['stage']:>8} {row['rate_hz']:>7} {row['samples_per_s']:>11,.0f} "
+            f"{latency['p50']:>8.1f} {latency['p99']:>8.1f} {latency['max']:>8.1f} "
+            f"{row['peak_bytes_per_sample']:>10.1f} {row['retained_blocks_per_sample']:>8.2f}"
+        )
+
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump({"environment": environment(), "results": rows}, file, indent=2)
+        print(f"\nResults written to {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
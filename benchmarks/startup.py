@@ -0,0 +1,68 @@
+"""
+How long the sidereal clock holds up startup, measured in fresh interpreters
+so that nothing is already imported or cached.
+
+    uv run python -m benchmarks.startup
+    uv run python -m benchmarks.startup --runs 10
+
+Each run times, from the start of the interpreter's work:
+
+  import    importing tools, the package threepio.py starts from
+  clock     constructing a SuperClock, i.e. until the window can be set up
+  ready     until the clock is on astropy's sidereal time, which happens in
+            the background once the window is up
+
+Before astropy was loaded lazily, ready and clock were the same moment.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+RUNS = 5
+
+PROBE = """
+import json, time
+start = time.perf_counter()
+import tools
+imported = time.perf_counter()
+clock = tools.SuperClock()
+constructed = time.perf_counter()
+clock.get_formatted_sidereal_time()
+if hasattr(clock, "astropy_loaded"):
+    clock.astropy_loaded.wait()
+ready = time.perf_counter()
+print(json.dumps({
+    "import": imported - start,
+    "clock": constructed - start,
+    "ready": ready - start,
+}))
+"""
+
+
+def measure() -> dict[str, float]:
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE],
+        capture_output=True, text=True, check=True,
+        env={"QT_QPA_PLATFORM": "offscreen", **os.environ},
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=RUNS)
+    args = parser.parse_args(argv)
+
+    runs = [measure() for _ in range(args.runs)]
+    print(f"{'stage':>8} {'median s':>9} {'min s':>7} {'max s':>7}")
+    for stage in ("import", "clock", "ready"):
+        values = [run[stage] for run in runs]
+        print(f"{stage:>8} {statistics.median(values):>9.3f} {min(values):>7.3f} {max(values):>7.3f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
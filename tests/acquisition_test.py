@@ -0,0 +1,241 @@
+import os
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from _tools.acquisition import Acquisition
+
+
+class FakeTars:
+    def __init__(self, *batches):
+        self.batches = list(batches)
+        self.reads = 0
+
+    def read_all(self):
+        self.reads += 1
+        return self.batches.pop(0) if self.batches else np.empty((0, 2))
+
+    @staticmethod
+    def scan_times(count):
+        return np.arange(count, dtype=float)
+
+
+class FakeMiniTars:
+    def __init__(self, *readings):
+        self.readings = list(readings)
+
+    def read_latest(self):
+        return self.readings.pop(0) if self.readings else None
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+        self.steps = []
+
+    def monotonic_to_timeline(self, monotonic_time):
+        self.now += 1.0
+        return monotonic_time + self.now
+
+
+def test_drain_reads_inline_without_a_worker():
+    acquisition = Acquisition(
+        FakeTars(np.array([[1.0, 2.0], [3.0, 4.0]])), FakeMiniTars(30.0), FakeClock()
+    )
+
+    (block,) = acquisition.drain()
+
+    assert block.scans.tolist() == [[1.0, 2.0], [3.0, 4.0]]
+    assert block.dec == 30.0
+    assert block.timestamps.tolist() == [101.0, 102.0]  # One per scan
+
+
+def test_an_empty_pass_queues_nothing():
+    acquisition = Acquisition(FakeTars(), FakeMiniTars(), FakeClock())
+    assert acquisition.drain() == []
+
+
+def test_a_declination_alone_still_makes_a_block():
+    acquisition = Acquisition(FakeTars(), FakeMiniTars(12.0), FakeClock())
+
+    (block,) = acquisition.drain()
+
+    assert len(block.scans) == 0
+    assert block.dec == 12.0
+    assert block.dec_timestamp is not None  # Stamped on arrival
+
+
+def test_a_block_without_a_declination_has_no_declination_time():
+    acquisition = Acquisition(FakeTars(np.array([[1.0, 2.0]])), FakeMiniTars(), FakeClock())
+
+    (block,) = acquisition.drain()
+
+    assert block.dec is None
+    assert block.dec_timestamp is None
+
+
+def test_the_worker_keeps_reading_while_nobody_drains():
+    # The point of the thread: a stalled GUI must not stall acquisition.
+    batches = [np.array([[float(i), 0.0]]) for i in range(50)]
+    acquisition = Acquisition(FakeTars(*batches), FakeMiniTars(), FakeClock())
+
+    acquisition.start()
+    try:
+        deadline = time.monotonic() + 5.0
+        while len(acquisition.ring) < 50 and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        acquisition.stop()
+
+    blocks = acquisition.drain()
+    assert [block.scans[0, 0] for block in blocks] == [float(i) for i in range(50)]
+    assert not acquisition.running
+
+
+def test_paused_keeps_the_worker_off_the_devices():
+    tars = FakeTars()
+    acquisition = Acquisition(tars, FakeMiniTars(), FakeClock())
+
+    acquisition.start()
+    try:
+        with acquisition.paused():
+            reads = tars.reads
+            time.sleep(0.05)
+            assert tars.reads == reads
+    finally:
+        acquisition.stop()
+
+
+def test_nested_pauses_hold_until_the_outermost_ends():
+    tars = FakeTars(np.ones((1, 2)))
+    acquisition = Acquisition(tars, FakeMiniTars(), FakeClock())
+
+    with acquisition.paused():
+        with acquisition.paused():
+            pass
+        assert not acquisition.poll()  # Still paused
+    assert acquisition.poll()
+
+
+def test_a_worker_failure_is_raised_to_the_consumer():
+    class Unplugged(FakeTars):
+        def read_all(self):
+            raise OSError("device disconnected")
+
+    acquisition = Acquisition(Unplugged(), FakeMiniTars(), FakeClock())
+    acquisition.start()
+    acquisition._thread.join(timeout=5.0)
+
+    with pytest.raises(OSError, match="disconnected"):
+        acquisition.drain()
+
+
+class PipeTars(FakeTars):
+    """A DAQ on a pipe, which the worker can wait on like a serial port."""
+
+    def __init__(self):
+        super().__init__()
+        self.read_end, self.write_end = os.pipe()
+        os.set_blocking(self.read_end, False)
+
+    def fileno(self):
+        return self.read_end
+
+    def read_all(self):
+        self.reads += 1
+        try:
+            data = os.read(self.read_end, 1024)
+        except BlockingIOError:
+            data = b""
+        return np.array([[float(byte), 0.0] for byte in data]).reshape(-1, 2)
+
+    def close(self):
+        os.close(self.read_end)
+        os.close(self.write_end)
+
+
+class PipeMiniTars(FakeMiniTars):
+    def __init__(self):
+        super().__init__()
+        self.read_end, self.write_end = os.pipe()
+
+    def fileno(self):
+        return self.read_end
+
+    def close(self):
+        os.close(self.read_end)
+        os.close(self.write_end)
+
+
+def test_the_worker_sleeps_until_a_port_has_input():
+    tars, minitars = PipeTars(), PipeMiniTars()
+    arrived = threading.Event()
+    acquisition = Acquisition(tars, minitars, FakeClock())
+    acquisition.on_data = arrived.set
+
+    acquisition.start()
+    try:
+        time.sleep(0.2)
+        assert tars.reads <= 3  # Not polling while the port is quiet
+        os.write(tars.write_end, b"\x07")
+        assert arrived.wait(timeout=5.0)
+        (block,) = acquisition.drain()
+    finally:
+        acquisition.stop()
+        tars.close()
+        minitars.close()
+
+    assert block.scans.tolist() == [[7.0, 0.0]]
+
+
+def test_on_data_is_called_once_until_the_consumer_drains():
+    calls = []
+    acquisition = Acquisition(
+        FakeTars(np.array([[1.0, 2.0]]), np.array([[3.0, 4.0]]), np.empty((0, 2)), np.array([[5.0, 6.0]])),
+        FakeMiniTars(),
+        FakeClock(),
+    )
+    acquisition.on_data = lambda: calls.append(len(acquisition.ring))
+
+    acquisition.poll()
+    acquisition.poll()
+    assert calls == [1]
+
+    acquisition.drain()
+    acquisition.poll()
+    assert calls == [1, 1]
+
+
+class SimulatedMiniTars(FakeMiniTars):
+    """A declinometer that isn't there: MiniTars makes a reading up every read."""
+
+    testing = True
+
+    def read_latest(self):
+        return 30.0
+
+
+def test_a_simulated_device_does_not_spin_the_worker_or_crowd_out_real_scans():
+    tars = PipeTars()
+    acquisition = Acquisition(tars, SimulatedMiniTars(), FakeClock(), capacity=64)
+
+    acquisition.start()
+    try:
+        for byte in range(20):
+            os.write(tars.write_end, bytes([byte]))
+            time.sleep(0.01)
+        time.sleep(0.05)
+        acquisition.stop()
+        reads = tars.reads
+        blocks = acquisition.ring.drain()
+    finally:
+        acquisition.stop()
+        tars.close()
+
+    # Woken by the real DAQ (or its MAX_WAIT), not passing as fast as it can
+    assert reads < 100
+    scans = np.concatenate([block.scans for block in blocks])
+    assert scans[:, 0].tolist() == [float(byte) for byte in range(20)]
+    assert acquisition.ring.dropped == 0
@@ -1,10 +1,14 @@
+import time
 from unittest.mock import patch
 
-from _tools.superclock import SIDEREAL, SuperClock
+import numpy as np
+import pytest
+
+from _tools.superclock import SIDEREAL, SIDEREAL_DAY_SECONDS, SuperClock, closed_form_sidereal_seconds
 
 
 def test_sidereal_wraparound():
-    clock = SuperClock()
+    clock = SuperClock(load_astropy=False)
     with patch.object(clock, "propagation_anchor_sidereal_seconds", 86399.0), patch(
         "_tools.superclock.time.monotonic", return_value=clock.propagation_anchor_monotonic + 2.0
     ):
@@ -13,7 +17,7 @@ def test_sidereal_wraparound():
 
 
 def test_monotonic_progression_math():
-    clock = SuperClock()
+    clock = SuperClock(load_astropy=False)
     clock.propagation_anchor_sidereal_seconds = 1000.0
     clock.propagation_anchor_monotonic = 50.0
     with patch("_tools.superclock.time.monotonic", return_value=55.0):
@@ -22,7 +26,7 @@ def test_monotonic_progression_math():
 
 
 def test_manual_calibration_offset_preserved_on_resync():
-    clock = SuperClock()
+    clock = SuperClock(load_astropy=False)
     with patch.object(clock, "_sidereal_seconds_from_astropy", return_value=100.0), patch(
         "_tools.superclock.time.time", return_value=1000.0
     ), patch("_tools.superclock.time.monotonic", return_value=500.0):
@@ -38,10 +42,202 @@ def test_manual_calibration_offset_preserved_on_resync():
     assert abs(clock.propagation_anchor_sidereal_seconds - 260.0) < 1e-6
 
 
+def test_a_calibration_records_how_far_it_stepped_the_timeline():
+    clock = SuperClock(load_astropy=False)
+    assert clock.steps == []  # Setting the clock at startup is not a step
+
+    with patch.object(clock, "_sidereal_seconds_from_astropy", return_value=1000.0), patch(
+        "_tools.superclock.time.time", return_value=1000.0
+    ), patch("_tools.superclock.time.monotonic", return_value=500.0):
+        clock.calibrate_sidereal_time(1000.0)
+        before = clock.monotonic_to_timeline(500.0)
+        clock.calibrate_sidereal_time(970.0)  # Thirty seconds back
+        after = clock.monotonic_to_timeline(500.0)
+
+    assert after - before == pytest.approx(-30.0)
+    assert clock.steps[-1] == pytest.approx(-30.0)
+    assert len(clock.steps) == 2
+
+
 def test_ra_to_epoch_time_conversion():
-    clock = SuperClock()
+    clock = SuperClock(load_astropy=False)
     with patch.object(clock, "get_sidereal_seconds", return_value=1000.0), patch(
         "_tools.superclock.time.time", return_value=2000.0
     ):
         epoch = clock.ra_to_epoch_time(1100.0)
     assert abs(epoch - (2000.0 + SuperClock.sidereal_to_solar(100.0))) < 1e-6
+
+
+def test_monotonic_to_sidereal_converts_arrays_and_wraps_each_element():
+    clock = SuperClock(load_astropy=False)
+    clock.propagation_anchor_sidereal_seconds = 86399.0
+    clock.propagation_anchor_monotonic = 50.0
+
+    values = clock.monotonic_to_sidereal(np.array([50.0, 50.5, 51.0]))
+
+    assert values[0] == 86399.0
+    assert abs(values[1] - (86399.0 + 0.5 * SIDEREAL)) < 1e-6
+    assert abs(values[2] - (SIDEREAL - 1.0)) < 1e-6  # Past midnight
+
+
+def test_closed_form_agrees_with_astropy_to_about_a_second():
+    clock = SuperClock(load_astropy=False)
+    # Recent years, and J2000 itself
+    for epoch_time in (1_760_000_000.0, 1_600_000_000.0, 1_700_000_000.0, 946_728_000.0):
+        error = closed_form_sidereal_seconds(epoch_time) - clock._sidereal_seconds_from_astropy(
+            epoch_time
+        )
+        error = (error + SIDEREAL_DAY_SECONDS / 2) % SIDEREAL_DAY_SECONDS - SIDEREAL_DAY_SECONDS / 2
+        assert abs(error) < 1.0
+
+
+def test_closed_form_converts_arrays():
+    epoch_times = np.array([1_760_000_000.0, 1_760_000_100.0])
+
+    values = closed_form_sidereal_seconds(epoch_times)
+
+    assert values[0] == closed_form_sidereal_seconds(epoch_times[0])
+    assert abs(values[1] - values[0] - 100.0 * SIDEREAL) < 1e-3
+
+
+def test_slewing_onto_a_correction_never_goes_backwards():
+    clock = SuperClock(load_astropy=False)
+    clock.propagation_anchor_sidereal_seconds = 1000.0
+    clock.propagation_anchor_monotonic = 50.0
+    with patch("_tools.superclock.time.monotonic", return_value=50.0):
+        clock._slew_to(50.0, 998.0)  # Two seconds behind
+
+    readings = clock.monotonic_to_sidereal(np.linspace(50.0, 60.0, 1001))
+
+    assert (np.diff(readings) > 0).all()
+    assert readings[0] == 1000.0
+    # Four seconds at half a second per second to lose the two
+    assert abs(clock.monotonic_to_sidereal(54.0) - (998.0 + 4.0 * SIDEREAL)) < 1e-6
+    assert abs(clock.monotonic_to_sidereal(60.0) - (998.0 + 10.0 * SIDEREAL)) < 1e-6
+
+
+def test_astropy_loads_in_the_background_and_the_clock_slews_onto_it():
+    clock = SuperClock()
+    assert clock.astropy_loaded.wait(timeout=60)
+    assert clock.astropy_error is None
+
+    time.sleep(clock.slew_duration)  # Less than two seconds: both are good to one
+    now = clock.get_time()
+    error = clock.get_sidereal_seconds() - clock._sidereal_seconds_from_astropy(now)
+    error = (error + SIDEREAL_DAY_SECONDS / 2) % SIDEREAL_DAY_SECONDS - SIDEREAL_DAY_SECONDS / 2
+    assert abs(error) < 0.05
+
+
+def test_a_requested_resync_slews_in_the_background_and_reports_it():
+    clock = SuperClock(load_astropy=False)
+    with patch.object(clock, "_sidereal_seconds_from_astropy", side_effect=lambda epoch: 1000.0):
+        clock.propagation_anchor_sidereal_seconds = 1000.0
+        clock.propagation_anchor_monotonic = time.monotonic()
+        clock.propagation_anchor_monotonic -= 2.0 / SIDEREAL  # Two seconds fast
+        clock.request_resync()
+        assert clock.resynced.wait(timeout=10)
+
+    assert clock.resyncs == 1
+    assert clock.last_correction == pytest.approx(-2.0, abs=0.05)
+    assert clock.last_compute_seconds >= 0.0
+    assert clock.slew_rate == -SuperClock.MAX_SLEW_RATE  # Not a step
+
+
+def test_resyncs_reuse_one_earth_location():
+    clock = SuperClock(load_astropy=False)
+    clock.resync_from_astropy()
+    location = clock.location
+    clock.resync_from_astropy()
+
+    assert location is not None
+    assert clock.location is location
+
+
+# - MARK: batch conversion
+
+
+def test_epoch_to_sidereal_agrees_with_the_live_clock():
+    clock = SuperClock(load_astropy=False)
+    now = time.time()
+
+    assert clock.epoch_to_sidereal(now) == pytest.approx(clock.get_sidereal_seconds(), abs=0.01)
+
+
+def test_live_epoch_conversion_round_trips_arrays():
+    clock = SuperClock(load_astropy=False)
+    epoch_times = time.time() + np.linspace(-3 * 86400, 3 * 86400, 1001)
+
+    days, seconds = clock.epoch_to_sidereal_days(epoch_times)
+
+    assert ((0.0 <= seconds) & (seconds < SIDEREAL_DAY_SECONDS)).all()
+    assert np.diff(days).min() >= 0 and days[-1] - days[0] in (6, 7)
+    np.testing.assert_allclose(clock.sidereal_to_epoch(days, seconds), epoch_times, rtol=0, atol=1e-5)
+
+
+def test_the_day_count_turns_over_at_sidereal_midnight():
+    clock = SuperClock(load_astropy=False)
+    clock.propagation_anchor_sidereal_seconds = 86399.0
+    start = clock.propagation_anchor_epoch_time
+
+    days, seconds = clock.epoch_to_sidereal_days(np.array([start, start + 2.0]))
+
+    assert days[1] == days[0] + 1
+    assert seconds[1] == pytest.approx(2.0 * SIDEREAL - 1.0)
+
+
+def test_live_inverse_follows_a_slew():
+    clock = SuperClock(load_astropy=False)
+    with patch("_tools.superclock.time.monotonic", return_value=clock.propagation_anchor_monotonic):
+        clock._slew_to(clock.propagation_anchor_monotonic, clock.propagation_anchor_sidereal_seconds - 2.0)
+    epoch_times = clock.propagation_anchor_epoch_time + np.linspace(-5.0, 10.0, 151)
+
+    days, seconds = clock.epoch_to_sidereal_days(epoch_times)
+
+    np.testing.assert_allclose(clock.sidereal_to_epoch(days, seconds), epoch_times, rtol=0, atol=1e-6)
+
+
+def test_offline_conversion_is_astropy_in_one_call():
+    clock = SuperClock(load_astropy=False)
+    clock.manual_sidereal_offset_seconds = 60.0
+    epoch_times = np.array([1_600_000_000.0, 1_700_000_000.0, 1_760_000_000.0])
+
+    days, seconds = clock.epoch_to_sidereal_days(epoch_times, offline=True)
+
+    for epoch_time, value in zip(epoch_times, seconds):
+        expected = (clock._sidereal_seconds_from_astropy(epoch_time) + 60.0) % SIDEREAL_DAY_SECONDS
+        assert value == pytest.approx(expected, abs=1e-6)
+    np.testing.assert_allclose(
+        clock.sidereal_to_epoch(days, seconds, offline=True), epoch_times, rtol=0, atol=1e-4
+    )
+
+
+# - MARK: sidereal timeline
+
+
+def test_the_timeline_runs_on_through_sidereal_midnight():
+    clock = SuperClock(load_astropy=False)
+    clock.propagation_anchor_sidereal_seconds = 86399.0
+    clock.propagation_anchor_monotonic = 50.0
+    day = clock.propagation_anchor_day
+
+    timeline = clock.monotonic_to_timeline(np.array([50.0, 51.0, 52.0]))
+
+    assert (np.diff(timeline) > 0).all()
+    days, seconds = SuperClock.split_timeline(timeline)
+    assert list(days) == [day, day + 1, day + 1]
+    np.testing.assert_allclose(
+        seconds, clock.monotonic_to_sidereal(np.array([50.0, 51.0, 52.0])), rtol=0, atol=1e-6
+    )
+
+
+def test_slewing_across_midnight_keeps_the_timeline_continuous():
+    clock = SuperClock(load_astropy=False)
+    now = time.monotonic()
+    clock.propagation_anchor_monotonic = now - 2.0
+    clock.propagation_anchor_sidereal_seconds = SIDEREAL_DAY_SECONDS - 1.0
+    before = clock.monotonic_to_timeline(now)
+
+    clock._slew_to(now, 5.0)  # Past midnight now, whatever the slew's aim
+
+    assert clock.propagation_anchor_sidereal_seconds < 5.0
+    assert clock.monotonic_to_timeline(now) == pytest.approx(before, abs=0.01)
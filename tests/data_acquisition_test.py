@@ -1,5 +1,8 @@
 import os
 
+import numpy as np
+import pytest
+
 os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
 
 try:
@@ -7,6 +10,11 @@ try:
 except ImportError:
     from threepio import Threepio  # type: ignore[attr-defined,no-redef]
 
+from _tools.acquisition import Acquisition
+from _tools.decimator import Decimator
+from _tools.dectrack import DecTrack
+from _tools.stripchart import StripchartBuffer, StripchartHistory
+from _tools.superclock import GB_LATITUDE
 from _tools.tars import SignalDatum
 
 
@@ -22,12 +30,20 @@ class FakeDevice:
     def read_all(self):
         """A reading of None stands for 'nothing arrived this tick'."""
         reading = self.readings.pop(0)
-        return [] if reading is None else [reading]
+        if reading is None:
+            return np.empty((0, 2))
+        return np.array([[reading.a, reading.b]])
+
+    def scan_times(self, count):
+        """Scans 10 ms apart, the last taken at monotonic 50.0."""
+        return 50.0 - self.sample_period * np.arange(count - 1, -1, -1)
 
 
 class FakeClock:
+    steps: list[float] = []  # Never stepped
+
     @staticmethod
-    def get_sidereal_seconds():
+    def get_sidereal_timeline():
         return 123.0
 
     @staticmethod
@@ -35,8 +51,27 @@ class FakeClock:
         return 1000.0
 
     @staticmethod
-    def solar_to_sidereal(solar_seconds):
-        return solar_seconds
+    def monotonic_to_timeline(monotonic_time):
+        return monotonic_time + 73.0
+
+
+class SteppedClock:
+    """A clock 73 s ahead of time.monotonic() until it is stepped."""
+
+    def __init__(self):
+        self.offset = 73.0
+        self.steps: list[float] = []
+
+    def step(self, seconds):
+        self.offset += seconds
+        self.steps.append(seconds)
+
+    def monotonic_to_timeline(self, monotonic_time):
+        return monotonic_time + self.offset
+
+    @staticmethod
+    def get_time():
+        return 1000.0
 
 
 class FakeDecCalc:
@@ -56,6 +91,9 @@ class FakeThreepio:
 
     tick = Threepio.tick
     record_samples = Threepio.record_samples
+    follow_clock_steps = Threepio.follow_clock_steps
+    onto_timeline = Threepio.onto_timeline
+    DEC_VIEW_THRESHOLD = Threepio.DEC_VIEW_THRESHOLD
 
     def __init__(self, tars_readings, dec_readings, current_dec=12.0, obs=None):
         self.tars = FakeDevice(*tars_readings)
@@ -63,17 +101,26 @@ class FakeThreepio:
         self.clock = FakeClock()
         self.dec_calc = FakeDecCalc()
         self.scheduler = FakeScheduler()
+        # No thread is started, so every tick's drain() reads inline.
+        self.acquisition = Acquisition(self.tars, self.minitars, self.clock)
         self.obs = obs
         self.current_dec = current_dec
+        self.dec_view_angle = current_dec - GB_LATITUDE
         self.current_data_point = None
+        self.dec_track = DecTrack()
+        self.decimator = Decimator()
+        self.stripchart_buffer = StripchartBuffer()
+        self.stripchart_history = StripchartHistory()
+        self.stripchart_view = None
+        self.clock_steps = 0
         self.data = []
-        self.ticks_since_last_fps_update = 0
+        self.ticks_scheduled = 0
 
-    def update_stripchart(self):
+    def schedule_render(self, *views):
         pass
 
-    def update_dec_view(self):
-        pass
+    def schedule_tick(self):
+        self.ticks_scheduled += 1
 
 
 def test_dataq_reading_is_kept_when_declinometer_is_silent():
@@ -87,25 +134,43 @@ def test_dataq_reading_is_kept_when_declinometer_is_silent():
     assert app.current_data_point.dec == 12.0
 
 
-def test_a_batch_of_scans_is_kept_whole_with_spaced_timestamps():
-    """A tick that finds several scans queued must keep them all, and must not
-    stamp them with the same RA -- at the pulsar data rate that is the signal.
-
-    The offsets come from the DAQ's scan interval, so overstating that interval
-    back-dates a batch past the end of the previous one and the recorded
-    timestamps stop increasing."""
+def test_a_batch_of_scans_is_kept_whole_with_its_own_timestamps():
+    """A tick that finds several scans queued must keep them all, each stamped
+    with the time it was taken rather than the time the batch was read -- at
+    the pulsar data rate that is the signal."""
     app = FakeThreepio([None], [None])
     app.tars.readings = []
 
     app.record_samples(
-        [SignalDatum(1.0, 1.5), SignalDatum(2.0, 2.5), SignalDatum(3.0, 3.5)],
-        sidereal_timestamp=123.0,
+        np.array([[1.0, 1.5], [2.0, 2.5], [3.0, 3.5]]),
+        np.array([122.98, 122.99, 123.0]),
     )
 
     assert [point.a for point in app.data] == [1.0, 2.0, 3.0]
     assert [point.timestamp for point in app.data] == [122.98, 122.99, 123.0]
 
 
+def test_tick_stamps_scans_from_the_daq_clock():
+    app = FakeThreepio([SignalDatum(8.0, -0.01)], [None])
+
+    app.tick()
+
+    assert app.current_data_point.timestamp == 123.0  # Sidereal at monotonic 50
+
+
+def test_a_tick_that_raises_still_schedules_the_next():
+    app = FakeThreepio([SignalDatum(8.0, -0.01)], [None])
+
+    def fail():
+        raise RuntimeError("callback failed")
+
+    app.scheduler.run_timers = fail
+    with pytest.raises(RuntimeError):
+        app.tick()
+
+    assert app.ticks_scheduled == 1
+
+
 def test_latest_declination_is_reused_on_a_later_dataq_tick():
     app = FakeThreepio([None, SignalDatum(3.0, 4.0)], [41.0, None])
 
@@ -114,3 +179,55 @@ def test_latest_declination_is_reused_on_a_later_dataq_tick():
 
     assert len(app.data) == 1
     assert app.current_data_point.dec == 42.0
+
+
+def test_every_scan_reaches_the_decimator():
+    app = FakeThreepio([None], [None])
+
+    app.record_samples(
+        np.array([[1.0, 1.5], [2.0, 2.5], [3.0, 3.5]]),
+        np.array([122.98, 122.99, 123.0]),
+    )
+    app.record_samples(np.array([[6.0, 0.5]]), np.array([123.01]))
+
+    point = app.decimator.emit()
+    assert point.count == 4
+    assert point.a == 3.0
+    assert (point.a_min, point.a_max) == (1.0, 6.0)
+    assert point.timestamp == 122.995  # Midway between 122.98 and 123.01
+    assert point.dec == 12.0
+
+
+def test_each_scan_gets_the_declination_at_the_time_it_was_taken():
+    app = FakeThreepio([None], [None])
+    app.dec_track.add(122.9, 10.0)
+    app.dec_track.add(123.0, 11.0)
+
+    app.record_samples(
+        np.array([[1.0, 1.5], [2.0, 2.5], [3.0, 3.5]]),
+        np.array([122.95, 123.0, 123.05]),
+    )
+
+    assert [point.dec for point in app.data] == pytest.approx([10.5, 11.0, 11.5])
+    assert app.decimator.emit().dec == pytest.approx(11.0)
+
+
+def test_setting_the_clock_back_moves_the_stripchart_back_with_it():
+    """A calibration that steps the clock back must not leave the samples after
+    it stamped before the ones already in the stripchart, whether they were
+    stamped before the step or after it."""
+    app = FakeThreepio([SignalDatum(1.0, 1.0), SignalDatum(2.0, 2.0), SignalDatum(3.0, 3.0)], [None] * 3)
+    app.clock = app.acquisition.clock = SteppedClock()
+    app.dec_track.add(122.0, 10.0)
+    app.tick()  # At 123 on the timeline
+    app.acquisition.poll()  # Stamped at 123 too, but not drained yet
+
+    app.clock.step(-30.0)
+    app.tick()  # The queued block, then one stamped at 93
+
+    times = app.stripchart_buffer.data[0, : len(app.stripchart_buffer)]
+    assert times.tolist() == [93.0, 93.0, 93.0]
+    assert list(app.dec_track.times) == [92.0]
+    (times_a, a), _ = app.stripchart_buffer.window(93.0 - 8)
+    assert sorted(set(a.tolist())) == [1.0, 2.0, 3.0]
+    assert list(times_a) == sorted(times_a)
@@ -1,4 +1,7 @@
-from _tools.deccalc import DecCalc
+import numpy as np
+import pytest
+
+from _tools.deccalc import LINEAR, PCHIP, DecCalc
 
 # The values from a real calibration (dec-cal.txt at fc8a2c8): the inclinometer
 # was mounted so raw readings fall as dec rises. Non-uniform spacing matters —
@@ -10,10 +13,10 @@ DESCENDING_X = [
 ]
 
 
-def load_calc(tmp_path, monkeypatch, x_values) -> DecCalc:
+def load_calc(tmp_path, monkeypatch, x_values, model=None) -> DecCalc:
     monkeypatch.chdir(tmp_path)
     (tmp_path / "dec-cal.txt").write_text("".join(f"{x}\n" for x in x_values))
-    calc = DecCalc()
+    calc = DecCalc(model)
     calc.load_dec_cal()
     return calc
 
@@ -48,3 +51,88 @@ def test_extrapolates_beyond_table_ends(tmp_path, monkeypatch):
     # and beyond the high-x end is below -25 dec.
     assert calc.calculate_declination(-10.0) > 100.0
     assert calc.calculate_declination(75.0) < -25.0
+
+
+def test_extrapolation_extends_the_end_segments(tmp_path, monkeypatch):
+    calc = load_calc(tmp_path, monkeypatch, DESCENDING_X)
+    decs = DecCalc.get_dec_list()
+    # Ascending x: the low end is the last two calibration points
+    low_slope = (decs[-1] - decs[-2]) / (DESCENDING_X[-1] - DESCENDING_X[-2])
+    high_slope = (decs[1] - decs[0]) / (DESCENDING_X[1] - DESCENDING_X[0])
+
+    assert calc.calculate_declination(-10.0) == pytest.approx(
+        decs[-1] + low_slope * (-10.0 - DESCENDING_X[-1])
+    )
+    assert calc.calculate_declination(75.0) == pytest.approx(
+        decs[0] + high_slope * (75.0 - DESCENDING_X[0])
+    )
+
+
+def test_array_conversion_matches_one_at_a_time(tmp_path, monkeypatch):
+    calc = load_calc(tmp_path, monkeypatch, DESCENDING_X)
+    raw = np.concatenate([np.linspace(-20.0, 80.0, 1001), DESCENDING_X])
+
+    decs = calc.calculate_declinations(raw)
+
+    assert decs.shape == raw.shape
+    assert decs.tolist() == pytest.approx([calc.calculate_declination(x) for x in raw], abs=1e-12)
+
+
+# - MARK: PCHIP
+
+
+def test_pchip_passes_through_every_calibration_point(tmp_path, monkeypatch):
+    calc = load_calc(tmp_path, monkeypatch, DESCENDING_X, model=PCHIP)
+
+    decs = calc.calculate_declinations(np.array(DESCENDING_X))
+
+    assert decs.tolist() == pytest.approx(DecCalc.get_dec_list(), abs=1e-3)
+
+
+def test_pchip_has_no_kinks_at_the_calibration_points(tmp_path, monkeypatch):
+    linear = load_calc(tmp_path, monkeypatch, DESCENDING_X)
+    pchip = load_calc(tmp_path, monkeypatch, DESCENDING_X, model=PCHIP)
+    step = 0.05
+
+    def kink(calc, x):
+        left = (calc.calculate_declination(x) - calc.calculate_declination(x - step)) / step
+        right = (calc.calculate_declination(x + step) - calc.calculate_declination(x)) / step
+        return abs(right - left)
+
+    # The interior point where the linear table's slope changes most
+    x = max(DESCENDING_X[1:-1], key=lambda x: kink(linear, x))
+    assert kink(pchip, x) < kink(linear, x) / 10
+
+
+def test_pchip_is_monotone_and_extrapolates_like_the_linear_table(tmp_path, monkeypatch):
+    linear = load_calc(tmp_path, monkeypatch, DESCENDING_X)
+    pchip = load_calc(tmp_path, monkeypatch, DESCENDING_X, model=PCHIP)
+    raw = np.linspace(-20.0, 80.0, 2001)
+
+    decs = pchip.calculate_declinations(raw)
+
+    assert (np.diff(decs) < 0).all()
+    for x in (-15.0, -8.0, 70.0, 80.0):
+        assert pchip.calculate_declination(x) == pytest.approx(linear.calculate_declination(x))
+
+
+def test_pchip_array_lookup_matches_one_at_a_time(tmp_path, monkeypatch):
+    calc = load_calc(tmp_path, monkeypatch, DESCENDING_X, model=PCHIP)
+    raw = np.linspace(-20.0, 80.0, 1001)
+
+    expected = [calc.calculate_declination(x) for x in raw]
+    assert calc.calculate_declinations(raw).tolist() == pytest.approx(expected, abs=1e-12)
+
+
+@pytest.mark.parametrize("model", [LINEAR, PCHIP])
+def test_residuals_point_at_a_misread_calibration_point(tmp_path, monkeypatch, model):
+    # A smooth calibration, with one reading taken 2 degrees off
+    x_values = [50.0 - 0.6 * dec - 0.002 * dec**2 for dec in DecCalc.get_dec_list()]
+    x_values[10] += 2.0
+    calc = load_calc(tmp_path, monkeypatch, x_values, model=model)
+
+    worst = int(np.nanargmax(np.abs(calc.residuals)))
+
+    assert calc.y[worst] == 25.0
+    assert np.isnan(calc.residuals[[0, -1]]).all()  # Ends would be extrapolated
+    assert "at 25°" in calc.describe_fit()
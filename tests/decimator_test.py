@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from tools import DataPoint, Decimator, DecimatedPoint
+
+
+def test_nothing_added_emits_nothing():
+    assert Decimator().emit() is None
+
+
+def test_emit_summarizes_every_block_since_the_last():
+    decimator = Decimator()
+    decimator.add(np.array([[1.0, -1.0], [3.0, -2.0]]), 10.0, 10.01, dec=30.0)
+    decimator.add(np.empty((0, 2)), 10.02, 10.02, dec=31.0)  # Ignored entirely
+    decimator.add(np.array([[2.0, -6.0]]), 10.02, 10.02, dec=30.5)
+
+    point = decimator.emit()
+
+    assert isinstance(point, DataPoint)  # Observations can record it as-is
+    assert point == DecimatedPoint(
+        timestamp=10.01,
+        dec=pytest.approx((30.0 * 2 + 30.5) / 3),  # Each scan weighs the same
+        a=2.0,
+        b=-3.0,
+        count=3,
+        a_min=1.0,
+        a_max=3.0,
+        b_min=-6.0,
+        b_max=-1.0,
+    )
+
+
+def test_emit_starts_a_new_period():
+    decimator = Decimator()
+    decimator.add(np.array([[100.0, 100.0]]), 1.0, 1.0, dec=0.0)
+    decimator.emit()
+
+    assert decimator.emit() is None
+
+    decimator.add(np.array([[1.0, 2.0], [3.0, 4.0]]), 2.0, 2.01, dec=0.0)
+    point = decimator.emit()
+    assert point.count == 2
+    assert (point.a, point.a_max, point.b_min) == (2.0, 3.0, 2.0)
+    assert point.timestamp == pytest.approx(2.005)
+
+
+def test_a_declination_per_scan_is_averaged():
+    decimator = Decimator()
+    decimator.add(np.zeros((3, 2)), 0.0, 0.02, dec=np.array([10.0, 11.0, 15.0]))
+
+    assert decimator.emit().dec == 12.0
@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from tools import DecTrack
+from _tools.superclock import SIDEREAL_DAY_SECONDS
+
+
+def _track(*readings):
+    track = DecTrack()
+    for timestamp, dec in readings:
+        track.add(timestamp, dec)
+    return track
+
+
+def test_between_readings_is_interpolated():
+    track = _track((10.0, 20.0), (10.1, 21.0), (10.2, 23.0))
+
+    assert track.at(np.array([10.05, 10.1, 10.15])) == pytest.approx([20.5, 21.0, 22.0])
+
+
+def test_past_the_newest_reading_is_extrapolated_up_to_the_horizon():
+    track = _track((10.0, 20.0), (10.1, 21.0))
+    horizon = DecTrack.HORIZON
+
+    decs = track.at(np.array([10.15, 10.1 + horizon, 10.1 + 10 * horizon]))
+
+    assert decs == pytest.approx([21.5, 21.0 + 10 * horizon, 21.0 + 10 * horizon])
+
+
+def test_before_the_oldest_reading_is_held():
+    track = _track((10.0, 20.0), (10.1, 21.0))
+
+    assert track.at(np.array([9.0])) == pytest.approx([20.0])
+
+
+def test_a_single_reading_stands_for_every_time():
+    track = _track((10.0, 20.0))
+
+    assert track.at(np.array([9.0, 10.0, 11.0])) == pytest.approx([20.0, 20.0, 20.0])
+
+
+def test_a_track_spanning_sidereal_midnight_stays_in_order():
+    midnight = 9814 * SIDEREAL_DAY_SECONDS  # On the timeline, in 2026
+    track = _track((midnight - 0.05, 20.0), (midnight + 0.05, 21.0))
+
+    assert track.at(np.array([midnight, midnight + 0.1])) == pytest.approx([20.5, 21.5])
+
+
+def test_only_the_last_window_of_readings_is_kept():
+    track = DecTrack(window=2)
+    for i in range(5):
+        track.add(float(i), float(i))
+
+    assert len(track) == 2
+    assert track.at(np.array([0.0])) == pytest.approx([3.0])
@@ -0,0 +1,162 @@
+import os
+import struct
+import threading
+import time
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from _tools.devsim import Faults, PtyDevice, SimulatedDI4108, SimulatedSolar360, serve
+import _tools.minitars as minitars
+from _tools.minitars import MiniTars
+from _tools.tars import Tars, decode_scans, slist_word
+
+
+class FakeParent:
+    def __init__(self):
+        self.logged = []
+
+    def log(self, message, allow_dups=False, warning=False):
+        self.logged.append((message, warning))
+
+
+# - MARK: DI-4108
+
+
+def test_daq_echoes_commands_and_reports_its_model():
+    daq = SimulatedDI4108()
+    daq.receive(b"info 1\rslist 0 0\rsrate 1200\r", now=0.0)
+
+    assert daq.output(0.0) == b"info 1 4108\rslist 0 0\rsrate 1200\r"
+    assert daq.srate == 1200
+
+
+def test_daq_stalls_on_stop_and_swallows_what_is_sent_meanwhile():
+    daq = SimulatedDI4108(stall=1.0)
+    daq.receive(b"stop\rps 0\r", now=0.0)
+
+    assert daq.output(0.5) == b""
+    assert daq.output(1.0) == b"stop\r"
+    assert daq.swallowed == 1
+
+    daq.receive(b"ps 0\r", now=1.0)
+    assert daq.output(1.0) == b"ps 0\r"
+
+
+def test_daq_scans_at_its_configured_rate_in_whole_packets():
+    daq = SimulatedDI4108(seed=1)
+    words = [slist_word(0), slist_word(1)]
+    commands = [f"slist {i} {word}" for i, word in enumerate(words)]
+    commands += ["ps 1", "dec 50", "srate 1200", "start"]
+    daq.receive("".join(command + "\r" for command in commands).encode(), now=0.0)
+    daq.output(0.0)  # The echoes
+
+    data = daq.output(1.0)
+
+    assert len(data) % 32 == 0  # ps 1
+    scans = decode_scans(bytearray(data), words)
+    assert len(scans) == pytest.approx(1000, abs=8)  # 1 kHz, less a partial packet
+    assert np.all(np.abs(scans - 1.0) < 0.6)
+
+
+def test_speed_multiplies_the_scan_rate():
+    daq = SimulatedDI4108(speed=10)
+    daq.receive(b"start\r", now=0.0)
+
+    assert len(daq.output(1.0)) == pytest.approx(1000 * 2, abs=16)  # 1 channel
+
+
+# - MARK: SOLAR-360
+
+
+def test_declinometer_is_silent_until_continuous_output_is_started():
+    dec = SimulatedSolar360(interval_ms=100)
+    assert dec.output(5.0) == b""
+
+    dec.receive(b"setcasc", now=5.0)
+    data = dec.output(5.35)
+
+    assert data.startswith(b"OK")
+    frames = data[2:].split(b"\r")[:-1]
+    assert len(frames) == 4  # 5.0, 5.1, 5.2, 5.3
+    assert all(MiniTars._parse(frame + b"\r") is not None for frame in frames)
+
+
+def test_declinometer_answers_queries_and_sets_its_interval():
+    dec = SimulatedSolar360()
+    dec.receive(b"gettempstr0050", now=0.0)
+
+    assert dec.output(0.0) == b"+28.1\rOK"
+    assert dec.interval_ms == 50
+
+
+def test_declinometer_streams_int32_angles_after_setoint():
+    dec = SimulatedSolar360(interval_ms=50, seed=0)
+    dec.receive(b"setointsetcasc", now=0.0)
+    data = dec.output(0.12)
+
+    assert data.startswith(b"OKOK")
+    frames = data[4:]
+    assert len(frames) == 3 * 4  # 0.0, 0.05, 0.10
+    assert MiniTars._find_sync(frames) == 0
+    assert struct.unpack(">i", frames[:4])[0] == pytest.approx(40_000, abs=20)
+
+
+def test_declinometer_drops_a_command_interrupted_by_silence():
+    dec = SimulatedSolar360()
+    dec.receive(b"gett", now=0.0)
+    dec.receive(b"gettemp", now=0.5)
+
+    assert dec.output(0.5) == b"+28.1\r"
+
+
+# - MARK: faults
+
+
+def test_faults_drop_and_splice_bytes():
+    assert Faults(drop=1.0).apply(b"abcdef") == b""
+
+    faults = Faults(garbage=1.0, seed=3)
+    data = faults.apply(b"abcdef")
+    assert len(data) == 6 + faults.injected
+
+
+def test_a_burst_holds_output_back():
+    faults = Faults(burst=1.0, burst_seconds=0.2, seed=0)
+    assert faults.holding(0.0)
+    faults.burst = 0.0
+    assert faults.holding(0.1)
+    assert not faults.holding(0.2)
+
+
+# - MARK: over a pty
+
+
+@pytest.mark.skipif(not hasattr(os, "openpty"), reason="needs ptys")
+@pytest.mark.parametrize("binary", [False, True])
+def test_tars_and_minitars_run_against_the_simulator(binary):
+    daq = PtyDevice(SimulatedDI4108(stall=0.05, seed=0))
+    dec = PtyDevice(SimulatedSolar360(interval_ms=50, streaming=True, seed=0))
+    stop = threading.Event()
+    server = threading.Thread(target=serve, args=([daq, dec],), kwargs={"stop": stop})
+    server.start()
+    try:
+        parent = FakeParent()
+        tars = Tars(parent, device=daq.path)
+        assert tars.configured, parent.logged
+        tars.start()
+
+        dec_tars = MiniTars(parent, device=dec.path)
+        with patch.object(minitars, "PREFER_BINARY", binary):
+            assert dec_tars.handshake(), parent.logged
+        assert dec_tars.binary == binary
+
+        time.sleep(0.3)
+        assert len(tars.read_all()) > 10
+        assert dec_tars.read_latest() is not None
+    finally:
+        stop.set()
+        server.join()
+        daq.close()
+        dec.close()
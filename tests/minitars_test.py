@@ -0,0 +1,196 @@
+import struct
+from unittest.mock import patch
+
+import pytest
+
+import _tools.minitars as minitars
+from _tools.minitars import MiniTars
+
+
+class FakeParent:
+    def __init__(self):
+        self.messages = []
+
+    def log(self, message, allow_dups=False, warning=False):
+        self.messages.append(message)
+
+
+class FakeSerial:
+    """
+    A SOLAR-360 port whose input arrives in whatever pieces a test feeds it.
+    Reads never wait: asking for more than is waiting returns what there is,
+    as a port with nothing left to time out on would.
+    """
+
+    is_open = True
+    bytesize, parity, stopbits = 8, "N", 1
+
+    def __init__(self, device, baudrate=9600, timeout=None):
+        self.baudrate, self.timeout = baudrate, timeout
+        self.buffer = bytearray()
+        self.reads = []
+
+    def feed(self, data: bytes):
+        self.buffer += data
+
+    @property
+    def in_waiting(self):
+        return len(self.buffer)
+
+    def read(self, size=1):
+        self.reads.append(size)
+        chunk = bytes(self.buffer[:size])
+        del self.buffer[:size]
+        return chunk
+
+    def read_until(self, expected=b"\n", size=None):
+        raise AssertionError("read_until can block for the port's whole timeout")
+
+    def reset_input_buffer(self):
+        self.buffer.clear()
+
+
+def _minitars():
+    with patch.object(minitars, "MySerial", FakeSerial):
+        dec = MiniTars(FakeParent(), device="/dev/fake")
+    return dec, dec.ser
+
+
+def test_read_latest_returns_the_newest_of_several_frames_in_one_read():
+    dec, serial = _minitars()
+    serial.feed(b"+001.000\r+002.500\r-003.250\r")
+
+    assert dec.read_latest() == pytest.approx(-3.25)
+    assert serial.reads == [27]
+    assert dec.read_latest() is None
+
+
+def test_read_all_returns_every_frame_oldest_first():
+    dec, serial = _minitars()
+    serial.feed(b"+010.000\r+020.000\r")
+
+    assert dec.read_all() == [10.0, 20.0]
+
+
+def test_a_partial_frame_is_kept_until_the_rest_arrives():
+    dec, serial = _minitars()
+    serial.feed(b"+045.000\r+04")
+
+    assert dec.read_latest() == pytest.approx(45.0)
+    serial.feed(b"6.1")
+    assert dec.read_latest() is None
+    serial.feed(b"25\r")
+    assert dec.read_latest() == pytest.approx(46.125)
+    assert dec.bad_line_count == 0
+    assert dec.pending == b""
+
+
+def test_malformed_frames_are_counted_and_skipped():
+    dec, serial = _minitars()
+    # A fragment from joining mid-stream, a temperature reply, then an angle
+    serial.feed(b"6.122\r+21.5\r+012.000\r")
+
+    assert dec.read_all() == [12.0]
+    assert dec.bad_line_count == 2
+
+
+def test_bytes_that_never_end_a_frame_do_not_pile_up():
+    dec, serial = _minitars()
+    serial.feed(bytes(range(0x30, 0x30 + 40)))
+
+    assert dec.read_latest() is None
+    assert len(dec.pending) < MiniTars.FRAME_LENGTH
+    assert dec.bad_line_count == 1
+
+    # The tail that was kept may yet start a good frame
+    dec.pending.clear()
+    serial.feed(b"garbage+030.0")
+    dec.read_latest()
+    serial.feed(b"00\r")
+    assert dec.read_latest() == pytest.approx(30.0)
+
+
+def test_stop_forgets_a_partial_frame():
+    dec, serial = _minitars()
+    serial.feed(b"+04")
+    dec.read_latest()
+    dec.stop()
+    serial.feed(b"+050.000\r")
+
+    assert dec.read_all() == [50.0]
+    assert dec.bad_line_count == 0
+
+
+# - MARK: binary output
+
+
+def _int32(*degrees):
+    return b"".join(struct.pack(">i", round(d * 1000)) for d in degrees)
+
+
+def _binary_minitars():
+    dec, serial = _minitars()
+    dec.binary = True
+    return dec, serial
+
+
+def test_binary_frames_decode_once_in_sync():
+    dec, serial = _binary_minitars()
+    serial.feed(_int32(98.275, 98.280, 98.285, 98.290))
+
+    assert dec.read_all() == pytest.approx([98.275, 98.28, 98.285, 98.29])
+    assert dec.bad_line_count == 0
+
+
+def test_binary_sync_skips_a_leading_fragment():
+    dec, serial = _binary_minitars()
+    # Joined mid-frame: the first two bytes are the end of an earlier reading
+    serial.feed(_int32(40.0)[2:] + _int32(40.001, 40.002, 40.003))
+
+    assert dec.read_all() == pytest.approx([40.001, 40.002, 40.003])
+    assert dec.bad_line_count == 1
+
+
+def test_binary_partial_frame_is_kept_until_the_rest_arrives():
+    dec, serial = _binary_minitars()
+    stream = _int32(12.0, 12.001, 12.002, 12.003)
+    serial.feed(stream[:14])
+    assert dec.read_all() == pytest.approx([12.0, 12.001, 12.002])
+
+    serial.feed(stream[14:])
+    assert dec.read_all() == pytest.approx([12.003])
+
+
+def test_a_dropped_byte_loses_sync_until_frames_follow_on_again():
+    dec, serial = _binary_minitars()
+    serial.feed(_int32(50.0, 50.001, 50.002))
+    assert len(dec.read_all()) == 3
+
+    # A byte lost on the line shifts every frame after it
+    damaged = _int32(50.003)[1:] + _int32(50.004, 50.005, 50.006, 50.007)
+    serial.feed(damaged)
+
+    values = dec.read_all()
+    assert all(50.0 <= value <= 50.01 for value in values)
+    assert values[-3:] == pytest.approx([50.005, 50.006, 50.007])
+    assert dec.bad_line_count >= 1
+
+
+def test_ascii_never_syncs_as_binary():
+    assert MiniTars._find_sync(b"+040.123\r+040.124\r+040.125\r") is None
+
+
+def test_a_line_of_zeros_never_syncs_as_binary():
+    assert MiniTars._find_sync(bytes(64)) is None
+
+
+def test_a_stream_joined_one_byte_late_syncs_on_the_real_frames():
+    dec, serial = _binary_minitars()
+    # Read from the second byte, -0.51, -0.505, -0.502 would pass as about -128°
+    serial.feed(_int32(-0.5, -0.51, -0.505, -0.502, -0.507)[1:])
+
+    assert dec.read_all() == pytest.approx([-0.51, -0.505, -0.502, -0.507])
+
+
+def test_binary_is_opt_in():
+    assert not minitars.PREFER_BINARY
@@ -46,6 +46,7 @@ def test_info_accept_leaves_the_live_observation_alone():
 def make_scan_dialog(start: QTime, end: QTime) -> tuple[Scan, SuperClock, ObsDialog]:
     scan = Scan()
     scan.set_files = lambda: None  # keep MyPrecious off the disk
+    scan.set_stats_file = lambda: None
     clock = SuperClock()
     dialog = ObsDialog(None, scan, clock)
     dialog.ui.start_time.setTime(start)
@@ -1,6 +1,6 @@
 from unittest.mock import patch
 
-from tools import Comm, DataPoint, Scan
+from tools import Comm, DataPoint, DecimatedPoint, Pulsar, Scan
 from _tools.observation import State, get_date, get_time
 
 
@@ -68,3 +68,48 @@ def test_footer_records_factual_data_start_and_stop():
     assert "LOCAL START TIME: " + get_time(1234.0) in footer
     assert "LOCAL STOP DATE: " + get_date(2345.0) in footer
     assert "LOCAL STOP TIME: " + get_time(2345.0) in footer
+
+
+def test_decimated_points_are_summarized_in_the_stats_file():
+    scan = make_scan()
+    scan.file_stats = FakeFile()
+    scan.next()  # OFF -> CAL_1
+
+    scan.write_data(point())  # A plain point has no statistics to record
+    scan.write_data(
+        DecimatedPoint(43000.5, 30.0, 1.5, 0.25, 50, 1.0, 2.0, 0.0, 0.5)
+    )
+
+    assert scan.file_a.lines[-1] == "1.5000"
+    assert scan.file_stats.lines == [
+        "43000.50,50,1.5000,1.0000,2.0000,0.2500,0.0000,0.5000,0"
+    ]
+
+
+def test_points_past_sidereal_midnight_are_written_as_ra_with_their_day():
+    scan = make_scan()
+    scan.file_stats = FakeFile()
+    scan.next()  # OFF -> CAL_1
+
+    scan.write_data(DecimatedPoint(3 * 86400 + 0.5, 30.0, 1.5, 0.25, 50, 1.0, 2.0, 0.0, 0.5))
+
+    assert scan.file_a.lines[-3] == "0.50"
+    assert scan.file_stats.lines[-1].startswith("0.50,50,")
+    assert scan.file_stats.lines[-1].endswith(",3")
+
+
+def test_the_stats_file_is_only_created_for_a_decimated_point(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    pulsar = Pulsar()
+    pulsar.set_name("pulsar")
+    pulsar.close_file()
+    assert not (tmp_path / "data" / "pulsar_stats.csv").exists()
+
+    scan = make_scan()
+    scan.set_name("scan")
+    scan.next()  # OFF -> CAL_1
+    scan.write_data(DecimatedPoint(43000.5, 30.0, 1.5, 0.25, 50, 1.0, 2.0, 0.0, 0.5))
+    scan.close_file()
+    lines = (tmp_path / "data" / "scan_stats.csv").read_text().splitlines()
+    assert lines[0] == Scan.STATS_HEADER
+    assert lines[1].startswith("43000.50,50,")
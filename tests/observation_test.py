@@ -1,8 +1,16 @@
 import time
 
+import pytest
+
 from tools import Scan, Survey, Spectrum, DataPoint
 
 
+@pytest.fixture(autouse=True)
+def in_tmp_path(tmp_path, monkeypatch):
+    """MyPrecious writes to ./data/, which must not be the repo's."""
+    monkeypatch.chdir(tmp_path)
+
+
 def test1():
     scan = Scan()
     scan.set_name("scan")
@@ -1,4 +1,4 @@
-from tools import Comm, DataPoint, Pulsar, Scan
+from tools import Comm, DataPoint, Pulsar, Scan, PROFILE_100HZ
 from _tools.observation import State
 
 
@@ -42,6 +42,11 @@ def test_pulsar_asks_for_unfiltered_full_rate_data():
     assert Scan.RECORDS_EVERY_SAMPLE is False
 
 
+def test_pulsar_scans_faster_than_a_scan():
+    assert Scan.PROFILE is PROFILE_100HZ
+    assert Pulsar.PROFILE.scan_rate > Scan.PROFILE.scan_rate
+
+
 def test_communicating_during_data_does_not_write():
     """Recording is record_sample()'s job; writing here too would duplicate a
     sample once per communicate() call."""
@@ -0,0 +1,58 @@
+from unittest.mock import patch
+
+import pytest
+
+from tools import RenderScheduler
+
+
+class FakePerfCounter:
+    def __init__(self, now=10.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    fake = FakePerfCounter()
+    with patch("_tools.render.time.perf_counter", fake):
+        yield fake
+
+
+def test_a_frame_redraws_only_the_views_marked_since_the_last():
+    renderer = RenderScheduler()
+    renderer.mark("stripchart")
+    renderer.mark("stripchart", "dec_view")
+
+    assert renderer.begin_frame() == {"stripchart", "dec_view"}
+    renderer.end_frame()
+    renderer.mark("dec_view")
+    assert renderer.begin_frame() == {"dec_view"}
+
+
+def test_frames_keep_to_the_frame_rate():
+    renderer = RenderScheduler(50)
+    assert renderer.next_delay() == pytest.approx(0.02)
+
+    renderer.set_frame_rate(0)  # A screen that doesn't know is ignored
+    assert renderer.next_delay() == pytest.approx(0.02)
+
+
+def test_a_slow_frame_puts_the_next_one_off(clock):
+    renderer = RenderScheduler(50)
+    renderer.begin_frame()
+    clock.now += 0.015  # Over half the 20 ms frame period
+    renderer.end_frame()
+
+    assert renderer.next_delay() == pytest.approx(0.03)
+
+
+def test_frames_give_way_to_waiting_samples_but_not_forever():
+    renderer = RenderScheduler()
+    assert not renderer.should_skip(0)
+
+    skips = [renderer.should_skip(3) for _ in range(RenderScheduler.MAX_SKIPPED + 1)]
+    assert skips == [True] * RenderScheduler.MAX_SKIPPED + [False]
+    assert renderer.should_skip(3)  # The count starts again after a frame
+    assert renderer.skipped == RenderScheduler.MAX_SKIPPED + 1
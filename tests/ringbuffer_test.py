@@ -0,0 +1,69 @@
+import threading
+import time
+
+import pytest
+
+from _tools.ringbuffer import RingBuffer
+
+
+def test_items_come_out_oldest_first():
+    ring = RingBuffer(4)
+    for i in range(3):
+        assert ring.push(i)
+
+    assert len(ring) == 3
+    assert ring.pop() == 0
+    assert ring.drain() == [1, 2]
+    assert ring.pop() is None
+    assert len(ring) == 0
+
+
+def test_a_full_ring_drops_and_counts_instead_of_blocking():
+    # The producer is the acquisition thread; blocking it is what lets the
+    # serial buffers overflow, so the newest item is dropped instead.
+    ring = RingBuffer(2)
+    assert ring.push("a")
+    assert ring.push("b")
+    assert not ring.push("c")
+
+    assert ring.dropped == 1
+    assert ring.drain() == ["a", "b"]
+
+
+def test_indices_wrap_around_the_slots():
+    ring = RingBuffer(3)
+    seen = []
+    for i in range(10):
+        ring.push(i)
+        seen.append(ring.pop())
+
+    assert seen == list(range(10))
+    assert ring.dropped == 0
+
+
+def test_capacity_must_be_positive():
+    with pytest.raises(ValueError):
+        RingBuffer(0)
+
+
+def test_one_producer_and_one_consumer_lose_and_reorder_nothing():
+    ring = RingBuffer(16)
+    count = 20_000
+    received = []
+
+    def produce():
+        i = 0
+        while i < count:
+            if ring.push(i):
+                i += 1
+            else:
+                time.sleep(0)  # Full; let the consumer run
+
+    producer = threading.Thread(target=produce)
+    producer.start()
+    while len(received) < count:
+        received.extend(ring.drain())
+        time.sleep(0)
+    producer.join()
+
+    assert received == list(range(count))
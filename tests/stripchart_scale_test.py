@@ -0,0 +1,86 @@
+import os
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import numpy as np
+
+try:
+    from threepio.threepio import Threepio
+except ImportError:
+    from threepio import Threepio  # type: ignore[attr-defined,no-redef]
+from tools import StripchartBuffer
+
+
+class FakeThreepio:
+    """Just enough of Threepio to exercise the dynamic voltage scale."""
+
+    calculate_stripchart_voltage_range = Threepio.calculate_stripchart_voltage_range
+    enforce_min_voltage_span = Threepio.enforce_min_voltage_span
+    STRIPCHART_HEADROOM = Threepio.STRIPCHART_HEADROOM
+    STRIPCHART_SHRINK_FRACTION = Threepio.STRIPCHART_SHRINK_FRACTION
+
+    def __init__(self):
+        self.stripchart_buffer = StripchartBuffer(capacity=1 << 10)
+        self.stripchart_min_voltage_range = 0.1
+        self.stripchart_voltage_range = None
+        self.stripchart_view = None
+        self.t = 0.0
+
+    def add(self, *volts):
+        volts = np.asarray(volts, dtype=float)
+        times = self.t + np.arange(len(volts))
+        self.t += len(volts)
+        self.stripchart_buffer.add(times, np.stack([volts, volts], axis=1))
+
+    def scale(self):
+        self.stripchart_voltage_range = self.calculate_stripchart_voltage_range()
+        return self.stripchart_voltage_range
+
+
+def test_the_scale_leaves_headroom_and_never_goes_below_zero():
+    app = FakeThreepio()
+    app.add(1.0, 3.0)
+    assert app.scale() == (0.8, 3.2)
+
+    app = FakeThreepio()
+    app.add(0.05, 2.05)
+    assert app.scale()[0] == 0.0
+
+
+def test_the_scale_holds_while_the_data_fits_and_fills_it():
+    app = FakeThreepio()
+    app.add(1.0, 3.0)
+    first = app.scale()
+
+    app.add(1.2, 2.9)  # Noise inside the axis
+    assert app.scale() == first
+
+
+def test_the_scale_widens_at_once_for_data_outside_it():
+    app = FakeThreepio()
+    app.add(1.0, 3.0)
+    app.scale()
+
+    app.add(4.0)
+    assert app.scale()[1] >= 4.0
+
+
+def test_the_scale_narrows_once_the_data_has_shrunk_well_inside_it():
+    app = FakeThreepio()
+    app.add(1.0, 3.0)
+    app.scale()
+    app.stripchart_buffer.extremes.expire(app.t)  # The wide data scrolls off
+
+    app.add(2.0, 2.6)
+    assert app.scale() == (1.94, 2.66)
+
+
+def test_the_scale_holds_for_noise_just_below_zero():
+    app = FakeThreepio()
+    app.add(-0.02, 1.0)
+    first = app.scale()
+    assert first[0] == 0.0
+
+    for low, high in ((-0.01, 0.98), (-0.03, 0.99), (-0.02, 0.97)):
+        app.add(low, high)
+        assert app.scale() == first
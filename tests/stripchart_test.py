@@ -0,0 +1,246 @@
+import numpy as np
+import pytest
+
+from tools import StripchartBuffer, StripchartHistory
+
+
+def _scans(timestamps):
+    timestamps = np.asarray(timestamps, dtype=float)
+    return timestamps, np.stack([timestamps + 0.5, -timestamps], axis=1)
+
+
+def _times(window):
+    return window[0][0].tolist()
+
+
+def test_window_returns_the_samples_since_a_time_oldest_first():
+    buffer = StripchartBuffer(capacity=16)
+    buffer.add(*_scans([1.0, 2.0, 3.0, 4.0]))
+
+    (times_a, a), (times_b, b) = buffer.window(2.5)
+
+    assert times_a.tolist() == times_b.tolist() == [3.0, 4.0]
+    assert a.tolist() == [3.5, 4.5]
+    assert b.tolist() == [-3.0, -4.0]
+    assert all(row.flags["C_CONTIGUOUS"] for row in (times_a, a, b))  # For replaceNp()
+
+
+def test_the_oldest_samples_are_overwritten_once_full():
+    buffer = StripchartBuffer(capacity=4)
+    buffer.add(*_scans([1.0, 2.0, 3.0]))
+    buffer.add(*_scans([4.0, 5.0, 6.0]))  # Wraps round the end of the array
+
+    assert len(buffer) == 4
+    assert _times(buffer.window(0.0)) == [3.0, 4.0, 5.0, 6.0]
+    assert _times(buffer.window(4.5)) == [5.0, 6.0]
+    assert _times(buffer.window(2.0)) == [3.0, 4.0, 5.0, 6.0]
+
+
+def test_a_block_bigger_than_the_ring_keeps_its_newest():
+    buffer = StripchartBuffer(capacity=4)
+    buffer.add(*_scans(np.arange(10.0)))
+
+    assert _times(buffer.window(0.0)) == [6.0, 7.0, 8.0, 9.0]
+
+
+def test_a_long_window_is_decimated_to_two_points_a_row_at_most():
+    buffer = StripchartBuffer(capacity=1 << 16)
+    buffer.add(*_scans(np.arange(50_000.0)))
+
+    (times, a), (_, b) = buffer.window(0.0, rows=500)
+
+    assert 500 <= len(times) <= 1000
+    assert (np.diff(times) >= 0).all()
+    # A ramp's extremes are each bin's ends, so both ends of the window survive
+    assert (times[0], times[-1]) == (0.0, 49_999.0)
+    assert (a.min(), a.max()) == (0.5, 49_999.5)
+    assert (b.min(), b.max()) == (-49_999.0, 0.0)
+
+
+def test_a_one_sample_spike_survives_decimation():
+    buffer = StripchartBuffer(capacity=1 << 17)
+    timestamps, scans = _scans(np.arange(100_000.0))
+    scans[:] = 1.0
+    scans[31_337, 0] = 9.0
+    scans[77_777, 1] = -9.0
+    buffer.add(timestamps, scans)
+
+    (times_a, a), (times_b, b) = buffer.window(0.0, rows=300)
+
+    assert a.max() == 9.0 and times_a[a.argmax()] == 31_337.0
+    assert b.min() == -9.0 and times_b[b.argmin()] == 77_777.0
+
+
+def test_bins_stay_put_as_the_window_scrolls():
+    buffer = StripchartBuffer(capacity=1 << 14)
+    rng = np.random.default_rng(0)
+    timestamps = np.arange(10_000.0)
+    buffer.add(timestamps, rng.normal(size=(10_000, 2)))
+    before = buffer.window(2_000.0, rows=100)[0]
+
+    buffer.add(timestamps[-1] + 1.0 + np.arange(3.0), rng.normal(size=(3, 2)))
+    after = buffer.window(2_003.0, rows=100)[0]
+
+    # Everything but the bins at either end is drawn exactly as before
+    np.testing.assert_array_equal(before[1][4:-4], after[1][4:-4])
+
+
+def test_clear_empties_the_window():
+    buffer = StripchartBuffer(capacity=8)
+    buffer.add(*_scans([1.0, 2.0]))
+    buffer.clear()
+
+    assert len(_times(buffer.window(0.0))) == 0
+
+
+def test_the_capacity_must_be_a_power_of_two():
+    with pytest.raises(ValueError):
+        StripchartBuffer(capacity=1000)
+
+
+def test_decimating_a_ring_that_has_wrapped_matches_the_samples_in_order():
+    buffer = StripchartBuffer(capacity=1 << 12)
+    rng = np.random.default_rng(1)
+    timestamps = np.arange(10_000.0)
+    scans = rng.normal(size=(10_000, 2))
+    for start in range(0, 10_000, 700):  # Blocks that don't line up with bins
+        buffer.add(timestamps[start:start + 700], scans[start:start + 700])
+
+    (times, a), _ = buffer.window(7_000.5, rows=100)
+
+    # Bins of 32 (3000 samples, 100 rows), counted from the first sample ever
+    assert len(times) == 2 * len(range(7_001 // 32, 10_000 // 32 + 1))
+    for low, high in zip(times[::2].astype(int), times[1::2].astype(int)):
+        edge = max(low // 32 * 32, 7_001)
+        samples = scans[edge:low // 32 * 32 + 32, 0]
+        assert sorted([scans[low, 0], scans[high, 0]]) == [samples.min(), samples.max()]
+
+
+# - MARK: sliding range
+
+
+def test_sliding_range_matches_the_extremes_of_what_is_left():
+    from _tools.stripchart import SlidingRange
+
+    sliding = SlidingRange()
+    rng = np.random.default_rng(2)
+    values = rng.normal(size=2_000)
+    for t, value in enumerate(values):
+        sliding.add(float(t), value, value + 0.5)
+        sliding.expire(t - 99.0)
+        window = values[max(0, t - 99):t + 1]
+        assert sliding.range() == (window.min(), window.max() + 0.5)
+    # Only the entries that could still be an extreme are kept
+    assert len(sliding.lows) < 50 and len(sliding.highs) < 50
+
+
+def test_the_buffer_keeps_the_range_of_both_channels_by_block():
+    buffer = StripchartBuffer(capacity=16)
+    buffer.add(np.array([1.0, 2.0]), np.array([[1.0, 5.0], [2.0, 3.0]]))
+    buffer.add(np.array([3.0, 4.0]), np.array([[2.5, 2.0], [2.0, 2.2]]))
+
+    assert buffer.extremes.range() == (1.0, 5.0)
+    buffer.extremes.expire(3.0)
+    assert buffer.extremes.range() == (2.0, 2.5)
+    buffer.clear()
+    assert buffer.extremes.range() is None
+
+
+def test_window_can_stop_before_the_newest_samples():
+    buffer = StripchartBuffer(capacity=16)
+    buffer.add(*_scans([1.0, 2.0, 3.0, 4.0]))
+
+    assert _times(buffer.window(1.5, until=4.0)) == [2.0, 3.0]
+    assert buffer.oldest() == 1.0
+
+
+def _history(samples, capacity=StripchartHistory.LEVEL_CAPACITY, block=7):
+    history = StripchartHistory(capacity)
+    for start in range(0, samples, block):  # Blocks that don't line up with bins
+        history.add(*_scans(np.arange(start, min(start + block, samples))))
+    return history
+
+
+def test_history_bins_hold_the_extremes_of_their_samples():
+    history = _history(StripchartHistory.BIN * 4)
+
+    (times_a, a), (times_b, b) = history.window(0, np.inf, rows=4)
+    bin_starts = [0, 0, 64, 64, 128, 128, 192, 192]
+    assert times_a.tolist() == bin_starts
+    assert a.tolist() == [t + 0.5 + offset for t in (0, 64, 128, 192) for offset in (0, 63)]
+    assert b.tolist() == [-t - offset for t in (0, 64, 128, 192) for offset in (63, 0)]
+
+
+def test_history_picks_the_finest_level_that_fits_the_rows():
+    history = _history(StripchartHistory.BIN * 64)
+
+    (times, _), _ = history.window(0, np.inf, rows=64)
+    assert len(times) == 128  # Level 0
+
+    (times, a), _ = history.window(0, np.inf, rows=10)
+    assert len(times) == 16  # Level 3: bins of eight
+    assert a.min() == 0.5 and a.max() == 64 * 64 - 0.5
+
+    (times, _), _ = history.window(1024, 2048, rows=16)
+    assert times[0] == 1024 and times[-1] < 2048
+
+
+def test_history_levels_are_bounded_and_coarser_ones_reach_back():
+    history = _history(StripchartHistory.BIN * 256, capacity=32)
+
+    assert all(level.count <= 32 for level in history.levels)
+    assert history.oldest() == 0.0
+
+    (times, a), _ = history.window(0, np.inf, rows=1000)
+    assert times[0] == 0.0  # From a level old enough, though not the finest
+    assert len(times) == 64
+    assert a.max() == 256 * 64 - 0.5
+
+
+def test_samples_short_of_a_bin_wait_for_it_to_fill():
+    history = _history(StripchartHistory.BIN - 1)
+    (times, _), _ = history.window(0, np.inf)
+    assert len(times) == 0
+
+    history.add(*_scans([StripchartHistory.BIN - 1]))
+    (times, _), _ = history.window(0, np.inf)
+    assert len(times) == 2
+
+    history.clear()
+    assert history.oldest() is None
+
+
+def test_extremes_can_be_rebuilt_once_the_window_grows_back():
+    buffer = StripchartBuffer(capacity=16)
+    times = np.arange(1.0, 9.0)
+    volts = np.ones((8, 2))
+    volts[2] = (5.0, -1.0)  # A spike at t=3
+    for t, v in zip(times, volts):
+        buffer.add(np.array([t]), v[None])
+    buffer.extremes.expire(6.0)  # A short window, which the spike left
+    assert buffer.extremes.range() == (1.0, 1.0)
+
+    buffer.rebuild_extremes(2.0, chunk=2)  # Widened again
+    assert buffer.extremes.range() == (-1.0, 5.0)
+    buffer.extremes.expire(5.0)
+    assert buffer.extremes.range() == (1.0, 1.0)
+
+
+def test_shifting_moves_every_time_kept_and_nothing_else():
+    buffer = StripchartBuffer(capacity=16)
+    buffer.add(*_scans([1.0, 2.0, 3.0, 4.0]))
+    history = _history(StripchartHistory.BIN * 3 + 5)
+
+    buffer.shift(-10.0)
+    history.shift(-10.0)
+
+    assert _times(buffer.window(-8.5)) == [-8.0, -7.0, -6.0]
+    buffer.extremes.expire(-6.0)  # The block's newest sample, at 4 before
+    assert buffer.extremes.range() == (-4.0, 4.5)
+    (times, a), _ = history.window(-np.inf, np.inf)
+    assert times.tolist() == [-10.0, -10.0, 54.0, 54.0, 118.0, 118.0]
+    assert a.tolist() == [0.5, 63.5, 64.5, 127.5, 128.5, 191.5]  # The volts stay put
+
+    history.add(*_scans(np.arange(197, 256) - 10.0))  # Filling the partial bin
+    (times, _), _ = history.window(-np.inf, np.inf)
+    assert times[-1] == 182.0
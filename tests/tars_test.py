@@ -1,6 +1,8 @@
+import random
 import statistics
 from unittest.mock import patch
 
+import numpy as np
 import pytest
 
 import _tools.tars as tars
@@ -169,7 +171,17 @@ def test_range_volt_round_trips_every_documented_range(code, volts):
     assert range_volt(word) == volts
 
 
-# - MARK: buffer_read
+# - MARK: ADC coding
+
+
+def _reference_volts(raw: bytes, channel: int) -> float:
+    """
+    One sample decoded straight from the coding the device documents: 16-bit
+    little-endian two's complement spanning the channel's bipolar range, so a
+    positive coax signal uses only the positive half of it (0 V -> 0 counts,
+    +FS -> +32767). The block decoder must agree with this to the last bit.
+    """
+    return range_volt(channel) * int.from_bytes(raw, byteorder="little", signed=True) / 32768
 
 
 @pytest.mark.parametrize(
@@ -182,16 +194,10 @@ def test_range_volt_round_trips_every_documented_range(code, volts):
         (b"\x00\x40", 2.5),  # Pins byte order: little-endian 0x4000
     ],
 )
-def test_buffer_read_decodes_the_documented_adc_coding(raw, expected):
-    daq, _, serial = _tars()
-    serial.buffer = bytearray(raw)
-    assert daq.buffer_read(slist_word(0, volts=5)) == pytest.approx(expected)
-
-
-def test_buffer_read_returns_none_without_a_whole_sample():
-    daq, _, serial = _tars()
-    serial.buffer = bytearray(b"\x01")
-    assert daq.buffer_read(slist_word(0)) is None
+def test_the_documented_adc_coding(raw, expected):
+    channel = slist_word(0, volts=5)
+    assert _reference_volts(raw, channel) == pytest.approx(expected)
+    assert tars.decode_scans(bytearray(raw), [channel]).tolist() == [[pytest.approx(expected)]]
 
 
 # - MARK: setup
@@ -314,6 +320,83 @@ def test_read_latest_returns_none_without_a_whole_scan():
     assert daq.read_latest() is None
 
 
+# - MARK: block decode
+
+
+def test_decode_scans_matches_the_reference_decoding_sample_for_sample():
+    # The block path must scale exactly as decoding one sample at a time
+    # does, or it would shift every recorded value in the last bit.
+    channels = [slist_word(0, volts=5), slist_word(1, volts=10)]
+    raw = b"\xff\x7f\x00\x80" b"\x00\x00\xff\xff" b"\x00\x40\x34\x12"
+    block = tars.decode_scans(bytearray(raw), channels)
+
+    samples = [raw[i:i + 2] for i in range(0, len(raw), 2)]
+    expected = [
+        [_reference_volts(samples[i], channels[0]), _reference_volts(samples[i + 1], channels[1])]
+        for i in range(0, len(samples), 2)
+    ]
+
+    assert block.shape == (3, 2)
+    assert block.tolist() == expected
+
+
+def test_decode_scans_keeps_a_partial_scan_for_the_next_read():
+    # Decoding or discarding the odd bytes would put every later sample on
+    # the wrong channel.
+    channels = [slist_word(0, volts=5), slist_word(1, volts=5)]
+    buffer = bytearray(b"\x00\x40\x00\x20" b"\x00\x60\x00")
+
+    first = tars.decode_scans(buffer, channels)
+    assert first.tolist() == [[2.5, 1.25]]
+    assert buffer == bytearray(b"\x00\x60\x00")
+
+    buffer += b"\x10"
+    assert tars.decode_scans(buffer, channels).tolist() == [[3.75, 0.625]]
+    assert buffer == bytearray()
+
+
+def test_read_all_returns_the_whole_backlog_as_one_block():
+    daq, serial = _five_volt_daq(kind=tars.FilterKind.NONE)
+    serial.buffer = bytearray(b"\x00\x40\x00\x20" b"\x00\x60\x00\x10" b"\x00")
+
+    block = daq.read_all()
+
+    assert block.tolist() == [[2.5, 1.25], [3.75, 0.625]]
+    assert serial.in_waiting == 0  # One read took everything, odd byte included
+    assert daq.pending == bytearray(b"\x00")
+
+
+def test_read_all_is_empty_without_a_whole_scan():
+    daq, _, serial = _tars()
+    serial.buffer = bytearray(b"\x01\x02\x03")
+
+    assert daq.read_all().shape == (0, 2)
+
+
+def test_start_discards_a_held_back_partial_scan():
+    daq, serial = _five_volt_daq(kind=tars.FilterKind.NONE)
+    serial.buffer = bytearray(b"\x00\x40\x00")
+    daq.read_all()
+
+    daq.start()
+    serial.buffer = bytearray(b"\x00\x60\x00\x10")
+
+    assert daq.read_all().tolist() == [[3.75, 0.625]]
+
+
+def test_every_scan_read_is_counted_by_the_timebase():
+    daq, serial = _five_volt_daq(kind=tars.FilterKind.NONE)
+    serial.buffer = bytearray(b"\x00\x40\x00\x20" * 3 + b"\x00")
+    with patch.object(tars.time, "monotonic", return_value=70.0):
+        daq.read_all()
+
+    assert daq.timebase.scans == 3
+    assert daq.scan_times(3) == pytest.approx(70.0 - daq.sample_period * np.arange(2, -1, -1))
+
+    daq.start()  # Anything before the flush is no longer the same count
+    assert daq.timebase.scans == 0
+
+
 # - MARK: lowpass filter
 
 
@@ -325,11 +408,12 @@ def _five_volt_daq(tau=None, kind=None):
 
 def test_filter_alpha_follows_the_configured_scan_rate():
     # srate/dec set how often the DI-4108 walks the scan list, and every channel
-    # is sampled once per walk, so the per-channel period is 1/SCAN_RATE however
-    # many channels there are. A future edit to srate/dec that silently detunes
-    # the cutoff should fail here.
+    # is sampled once per walk, so the per-channel period is the profile's
+    # scan period however many channels there are. A future edit to srate/dec
+    # that silently detunes the cutoff should fail here.
     daq, _, _ = _tars(kind=tars.FilterKind.SINGLE_POLE)
-    period = 1 / (tars.BASE_CLOCK_HZ / (tars.SRATE * tars.DECIMATION))
+    profile = tars.DEFAULT_PROFILE
+    period = 1 / (tars.BASE_CLOCK_HZ / (profile.srate * profile.decimation))
 
     assert period == pytest.approx(0.01, abs=1e-4)
     assert _alpha(daq) == pytest.approx(period / (tars.FILTER_TAU + period))
@@ -342,10 +426,72 @@ def test_sample_period_is_the_scan_interval_not_the_throughput():
     # timestamp and detune the filter by the same factor.
     daq, _, _ = _tars()
 
-    assert daq.sample_period == pytest.approx(1 / tars.SCAN_RATE)
+    assert daq.sample_period == pytest.approx(1 / tars.DEFAULT_PROFILE.scan_rate)
     assert daq.sample_period == pytest.approx(0.01, abs=1e-4)
 
 
+@pytest.mark.parametrize(
+    "profile, rate",
+    [(tars.PROFILE_100HZ, 100), (tars.PROFILE_1KHZ, 1000), (tars.PROFILE_5KHZ, 5000)],
+)
+def test_profiles_scan_at_their_named_rates(profile, rate):
+    assert profile.scan_rate == pytest.approx(rate, rel=1e-3)
+    # Each profile's packets should fill at a similar pace however fast it scans
+    packets_per_second = rate * 2 * 2 / (16 << profile.packet_size)
+    assert 20 <= packets_per_second <= 250
+
+
+def test_set_profile_reconfigures_the_stopped_device_and_resumes():
+    daq, parent, serial = _tars(kind=tars.FilterKind.SINGLE_POLE)
+    daq.start()
+    serial.written.clear()
+
+    assert daq.set_profile(tars.PROFILE_1KHZ) is True
+
+    assert serial.written == ["stop", "ps 1", "dec 50", "srate 1200", "start"]
+    assert daq.acquiring is True
+    assert parent.warnings() == []
+
+
+def test_set_profile_retunes_the_filters():
+    daq, _, _ = _tars(kind=tars.FilterKind.SINGLE_POLE)
+
+    daq.set_profile(tars.PROFILE_5KHZ)
+
+    assert daq.sample_period == pytest.approx(0.0002)
+    assert len(daq.filters[0].stages) == 1  # Still the kind it was built with
+    assert _alpha(daq) == pytest.approx(0.0002 / (tars.FILTER_TAU + 0.0002))
+
+
+def test_set_profile_leaves_a_stopped_device_stopped():
+    daq, _, serial = _tars()
+    serial.written.clear()
+
+    daq.set_profile(tars.PROFILE_1KHZ)
+
+    assert "start" not in serial.written
+    assert daq.acquiring is False
+
+
+def test_set_profile_to_the_current_profile_does_not_stop_the_device():
+    # Stopping costs the DI-4108 ~1 s, which every observation load would pay
+    daq, _, serial = _tars()
+    daq.start()
+    serial.written.clear()
+
+    assert daq.set_profile(tars.DEFAULT_PROFILE) is True
+
+    assert serial.written == []
+
+
+def test_set_profile_reports_an_unconfirmed_rate():
+    daq, parent, serial = _tars()
+    serial.drop.add("srate 1200")
+
+    assert daq.set_profile(tars.PROFILE_1KHZ) is False
+    assert any("srate 1200" in message for message in parent.warnings())
+
+
 def test_filter_kind_none_passes_samples_through_unchanged():
     daq, serial = _five_volt_daq(kind=tars.FilterKind.NONE)
     assert daq.filters[0].stages == ()
@@ -480,6 +626,36 @@ def test_hampel_gives_up_once_the_bad_samples_are_the_majority():
     assert _feed(f, [80.0] * 4)[-1] == pytest.approx(80.0)
 
 
+def _statistics_hampel(samples, window, sigmas=3.0):
+    """The filter as first written: two full statistics.median sorts a sample."""
+    history, out = [], []
+    for sample in samples:
+        history = (history + [sample])[-window:]
+        if len(history) < window:
+            out.append(sample)
+            continue
+        median = statistics.median(history)
+        spread = 1.4826 * statistics.median([abs(x - median) for x in history])
+        if spread >= tars.HampelFilter.MIN_SPREAD and abs(sample - median) > sigmas * spread:
+            out.append(median)
+        else:
+            out.append(sample)
+    return out
+
+
+@pytest.mark.parametrize("window", [2, 3, 7, 8, 50, 51, 200])
+def test_hampel_sorted_window_matches_statistics_median(window):
+    # The sorted window and the binary-searched MAD are an optimization only:
+    # every output must be the one two statistics.median calls would give,
+    # including on quantized data full of ties.
+    rng = random.Random(window)
+    samples = [round(rng.gauss(1.0, 0.05), 2) for _ in range(1500)]
+    for i in range(0, 1500, 53):
+        samples[i] = rng.choice([-30.0, 45.0])
+
+    assert _feed(_hampel(window=window), samples) == _statistics_hampel(samples, window)
+
+
 def test_hampel_reset_forgets_the_window():
     f = _hampel(window=5)
     _feed(f, [1.0] * 5)
@@ -523,6 +699,7 @@ def test_chain_resets_every_stage():
 
     hampel, lowpass = chain.stages
     assert len(hampel.samples) == 0
+    assert hampel.sorted == []
     assert lowpass.value is None
 
 
@@ -539,6 +716,72 @@ def test_lowpass_step_response_converges_on_the_input():
     assert lowpass.update(4.2) == pytest.approx(4.2)  # Reseeds, no memory of 1.0
 
 
+# - MARK: block processing
+
+
+def _noisy_with_spikes(count=400, seed=7):
+    rng = random.Random(seed)
+    samples = [1.0 + rng.gauss(0, 0.05) for _ in range(count)]
+    for i in range(10, count, 37):
+        samples[i] += rng.choice([-40.0, 60.0])
+    for i in range(100, 104):  # A run, and a resting ADC code with no spread
+        samples[i] = 80.0
+    for i in range(200, 220):
+        samples[i] = 2.0
+    return samples
+
+
+def _blocks(samples, sizes):
+    start = 0
+    for size in sizes:
+        yield np.array(samples[start : start + size])
+        start += size
+    yield np.array(samples[start:])
+
+
+@pytest.mark.parametrize("window", [1, 5, 6, 7, 50, 100])
+@pytest.mark.parametrize("sizes", [[400], [1] * 30, [3, 0, 4, 9, 250], [2, 2, 2]])
+def test_hampel_process_matches_update_bit_for_bit(window, sizes):
+    samples = _noisy_with_spikes()
+    expected = _feed(_hampel(window=window), samples)
+
+    f = _hampel(window=window)
+    got = np.concatenate([f.process(block) for block in _blocks(samples, sizes)])
+
+    assert got.tolist() == expected
+
+
+@pytest.mark.parametrize("sizes", [[400], [1] * 30, [3, 0, 4, 9, 250]])
+def test_lowpass_process_matches_update_bit_for_bit(sizes):
+    samples = _noisy_with_spikes()
+    expected = _feed(tars.SinglePoleLowpass(tau=0.16, period=0.01), samples)
+
+    lowpass = tars.SinglePoleLowpass(tau=0.16, period=0.01)
+    got = np.concatenate([lowpass.process(block) for block in _blocks(samples, sizes)])
+
+    assert got.tolist() == expected
+
+
+@pytest.mark.parametrize("kind", list(tars.FilterKind))
+def test_chain_process_matches_update_bit_for_bit(kind):
+    samples = _noisy_with_spikes()
+    expected = _feed(tars.make_filter(kind, period=0.01), samples)
+
+    chain = tars.make_filter(kind, period=0.01)
+    got = np.concatenate([chain.process(block) for block in _blocks(samples, [5, 17, 1, 90])])
+
+    assert got.tolist() == expected
+
+
+def test_process_leaves_the_input_block_alone():
+    block = np.array(_noisy_with_spikes())
+    before = block.copy()
+
+    tars.make_filter(tars.FilterKind.BOTH, period=0.01).process(block)
+
+    assert block.tolist() == before.tolist()
+
+
 def test_start_flushes_before_scanning():
     daq, _, serial = _tars()
     serial.buffer = bytearray(b"\x99")  # A stray byte would offset every sample
@@ -554,4 +797,4 @@ def test_simulated_device_never_touches_the_port():
     daq = Tars(FakeParent(), device=None)
     assert daq.testing is True
     assert daq.configured is False
-    assert daq.buffer_read(slist_word(0)) is None
+    assert daq.in_waiting() == 0
@@ -0,0 +1,82 @@
+import random
+
+import numpy as np
+import pytest
+
+from _tools.timebase import Timebase
+
+NOMINAL = 0.01
+
+
+def _feed(timebase, reads, period=NOMINAL * (1 + 50e-6), origin=5000.0, seed=0):
+    """
+    Feed `reads` reads of 3-5 scans each, taken every `period` from `origin`,
+    arriving after a small random delay and, now and then, a long stall.
+    Returns the true time of every scan fed.
+    """
+    rng = random.Random(seed)
+    taken = []
+    for _ in range(reads):
+        count = rng.randint(3, 5)
+        first = len(taken)
+        taken += [origin + period * i for i in range(first, first + count)]
+        delay = abs(rng.gauss(0, 0.0005))
+        if rng.random() < 0.03:
+            delay += 0.05  # The worker lost the GIL for a while
+        timebase.observe(count, taken[-1] + delay)
+    return np.array(taken)
+
+
+def test_the_first_reads_are_back_dated_at_the_nominal_period():
+    timebase = Timebase(NOMINAL)
+    timebase.observe(3, 100.0)
+
+    assert timebase.times(3) == pytest.approx([99.98, 99.99, 100.0])
+
+
+def test_stamps_are_far_steadier_than_the_reads():
+    timebase = Timebase(NOMINAL)
+    taken = _feed(timebase, 2000)
+
+    count = 4
+    error = np.abs(timebase.times(count) - taken[-count:])
+    # Each read strays ~0.3 ms, and 3% of them by 50 ms, but the model puts
+    # every scan within a small fraction of that
+    assert timebase.jitter == pytest.approx(0.0003, rel=0.5)
+    assert error.max() < 0.0002
+
+
+def test_the_fitted_period_tracks_the_device_clock():
+    timebase = Timebase(NOMINAL)
+    _feed(timebase, 2000, period=NOMINAL * (1 + 50e-6))
+
+    assert timebase.period == pytest.approx(NOMINAL * (1 + 50e-6), rel=5e-6)
+
+
+def test_reset_counts_scans_from_zero_again():
+    timebase = Timebase(NOMINAL)
+    _feed(timebase, 100)
+
+    timebase.reset()
+    timebase.observe(2, 9000.0)
+
+    assert timebase.scans == 2
+    assert timebase.jitter == 0.0
+    assert timebase.times(2) == pytest.approx([8999.99, 9000.0])
+
+
+def test_a_stall_in_the_first_reads_neither_skews_the_fit_nor_runs_time_backwards():
+    timebase = Timebase(NOMINAL)
+    stamps = []
+    for read in range(4 * Timebase.FIRST_FIT_READS):
+        taken = 5000.0 + NOMINAL * (4 * read + 3)
+        delay = 0.05 if read == 3 else 0.0002  # One stall among the first 8
+        timebase.observe(4, taken + delay)
+        block = timebase.times(4)
+        truth = 5000.0 + NOMINAL * np.arange(4 * read, 4 * read + 4)
+        if read >= Timebase.FIRST_FIT_READS:
+            assert np.abs(block - truth).max() < 0.001
+        stamps.extend(block)
+
+    assert timebase.period == pytest.approx(NOMINAL, rel=1e-4)
+    assert (np.diff(stamps) >= 0).all()
@@ -0,0 +1,156 @@
+from unittest.mock import patch
+
+import pytest
+
+from tools import TimerManager
+
+
+class FakeMonotonic:
+    def __init__(self, now=100.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    fake = FakeMonotonic()
+    with patch("_tools.timer_manager.time.monotonic", fake):
+        yield fake
+
+
+def test_timers_fire_once_per_period_in_deadline_order(clock):
+    manager = TimerManager()
+    fired = []
+    manager.add_timer(1000, lambda: fired.append("slow"))
+    manager.add_timer(250, lambda: fired.append("fast"))
+
+    for _ in range(7):
+        clock.now += 0.125
+        manager.run_timers()
+    assert fired == ["fast", "fast", "fast"]
+
+    clock.now += 0.125
+    manager.run_timers()
+    assert sorted(fired) == ["fast", "fast", "fast", "fast", "slow"]
+
+
+def test_next_due_is_the_earliest_deadline(clock):
+    manager = TimerManager()
+    assert manager.next_due() is None
+
+    manager.add_timer(1000, lambda: None)
+    manager.add_timer(300, lambda: None)
+
+    assert manager.next_due() == pytest.approx(100.3)
+
+
+def test_a_late_run_keeps_the_phase_and_counts_the_missed_periods(clock):
+    manager = TimerManager()
+    timer = manager.add_timer(100, lambda: None)
+
+    clock.now += 0.35
+    manager.run_timers()
+
+    assert timer.stats.runs == 1
+    assert timer.stats.missed == 2
+    assert timer.stats.max_lateness == pytest.approx(0.25)
+    assert manager.next_due() == pytest.approx(100.4)
+
+
+def test_the_wall_clock_stepping_does_not_fire_timers(clock):
+    manager = TimerManager()
+    fired = []
+    manager.add_timer(1000, lambda: fired.append(True))
+
+    with patch("_tools.timer_manager.time.time", return_value=1e12):
+        manager.run_timers()
+
+    assert fired == []
+
+
+def test_set_period_restarts_the_period_from_now(clock):
+    manager = TimerManager()
+    fired = []
+    timer = manager.add_timer(1000, lambda: fired.append(True))
+
+    clock.now += 0.9
+    timer.set_period(500)
+    clock.now += 0.4
+    manager.run_timers()
+    assert fired == []  # The old deadline has gone
+
+    clock.now += 0.1
+    manager.run_timers()
+    assert fired == [True]
+
+    timer.set_period(500)  # Unchanged: the phase is kept
+    assert manager.next_due() == pytest.approx(101.9)
+
+
+def test_a_callback_may_change_its_own_period(clock):
+    manager = TimerManager()
+    fired = []
+
+    def callback():
+        fired.append(clock.now)
+        timer.set_period(250)
+
+    timer = manager.add_timer(125, callback)
+    for _ in range(6):
+        clock.now += 0.125
+        manager.run_timers()
+
+    assert fired == [100.125, 100.375, 100.625]
+
+
+def test_reset_timer_anchors_restarts_every_timer(clock):
+    manager = TimerManager()
+    fired = []
+    manager.add_timer(1000, lambda: fired.append("a"))
+    manager.add_timer(500, lambda: fired.append("b"))
+
+    clock.now += 0.25
+    manager.reset_timer_anchors()
+    clock.now += 0.375
+    manager.run_timers()
+    assert fired == []  # b would have fired at 100.5
+
+    clock.now += 0.125
+    manager.run_timers()
+    assert fired == ["b"]
+    assert manager.next_due() == pytest.approx(101.25)
+
+
+def test_cancelled_timers_never_fire(clock):
+    manager = TimerManager()
+    fired = []
+    timer = manager.add_timer(100, lambda: fired.append(True))
+    timer.cancel()
+
+    clock.now += 1.0
+    manager.run_timers()
+
+    assert fired == []
+    assert manager.next_due() is None
+
+
+def test_a_callback_that_raises_fires_again_next_period(clock):
+    manager = TimerManager()
+    fired = []
+
+    def callback():
+        fired.append(clock.now)
+        raise RuntimeError("callback failed")
+
+    manager.add_timer(250, callback)
+    clock.now += 0.25
+    with pytest.raises(RuntimeError):
+        manager.run_timers()
+    assert manager.next_due() == pytest.approx(100.5)
+
+    clock.now += 0.25
+    with pytest.raises(RuntimeError):
+        manager.run_timers()
+    assert fired == [100.25, 100.5]
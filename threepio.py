@@ -1,8 +1,12 @@
+import dataclasses
 import time
+from collections import deque
 from enum import Enum
 from functools import reduce
 from typing import Callable
-from math import floor
+from math import ceil, floor
+
+import numpy as np
 
 from PySide6 import QtWidgets, QtCore, QtGui, QtMultimedia, QtCharts
 
@@ -20,11 +24,18 @@ from tools import (
     GB_LATITUDE,
     Tars,
     MiniTars,
+    Acquisition,
+    SampleBlock,
+    Decimator,
     discovery,
     LogTask,
     Observation,
     Alert,
     DecCalc,
+    DecTrack,
+    StripchartBuffer,
+    StripchartHistory,
+    RenderScheduler,
     ObsType,
 )
 
@@ -36,15 +47,30 @@ class Threepio(QtWidgets.QMainWindow):
     """
 
     # Basic time
-    BASE_PERIOD = 10  # ms = 100Hz
+    BASE_PERIOD = 10  # ms = 100Hz; how often to read when no thread wakes us
     GUI_UPDATE_PERIOD = 1000  # ms = 1Hz
-    STRIPCHART_PERIOD = 16.7  # ms = 60Hz
+    # Frames a second at most, or None to keep to the screen's refresh rate
+    FRAME_RATE = None
+    # Degrees the dish must turn before the telescope view is redrawn
+    DEC_VIEW_THRESHOLD = 0.05
+    # The dynamic scale leaves this fraction of the data's span spare above and
+    # below it, and narrows only once the data would fill less than
+    # STRIPCHART_SHRINK_FRACTION of the axis
+    STRIPCHART_HEADROOM = 0.1
+    STRIPCHART_SHRINK_FRACTION = 0.6
+    # Each notch of the mouse wheel zooms the stripchart's history by this
+    # much, down to STRIPCHART_MIN_SPAN seconds
+    STRIPCHART_ZOOM_PER_NOTCH = 1.25
+    STRIPCHART_MIN_SPAN = 1.0
 
     # Style
     BLUE = 0x2196F3
     RED = 0xFF5252
     MIN_WIDTH = 860
 
+    # Data points kept in memory, newest last
+    RECENT_DATA_POINTS = 1000
+
     # The voltage range slider is integer-only, so it counts tenths of a volt.
     VOLTAGE_SLIDER_STEPS_PER_VOLT = 10
     VOLTAGE_SLIDER_MAX_VOLTS = 15
@@ -53,6 +79,9 @@ class Threepio(QtWidgets.QMainWindow):
         NORMAL = 0
         TESTING = 1
 
+    # Emitted on the acquisition thread when it has samples waiting
+    samples_ready = QtCore.Signal()
+
     def __init__(self):
         QtWidgets.QMainWindow.__init__(self)
 
@@ -84,6 +113,18 @@ class Threepio(QtWidgets.QMainWindow):
         self.channel_visibility = (True, True)
         self.stripchart_series_a = QtCharts.QLineSeries()
         self.stripchart_series_b = QtCharts.QLineSeries()
+        # Every sample recorded, from which each frame draws its window
+        self.stripchart_buffer = StripchartBuffer()
+        # And everything since the stripchart was cleared, at every zoom, for
+        # scrolling back. The chart follows the newest samples while
+        # stripchart_view is None, and otherwise shows its (start, end).
+        self.stripchart_history = StripchartHistory()
+        self.stripchart_view: tuple[float, float] | None = None
+        self.stripchart_view_extremes: tuple[float, float] | None = None
+        self.stripchart_drag: tuple[float, tuple[float, float]] | None = None
+        # How many of the clock's steps the times kept here have been moved by
+        self.clock_steps = 0
+        self.stripchart_voltage_range = None  # What the voltage axis is set to
         self.stripchart_dynamic_scale_enabled = True
         self.stripchart_grid_enabled = False
         self.stripchart_grid_density = 8
@@ -95,6 +136,10 @@ class Threepio(QtWidgets.QMainWindow):
         self.axis_y = QtCharts.QValueAxis()
         self.chart = QtCharts.QChart()
         self.ui.stripchart.setRenderHint(QtGui.QPainter.RenderHint.Antialiasing)
+        self.ui.stripchart.setToolTip(
+            "Scroll to zoom through the history, drag to pan, double-click to follow the newest data"
+        )
+        self.ui.stripchart.viewport().installEventFilter(self)
         self.initialize_stripchart()  # Should this include more of the above?
 
         self.update_stripchart_speed()
@@ -175,15 +220,33 @@ class Threepio(QtWidgets.QMainWindow):
             self.alert(Alert("Declinometer found but not responding", "Got it"))
         self.minitars.start()
 
+        # Both devices are read on the acquisition thread from here on, so a
+        # slow tick can no longer leave bytes piling up in their buffers.
+        self.acquisition = Acquisition(self.tars, self.minitars, self.clock)
+        self.reported_acquisition_drops = 0
+        if not (self.tars.testing and self.minitars.testing):
+            # A simulated device reads its values off the testing dials, which
+            # is a plain getter and safe from the worker; with no real device
+            # at all, drain() simply reads inline on the GUI thread.
+            self.acquisition.start()
+
         # Establish observation
         self.obs = None
         self.ui_thinks_obs_is_set = False
         self.completed_one_calibration = False
 
-        # Establish data array & most recent dec
-        self.data = []
+        # Establish the most recent data points & dec. Only the newest is
+        # read; the rest are on disk, so at 1 kHz and more keeping them all
+        # would grow by half a gigabyte an hour
+        self.data: deque[DataPoint] = deque(maxlen=self.RECENT_DATA_POINTS)
         self.current_dec = 0.0
         self.current_data_point = None
+        # Recent declinometer readings, to give every scan its own declination
+        self.dec_track = DecTrack()
+
+        # Averages the samples between two update_data() calls into the one
+        # point the observation records
+        self.decimator = Decimator()
 
         # Tars communication interpretation
         self.previous_transmission = None
@@ -191,25 +254,41 @@ class Threepio(QtWidgets.QMainWindow):
         # Telescope visualization
         self.dec_scene = QtWidgets.QGraphicsScene()
         self.ui.dec_view.setScene(self.dec_scene)
-        self.update_dec_view()
+        self.initialize_dec_view()
 
         # Initial dec calibration
         self.dec_calc = DecCalc()
         try:
             self.dec_calc.load_dec_cal()
+            self.log(f"Dec calibration: {self.dec_calc.describe_fit()}")
         except FileNotFoundError:
             self.alert(Alert("Dec must be calibrated", "Got it"))
 
-        # Primary clock
+        # Primary clock. Rather than tick at a fixed rate, tick() runs when the
+        # acquisition thread has samples waiting and when the next timer is
+        # due, so an idle Threepio sleeps and samples are handled on arrival.
         self.timer = QtCore.QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setTimerType(QtCore.Qt.TimerType.PreciseTimer)
         self.timer.timeout.connect(self.tick)  # Do everything
-        self.timer.start(self.BASE_PERIOD)  # Set refresh rate
+        if self.acquisition.running:
+            # Queued: the signal is emitted on the acquisition thread
+            self.samples_ready.connect(self.tick, QtCore.Qt.ConnectionType.QueuedConnection)
+            self.acquisition.on_data = self.samples_ready.emit
+        # Drawing is paced separately, at the display's rate, and only for
+        # views that something has changed
+        self.renderer = RenderScheduler(self.frame_rate())
+        self.render_timer = QtCore.QTimer(self)
+        self.render_timer.setTimerType(QtCore.Qt.TimerType.PreciseTimer)
+        self.render_timer.setSingleShot(True)
+        self.render_timer.timeout.connect(self.render)
         # Assign timers to functions meant to fire periodically
         self.scheduler.add_timer(1000, self.update_gui, name="update_gui")
-        self.scheduler.add_timer(60000, self.clock.resync_from_astropy, name="sidereal_resync")
+        self.scheduler.add_timer(60000, self.clock.request_resync, name="sidereal_resync")
         self.data_timer = self.scheduler.add_timer(1000,
                                                self.update_data,
                                                name="update_data")
+        self.schedule_tick()
 
         # Measure refresh rate
         self.time_of_last_fps_update = time.perf_counter()
@@ -221,62 +300,155 @@ class Threepio(QtWidgets.QMainWindow):
 
     def tick(self):
         """
-        Primary controller for each clock tick. Fires as fast as possible up to 100Hz.
-        Anything meant to update as often as possible should be placed here. Everything
+        Primary controller. Runs whenever the acquisition thread has samples
+        waiting and whenever a timer is due. Anything that has to keep up with
+        the data should be placed here, and drawing in render(). Everything
         else should be assigned to a timer.
         """
 
-        # Attempt to grab latest data points; they won't always be written to the
-        # data file
-        tars_data = self.tars.read_all()  # Get data from DAQ
-        minitars_datum = self.minitars.read_latest()  # Get data from Arduino
-        sidereal_timestamp = self.clock.get_sidereal_seconds()
-
-        # The two devices stream independently. Keep the most recent
-        # declination rather than requiring both serial frames to land during
-        # the same 10 ms tick; otherwise a slow or disconnected declinometer
-        # suppresses every valid DATAQ voltage reading.
-        if minitars_datum is not None:
-            self.current_dec = self.dec_calc.calculate_declination(minitars_datum)
-
-        self.record_samples(tars_data, sidereal_timestamp)
+        # The timer is single-shot, so it must be re-armed even if something
+        # below raises; otherwise the main loop would stop for good
+        try:
+            # Take whatever the acquisition thread has read since the last tick;
+            # it won't all be written to the data file
+            blocks = self.acquisition.drain()
+            self.follow_clock_steps()
+            for block in blocks:
+                block = self.onto_timeline(block)
+                # The two devices stream independently. Keep the most recent
+                # declination rather than requiring both serial frames to land in
+                # the same block; otherwise a slow or disconnected declinometer
+                # suppresses every valid DATAQ voltage reading.
+                if block.dec is not None:
+                    self.current_dec = self.dec_calc.calculate_declination(block.dec)
+                    self.dec_track.add(block.dec_timestamp, self.current_dec)
+
+                self.record_samples(block.scans, block.timestamps)
+
+            if blocks:
+                self.schedule_render("stripchart")
+            if abs(self.current_dec - GB_LATITUDE - self.dec_view_angle) >= self.DEC_VIEW_THRESHOLD:
+                self.schedule_render("dec_view")
+
+            self.scheduler.run_timers()  # Run all timers that are due
+        finally:
+            self.schedule_tick()
+
+    def follow_clock_steps(self):
+        """
+        Move everything kept on the sidereal timeline by the steps the clock
+        has taken since last time, which only a manual calibration does. A
+        step back would otherwise leave the samples to come stamped before the
+        ones already drawn, and a step forward leave a gap in the chart.
+        """
+        steps = self.clock.steps
+        if len(steps) == self.clock_steps:
+            return
+        shift = sum(steps[self.clock_steps:])
+        self.clock_steps = len(steps)
+        self.stripchart_buffer.shift(shift)
+        self.stripchart_history.shift(shift)
+        self.dec_track.shift(shift)
+        if self.stripchart_view is not None:  # Keep showing the same samples
+            start, end = self.stripchart_view
+            self.stripchart_view = (start + shift, end + shift)
+        self.schedule_render("stripchart")
+
+    def onto_timeline(self, block: SampleBlock) -> SampleBlock:
+        """`block` with its times moved by any steps the clock took after it was stamped."""
+        if block.clock_steps == self.clock_steps:
+            return block
+        shift = sum(self.clock.steps[block.clock_steps:self.clock_steps])
+        return dataclasses.replace(
+            block,
+            timestamps=block.timestamps + shift,
+            dec_timestamp=None if block.dec_timestamp is None else block.dec_timestamp + shift,
+            clock_steps=self.clock_steps,
+        )
 
-        self.scheduler.run_timers()  # Run all timers that are due
+    def schedule_tick(self):
+        """Sleep until the next timer is due, unless samples arrive first."""
+        wait = None if self.acquisition.running else self.BASE_PERIOD
+        due = self.scheduler.next_due()
+        if due is not None:
+            until_due = max(0, ceil((due - time.monotonic()) * 1000))
+            wait = until_due if wait is None else min(wait, until_due)
+        if wait is not None:
+            self.timer.start(wait)
+
+    def frame_rate(self) -> float:
+        """FRAME_RATE, or the screen's refresh rate if it is lower or unset."""
+        screen = self.screen()
+        refresh_rate = screen.refreshRate() if screen is not None else 0
+        if refresh_rate <= 0:
+            refresh_rate = RenderScheduler.FRAME_RATE
+        if self.FRAME_RATE is None:
+            return refresh_rate
+        return min(self.FRAME_RATE, refresh_rate)
+
+    def schedule_render(self, *views: str):
+        """Redraw `views` at the next frame, however many ticks ask for one before then."""
+        self.renderer.mark(*views)
+        if not self.render_timer.isActive():
+            self.render_timer.start(ceil(self.renderer.next_delay() * 1000))
+
+    def render(self):
+        # Samples still waiting to be handled come first: put the frame off
+        # and let the queued tick take them
+        if self.renderer.should_skip(len(self.acquisition.ring)):
+            self.render_timer.start(ceil(self.renderer.frame_period * 1000))
+            return
 
-        # Update every tick
-        self.update_stripchart()
-        self.update_dec_view()
+        views = self.renderer.begin_frame()
+        if "stripchart" in views:
+            self.update_stripchart()
+        if "dec_view" in views:
+            self.update_dec_view()
+        self.renderer.end_frame()
 
         self.ticks_since_last_fps_update += 1  # For measuring fps
 
-    def record_samples(self, data, sidereal_timestamp: float) -> None:
-        """Turn the scans read this tick into data points and offer each one to
-        the observation, which records it only if it samples at the DAQ's rate."""
-        if not data:
+    def record_samples(self, data, timestamps) -> None:
+        """Turn the scans read this tick, an (N, 2) block of channel A and B
+        volts taken at the N `timestamps` on the sidereal timeline, into data
+        points and offer each one to the observation, which records it only if
+        it samples at the DAQ's rate."""
+        if len(data) == 0:
             return
 
-        # The DI-4108 clocks its scans in hardware, so a batch that arrived
-        # together was sampled at even intervals ending about now. Stamping the
-        # whole batch with the current time would give several samples the same
-        # RA, which at the pulsar data rate is most of the timing information.
-        period = self.clock.solar_to_sidereal(self.tars.sample_period)
-        offsets = [(len(data) - 1 - i) * period for i in range(len(data))]
+        # The declinometer reads a few times a second to the DAQ's hundreds or
+        # thousands, so each scan gets the declination at the time it was taken
+        if self.dec_track:
+            decs = self.dec_track.at(timestamps)
+        else:  # Nothing from the declinometer yet
+            decs = np.full(len(data), float(self.current_dec))
 
         recording = self.obs is not None and self.obs.RECORDS_EVERY_SAMPLE
         obs_timestamp = self.clock.get_time()
-        for datum, offset in zip(data, offsets):
+        for (a, b), timestamp, dec in zip(data.tolist(), timestamps.tolist(), decs.tolist()):
             self.current_data_point = DataPoint(  # Create data point
-                float(sidereal_timestamp - offset),  # RA
-                float(self.current_dec),  # Dec
-                float(datum.a),  # Channel A
-                float(datum.b),  # Channel B
+                timestamp,  # RA
+                dec,  # Dec
+                a,  # Channel A
+                b,  # Channel B
             )
             self.data.append(self.current_data_point)  # Add to data list
             if recording:
                 assert self.obs is not None
                 self.obs.record_sample(self.current_data_point, obs_timestamp)
 
+        self.decimator.add(data, float(timestamps[0]), float(timestamps[-1]), decs)
+        self.stripchart_buffer.add(timestamps, data)
+        self.stripchart_history.add(timestamps, data)
+
     def update_data(self) -> None:
+        # Close the period whether or not an observation is running, so that
+        # the first point an observation sees covers one period and not all the
+        # time since the app started
+        data_point = self.decimator.emit()
+        if data_point is None:  # No scans arrived this period; repeat the last
+            data_point = self.current_data_point
+
         if not self.check_and_set_observation_state():
             return
         assert self.obs is not None  # The language server was complaining
@@ -284,9 +456,7 @@ class Threepio(QtWidgets.QMainWindow):
         period = 1000 / self.obs.freq  # Hz -> ms
         self.data_timer.set_period(period)
 
-        transmission = self.obs.communicate(
-            self.current_data_point, self.clock.get_time()
-        )
+        transmission = self.obs.communicate(data_point, self.clock.get_time())
 
         obs_type = self.obs.obs_type
 
@@ -423,9 +593,14 @@ class Threepio(QtWidgets.QMainWindow):
             self.ui.actionPulsar.setDisabled(obs_is_loaded)
             self.ui.actionGetInfo.setDisabled(not obs_is_loaded)
             self.ui_thinks_obs_is_set = obs_is_loaded
-            # Filtering is a property of the loaded observation, so it has to
-            # follow the observation being loaded and unloaded.
-            self.tars.set_filtering(self.obs.FILTERED if obs_is_loaded else True)
+            # Filtering and the scan rate are properties of the loaded
+            # observation, so they have to follow the observation being loaded
+            # and unloaded.
+            obs = self.obs if obs_is_loaded else Observation
+            with self.acquisition.paused():
+                self.tars.set_filtering(obs.FILTERED)
+                if not self.tars.set_profile(obs.PROFILE):
+                    self.log(f"DataQ may not be scanning at {obs.PROFILE.name}", warning=True)
 
         if self.obs is not None:
             if not self.ui_thinks_obs_is_set:
@@ -442,9 +617,15 @@ class Threepio(QtWidgets.QMainWindow):
         dialog.exec()
 
     def update_stripchart_speed(self):
+        previous_seconds = self.stripchart_display_seconds
         self.stripchart_display_seconds = 120 - (
             (110 / 1000) * self.ui.stripchart_speed_slider.value()
         )
+        if self.stripchart_display_seconds > previous_seconds:
+            # The wider window takes in samples the dynamic scale had expired
+            self.stripchart_buffer.rebuild_extremes(
+                self.clock.get_sidereal_timeline() - self.stripchart_display_seconds
+            )
         self.ui.stripchart_speed_value_label.setText(
             f"{self.stripchart_display_seconds:.0f}s"
         )
@@ -453,6 +634,7 @@ class Threepio(QtWidgets.QMainWindow):
         # current_time = self.clock.get_time()
 
         self.ui.ra_value.setText(self.clock.get_formatted_sidereal_time())  # RA
+        self.ui.ra_value.setToolTip(self.describe_clock())
         self.ui.dec_value.setText(f"{self.current_dec:.4f}°")  # Dec
         if self.obs is not None:
             self.ui.sweep_value.setText(
@@ -461,6 +643,7 @@ class Threepio(QtWidgets.QMainWindow):
 
         self.update_progress_bar()
         self.update_fps()
+        self.report_acquisition_drops()
         self.update_console()
         self.update_voltage()
 
@@ -500,25 +683,36 @@ class Threepio(QtWidgets.QMainWindow):
             self.ui.progressBar.setFormat("n/a")
             self.ui.progressBar.setValue(0)
 
-    def update_dec_view(self):
-        angle = self.current_dec - GB_LATITUDE
-
+    def initialize_dec_view(self):
+        """Load the telescope's pixmaps once; update_dec_view() only turns the dish."""
         # Telescope dish
-        dish = QtGui.QPixmap("assets/dish.png")
-        dish = QtWidgets.QGraphicsPixmapItem(dish)
-        dish.setTransformOriginPoint(32, 32)
-        dish.setTransformationMode(QtCore.Qt.TransformationMode.SmoothTransformation)
-        dish.setY(16)
-        dish.setRotation(angle)
+        self.dish_item = QtWidgets.QGraphicsPixmapItem(QtGui.QPixmap("assets/dish.png"))
+        self.dish_item.setTransformOriginPoint(32, 32)
+        self.dish_item.setTransformationMode(QtCore.Qt.TransformationMode.SmoothTransformation)
+        self.dish_item.setY(16)
 
         # Telescope base
-        base = QtGui.QPixmap("assets/base.png")
-        base = QtWidgets.QGraphicsPixmapItem(base)
+        base = QtWidgets.QGraphicsPixmapItem(QtGui.QPixmap("assets/base.png"))
         base.setTransformationMode(QtCore.Qt.TransformationMode.SmoothTransformation)
 
-        self.dec_scene.clear()
-        for i in [dish, base]:
-            self.dec_scene.addItem(i)
+        for item in [self.dish_item, base]:
+            self.dec_scene.addItem(item)
+        self.update_dec_view()
+
+    def update_dec_view(self):
+        self.dec_view_angle = self.current_dec - GB_LATITUDE
+        self.dish_item.setRotation(self.dec_view_angle)
+
+    def report_acquisition_drops(self):
+        """Warn if the GUI fell so far behind that the acquisition ring overflowed."""
+        dropped = self.acquisition.ring.dropped
+        if dropped != self.reported_acquisition_drops:
+            self.log(
+                f"GUI fell behind; {dropped - self.reported_acquisition_drops} "
+                "acquisition blocks dropped",
+                warning=True,
+            )
+            self.reported_acquisition_drops = dropped
 
     def update_fps(self):
         """Updates the fps counter to display current refresh rate"""
@@ -533,9 +727,26 @@ class Threepio(QtWidgets.QMainWindow):
             new_fps = "-1.0"
 
         self.ui.refresh_value.setText(new_fps)
+        self.ui.refresh_value.setToolTip(
+            "\n".join(
+                [f"DAQ sample timing jitter: {self.tars.timebase.jitter * 1e6:.0f} µs per read"]
+                + [f"{timer.name}: {timer.stats.describe()}" for timer in self.scheduler.timers]
+            )
+        )
         self.time_of_last_fps_update = current_time
         self.ticks_since_last_fps_update = 0
 
+    def describe_clock(self) -> str:
+        clock = self.clock
+        if clock.astropy_error is not None:
+            return f"Sidereal time from the closed-form model; astropy failed: {clock.astropy_error}"
+        if not clock.resyncs:
+            return "Sidereal time from the closed-form model while astropy loads"
+        return (
+            f"Last astropy resync corrected {clock.last_correction * 1000:+.1f} ms "
+            f"and took {clock.last_compute_seconds * 1000:.0f} ms"
+        )
+
     def initialize_stripchart(self):
         self.chart.addSeries(self.stripchart_series_b)
         self.chart.addSeries(self.stripchart_series_a)
@@ -558,62 +769,123 @@ class Threepio(QtWidgets.QMainWindow):
         self.ui.stripchart.setChart(self.chart)
 
     def update_stripchart(self):
-        try:
-            # Parse latest data point
-            # TODO: This will duplicate points if one fails to read
-            new_a_raw = self.data[len(self.data) - 1].a
-            new_b_raw = self.data[len(self.data) - 1].b
-            new_ra_raw = self.data[len(self.data) - 1].timestamp
-
-            # Handle legacy tuple payloads from old Tars sampling code.
-            if isinstance(new_a_raw, tuple):
-                new_a_raw = new_a_raw[1]
-            if isinstance(new_b_raw, tuple):
-                new_b_raw = new_b_raw[1]
-
-            new_a = float(new_a_raw)
-            new_b = float(new_b_raw)
-            new_ra = float(new_ra_raw)
-
-            # Add new data point to both series
-            self.stripchart_series_a.append(new_a, new_ra)
-            self.stripchart_series_b.append(new_b, new_ra)
-
-            # We use these value several times
-            current_sideral_seconds = self.clock.get_sidereal_seconds()
-            oldest_y = current_sideral_seconds - self.stripchart_display_seconds
-
-            # Remove the trailing end of the series
-            clear_it = self.should_clear_stripchart  # Prevents a race hazard?
-            for i in [self.stripchart_series_a, self.stripchart_series_b]:
-                if clear_it:
-                    i.clear()
-                elif i.count() > 2 and i.at(1).y() < oldest_y:
-                    i.removePoints(0, 2)
+        """Redraw both traces from the samples in the window shown, in one go."""
+        if self.should_clear_stripchart:
+            self.stripchart_buffer.clear()
+            self.stripchart_history.clear()
             self.should_clear_stripchart = False
 
-            # Check for visibility
-            if self.channel_visibility[0]:
-                pen = QtGui.QPen(QtGui.QColor(self.BLUE))
-            else:
-                pen = QtGui.QPen(QtGui.QColor(0, 0, 0, 0))
-            self.stripchart_series_a.setPen(pen)
-
-            if self.channel_visibility[1]:
-                pen = QtGui.QPen(QtGui.QColor(self.RED))
+        # On the sidereal timeline, like the samples, so that the window
+        # carries on through sidereal midnight
+        if self.stripchart_view is None:
+            newest_y = self.clock.get_sidereal_timeline()
+            oldest_y = newest_y - self.stripchart_display_seconds
+        else:
+            oldest_y, newest_y = self.stripchart_view
+
+        # Decimated to the chart's height, then swapped in with a single
+        # update, where append() and removePoints() each had the chart redo
+        # its bookkeeping
+        rows = round(self.chart.plotArea().height() * self.devicePixelRatioF())
+        rows = rows if rows > 0 else StripchartBuffer.ROWS
+        if self.stripchart_view is None:
+            (times_a, a), (times_b, b) = self.stripchart_buffer.window(oldest_y, rows)
+            self.stripchart_buffer.extremes.expire(oldest_y)
+        else:
+            # Every sample while they are still kept, and the history's bins
+            # once the view reaches back past them
+            buffered = self.stripchart_buffer.oldest()
+            if buffered is not None and buffered <= oldest_y:
+                (times_a, a), (times_b, b) = self.stripchart_buffer.window(oldest_y, rows, newest_y)
             else:
-                pen = QtGui.QPen(QtGui.QColor(0, 0, 0, 0))
-            self.stripchart_series_b.setPen(pen)
+                (times_a, a), (times_b, b) = self.stripchart_history.window(oldest_y, newest_y, rows)
+            self.stripchart_view_extremes = (
+                (min(a.min(), b.min()), max(a.max(), b.max())) if len(a) else None
+            )
+        self.stripchart_series_a.replaceNp(a, times_a)
+        self.stripchart_series_b.replaceNp(b, times_b)
 
-            self.axis_y.setMin(oldest_y)
-            self.axis_y.setMax(current_sideral_seconds)
-            self.update_stripchart_axes()
+        self.axis_y.setMin(oldest_y)
+        self.axis_y.setMax(newest_y)
+        self.update_stripchart_axes()
 
-        except IndexError:  # No data yet
-            pass
+    def eventFilter(self, watched, event) -> bool:
+        """Zoom and pan the stripchart through its history with the mouse."""
+        if watched is not self.ui.stripchart.viewport():
+            return super().eventFilter(watched, event)
+        kind = event.type()
+        if kind == QtCore.QEvent.Type.Wheel:
+            notches = event.angleDelta().y() / 120
+            self.zoom_stripchart(
+                self.STRIPCHART_ZOOM_PER_NOTCH ** -notches,
+                self.stripchart_time_at(event.position().y()),
+            )
+            return True
+        if kind == QtCore.QEvent.Type.MouseButtonDblClick:
+            self.follow_stripchart()
+            return True
+        if kind == QtCore.QEvent.Type.MouseButtonPress:
+            self.stripchart_drag = (event.position().y(), self.current_stripchart_view())
+            return True
+        if kind == QtCore.QEvent.Type.MouseMove and self.stripchart_drag is not None:
+            start_y, (start, end) = self.stripchart_drag
+            height = self.chart.plotArea().height()
+            if height > 0:
+                # Time runs up the chart, so dragging down goes forward
+                shift = (event.position().y() - start_y) / height * (end - start)
+                self.set_stripchart_view(start + shift, end + shift)
+            return True
+        if kind == QtCore.QEvent.Type.MouseButtonRelease:
+            self.stripchart_drag = None
+            return True
+        return super().eventFilter(watched, event)
+
+    def current_stripchart_view(self) -> tuple[float, float]:
+        """The (start, end) of the time shown, following the newest samples or not."""
+        if self.stripchart_view is not None:
+            return self.stripchart_view
+        newest = self.clock.get_sidereal_timeline()
+        return newest - self.stripchart_display_seconds, newest
+
+    def stripchart_time_at(self, y: float) -> float:
+        """The time at `y` pixels down the stripchart's viewport."""
+        start, end = self.current_stripchart_view()
+        plot_area = self.chart.plotArea()
+        if plot_area.height() <= 0:
+            return end
+        below_top = min(max((y - plot_area.top()) / plot_area.height(), 0.0), 1.0)
+        return end - below_top * (end - start)
+
+    def zoom_stripchart(self, factor: float, anchor: float):
+        """Scale the time shown by `factor`, keeping `anchor` where it is."""
+        start, end = self.current_stripchart_view()
+        span = max((end - start) * factor, self.STRIPCHART_MIN_SPAN)
+        fraction = (anchor - start) / (end - start)
+        self.set_stripchart_view(anchor - fraction * span, anchor + (1 - fraction) * span)
+
+    def set_stripchart_view(self, start: float, end: float):
+        """Show from `start` to `end`, kept within the history recorded."""
+        newest = self.clock.get_sidereal_timeline()
+        oldest = self.stripchart_history.oldest()
+        oldest = min(oldest if oldest is not None else newest, newest - self.STRIPCHART_MIN_SPAN)
+        span = min(end - start, newest - oldest)
+        start = min(max(start, oldest), newest - span)
+        self.stripchart_view = (start, start + span)
+        self.schedule_render("stripchart")
+
+    def follow_stripchart(self):
+        """Go back to showing the newest samples."""
+        self.stripchart_view = None
+        self.stripchart_view_extremes = None
+        self.schedule_render("stripchart")
 
     def set_channel_visibility(self, show_a: bool, show_b: bool):
         self.channel_visibility = (show_a, show_b)
+        for series, color, shown in (
+            (self.stripchart_series_a, self.BLUE, show_a),
+            (self.stripchart_series_b, self.RED, show_b),
+        ):
+            series.setPen(QtGui.QPen(QtGui.QColor(color) if shown else QtGui.QColor(0, 0, 0, 0)))
         if show_a and show_b:
             self.ui.channel_dual_button.setChecked(True)
         elif show_a:
@@ -623,6 +895,7 @@ class Threepio(QtWidgets.QMainWindow):
 
     def clear_stripchart(self):
         self.should_clear_stripchart = True
+        self.follow_stripchart()
 
     def initialize_voltage_range_slider(self):
         slider = self.ui.stripchart_voltage_range_slider
@@ -686,18 +959,32 @@ class Threepio(QtWidgets.QMainWindow):
 
     def calculate_stripchart_voltage_range(self):
         """Fit both ends of the axis to the data, but never show below 0V."""
-        voltages = [
-            point.x()
-            for series in [self.stripchart_series_a, self.stripchart_series_b]
-            for point in series.points()
-        ]
-        if not voltages:
+        if self.stripchart_view is None:
+            extremes = self.stripchart_buffer.extremes.range()
+        else:
+            extremes = self.stripchart_view_extremes
+        if extremes is None:
             return 0.0, self.stripchart_min_voltage_range
-        min_voltage = max(0.0, min(voltages))
-        return self.enforce_min_voltage_span(
-            min_voltage, max(max(voltages), min_voltage)
+        low, high = extremes
+        headroom = (high - low) * self.STRIPCHART_HEADROOM
+        min_voltage = max(0.0, low - headroom)
+        target = self.enforce_min_voltage_span(
+            min_voltage, max(high + headroom, min_voltage)
         )
 
+        # Hysteresis: keep the axis while the data fits it and still fills
+        # enough of it, rather than following every frame's noise
+        # The axis never goes below 0V, so data below it fits an axis from 0V
+        current = self.stripchart_voltage_range
+        if (
+            current is not None
+            and current[0] <= max(low, 0.0)
+            and high <= current[1]
+            and target[1] - target[0] >= self.STRIPCHART_SHRINK_FRACTION * (current[1] - current[0])
+        ):
+            return current
+        return target
+
     def update_stripchart_axes(self):
         if self.stripchart_dynamic_scale_enabled:
             min_voltage, max_voltage = self.calculate_stripchart_voltage_range()
@@ -705,8 +992,9 @@ class Threepio(QtWidgets.QMainWindow):
             min_voltage, max_voltage = self.enforce_min_voltage_span(
                 self.stripchart_manual_min_voltage, self.stripchart_manual_max_voltage
             )
-        self.axis_x.setMin(min_voltage)
-        self.axis_x.setMax(max_voltage)
+        if (min_voltage, max_voltage) != self.stripchart_voltage_range:
+            self.axis_x.setRange(min_voltage, max_voltage)
+            self.stripchart_voltage_range = (min_voltage, max_voltage)
         if not self.stripchart_grid_enabled:
             self.axis_x.setVisible(False)
             self.axis_y.setVisible(False)
@@ -727,16 +1015,15 @@ class Threepio(QtWidgets.QMainWindow):
             y_step = y_range / y_divisions
             self.axis_x.setTickType(QtCharts.QValueAxis.TickType.TicksFixed)
             self.axis_y.setTickType(QtCharts.QValueAxis.TickType.TicksDynamic)
-            current_sidereal_time = self.clock.get_sidereal_seconds()
-            time_scroll_offset = current_sidereal_time % self.stripchart_display_seconds
-            self.axis_y.setTickAnchor(current_sidereal_time - time_scroll_offset)
+            # Anchored to a multiple of the span, so the grid scrolls with the data
+            self.axis_y.setTickAnchor(self.axis_y.max() - self.axis_y.max() % y_range)
             self.axis_y.setTickInterval(y_step)
             self.axis_x.setTickCount(x_divisions + 1)
 
     def update_voltage(self):
         if len(self.data) > 0:
-            self.ui.channelA_value.setText("%.4fV" % self.data[len(self.data) - 1].a)
-            self.ui.channelB_value.setText("%.4fV" % self.data[len(self.data) - 1].b)
+            self.ui.channelA_value.setText("%.4fV" % self.data[-1].a)
+            self.ui.channelB_value.setText("%.4fV" % self.data[-1].b)
 
     def handle_survey(self):
         obs = Survey()
@@ -776,11 +1063,13 @@ class Threepio(QtWidgets.QMainWindow):
         dialog.exec()
 
         self.dec_calc.load_dec_cal()
+        self.log(f"Dec calibration: {self.dec_calc.describe_fit()}")
 
     def ra_calibration(self):
         dialog = RADialog(self, self.clock)
         dialog.show()
         dialog.exec()
+        self.follow_clock_steps()  # Rather than draw a frame on the old timeline first
 
     def message(self, message, beep=True, log=True):
         if log:
@@ -882,6 +1171,7 @@ class Threepio(QtWidgets.QMainWindow):
 
         close = quit_dialog.exec()
         if close:
+            self.acquisition.stop()
             event.accept()
         else:
             event.ignore()
@@ -4,9 +4,18 @@ from _tools.datapoint import DataPoint
 from _tools.precious import MyPrecious
 from _tools.superclock import SuperClock, GB_LATITUDE, GB_LONGITUDE
 from _tools.timer_manager import TimerManager
-from _tools.tars import Tars, discovery
+from _tools.tars import (
+    Tars,
+    discovery,
+    AcquisitionProfile,
+    PROFILE_100HZ,
+    PROFILE_1KHZ,
+    PROFILE_5KHZ,
+)
 from _tools.logtask import LogTask
 from _tools.minitars import MiniTars
+from _tools.acquisition import Acquisition, SampleBlock
+from _tools.decimator import Decimator, DecimatedPoint
 from _tools.obsrecord import ObsRecord
 from _tools.alert import Alert
 from _tools.observation import Observation, ObsType
@@ -15,3 +24,6 @@ from _tools.pulsar import Pulsar
 from _tools.survey import Survey
 from _tools.spectrum import Spectrum
 from _tools.deccalc import DecCalc
+from _tools.dectrack import DecTrack
+from _tools.stripchart import StripchartBuffer, StripchartHistory
+from _tools.render import RenderScheduler